@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark fetch, merge, save and load hot paths on synthetic data
+
+Usage:
+  python -m benchmarks.run_benchmarks --symbols 5 50 500 --days 1 30 365 --output results.json
+"""
+import argparse
+import json
+import logging
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from benchmarks.synthetic import SyntheticDataSource, generate_ohlcv, synthetic_symbols
+from storage.file_storage import FileStorageManager
+
+BACKENDS = ['file', 'parquet', 'partitioned', 'partitioned_parquet', 'mmap', 'database']
+OPERATIONS = ['fetch', 'save', 'save_append', 'remove_duplicates', 'load', 'load_symbol', 'summary']
+
+def create_storage(backend: str, path: str):
+    """
+    Create a storage manager rooted in a scratch directory
+    
+    Args:
+        backend: Storage backend name
+        path: Scratch directory
+    
+    Returns:
+        Storage manager instance
+    """
+    if backend == 'file':
+        return FileStorageManager(path)
+    if backend == 'parquet':
+        from storage.parquet_storage import ParquetStorageManager
+        return ParquetStorageManager(path)
+    if backend == 'partitioned':
+        from storage.partitioned_storage import PartitionedStorageManager
+        return PartitionedStorageManager(path)
+    if backend == 'partitioned_parquet':
+        from storage.partitioned_storage import PartitionedParquetStorageManager
+        return PartitionedParquetStorageManager(path)
+    if backend == 'mmap':
+        from storage.mmap_storage import MmapStorageManager
+        return MmapStorageManager(path)
+    if backend == 'database':
+        from storage.database import DatabaseManager
+        return DatabaseManager(f"{path}/market_data.db")
+    raise ValueError(f"Unsupported storage type: {backend}")
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process so far (MB)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+def measure(fn: Callable, repeat: int, setup: Callable = None) -> Dict:
+    """
+    Time an operation and measure its Python allocation peak
+    
+    Args:
+        fn: Operation to run
+        repeat: Number of timed runs
+        setup: Optional callable run (untimed) before every run
+    
+    Returns:
+        Dictionary with latency percentiles and memory figures
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    
+    # One extra traced run - tracemalloc slows allocation-heavy code down
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    values = np.array(timings)
+    return {
+        'repeat': repeat,
+        'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(values, 99)) * 1000, 3),
+        'mean_ms': round(float(values.mean()) * 1000, 3),
+        'peak_traced_mb': round(traced_peak / (1024 * 1024), 2),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def run_case(backend: str, n_symbols: int, days: int, interval: str, repeat: int,
+             operations: List[str], source: SyntheticDataSource) -> List[Dict]:
+    """
+    Run all operations for one backend / universe size / history length
+    
+    Returns:
+        List of result dictionaries
+    """
+    symbols = synthetic_symbols(n_symbols)
+    data = generate_ohlcv(symbols, days, interval)
+    rows = len(data)
+    
+    # The last day re-sent with revised closes exercises the merge path
+    last_day = data['Datetime'].dt.normalize() == data['Datetime'].dt.normalize().max()
+    update = data[last_day].assign(Close=data.loc[last_day, 'Close'] * 1.001)
+    
+    scratch = tempfile.mkdtemp(prefix=f'bench_{backend}_')
+    results = []
+    
+    try:
+        storage = create_storage(backend, scratch)
+        
+        # The database dedups through its primary key - time the file path instead
+        merger = storage if hasattr(storage, 'remove_duplicates') else FileStorageManager(scratch)
+        
+        def reset():
+            storage.save_data(data, interval, append=False)
+        
+        cases = {
+            'fetch': (lambda: source.get_multiple_stocks_data(symbols, f'{days}d', interval), None, rows),
+            'save': (reset, None, rows),
+            'save_append': (lambda: storage.save_data(update, interval, append=True), reset, len(update)),
+            'remove_duplicates': (
+                lambda: merger.remove_duplicates(pd.concat([data, update], ignore_index=True)),
+                None, rows + len(update)
+            ),
+            'load': (lambda: storage.load_data(interval), None, rows),
+            'load_symbol': (lambda: storage.load_data(interval, symbol_filter=symbols[:1]), None, rows // n_symbols),
+            'summary': (storage.get_data_summary, None, rows)
+        }
+        
+        reset()
+        for operation in operations:
+            fn, setup, op_rows = cases[operation]
+            result = measure(fn, repeat, setup)
+            result.update({
+                'backend': backend,
+                'operation': operation,
+                'symbols': n_symbols,
+                'days': days,
+                'interval': interval,
+                'rows': op_rows,
+                'throughput_rows_per_sec': round(op_rows / (result['p50_ms'] / 1000), 1) if result['p50_ms'] else None
+            })
+            results.append(result)
+            print(f"{backend:>20} {operation:>18} {n_symbols:>5} symbols {days:>5}d "
+                  f"p50 {result['p50_ms']:>10.2f} ms  p99 {result['p99_ms']:>10.2f} ms", file=sys.stderr)
+        
+        if hasattr(storage, 'close'):
+            storage.close()
+            
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    
+    return results
+
+def main():
+    """Parse arguments, run the benchmark grid and write JSON results"""
+    parser = argparse.ArgumentParser(description='Benchmark storage and fetch hot paths on synthetic data')
+    parser.add_argument('--symbols', type=int, nargs='+', default=[5, 50, 500],
+                        help='Universe sizes to benchmark (e.g. 5 50 500 5000)')
+    parser.add_argument('--days', type=int, nargs='+', default=[1, 30, 365],
+                        help='History lengths in days (e.g. 1 30 365 3650)')
+    parser.add_argument('--interval', default='15m', choices=['15m', '1h', '1d', '1wk'],
+                        help='Bar interval (default: 15m)')
+    parser.add_argument('--backends', nargs='+', default=['file'], choices=BACKENDS,
+                        help='Storage backends to compare (default: file)')
+    parser.add_argument('--operations', nargs='+', default=OPERATIONS, choices=OPERATIONS,
+                        help='Operations to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per operation')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated request latency (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Simulated latency jitter (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Simulated request failure rate')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent fetch workers')
+    parser.add_argument('--requests-per-second', type=float, default=1000.0,
+                        help='Rate limit applied to the synthetic source')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    args = parser.parse_args()
+    
+    # Keep storage INFO logs out of the timings
+    logging.basicConfig(level=logging.WARNING)
+    
+    source = SyntheticDataSource(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_workers=args.workers,
+        requests_per_second=args.requests_per_second
+    )
+    
+    results = []
+    for backend in args.backends:
+        try:
+            for n_symbols in args.symbols:
+                for days in args.days:
+                    results.extend(run_case(backend, n_symbols, days, args.interval,
+                                            args.repeat, args.operations, source))
+        except ImportError as e:
+            print(f"Skipping {backend}: {str(e)}", file=sys.stderr)
+    
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__
+        },
+        'config': vars(args),
+        'results': results
+    }
+    
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
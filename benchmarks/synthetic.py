@@ -0,0 +1,192 @@
+"""
+Deterministic synthetic OHLCV data and a fake data source for benchmarks
+"""
+import threading
+import time
+import zlib
+from collections import Counter
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from data_sources.base import BaseDataSource
+from services.incremental_fetch import period_to_timedelta
+from storage.schema import BAR_COLUMNS, BAR_TIMEZONE, concat_bars
+from utils.rate_limiter import rate_limiter
+
+# Intraday bar offsets from the 9:15 IST session open
+SESSION_OPEN = timedelta(hours=9, minutes=15)
+BAR_OFFSETS = {
+    '15m': [timedelta(minutes=15 * i) for i in range(25)],
+    '1h': [timedelta(hours=i) for i in range(7)],
+    '1d': [timedelta(0)],
+    '1wk': [timedelta(0)]
+}
+
+def synthetic_symbols(count: int) -> List[str]:
+    """
+    Generate provider-style symbol names
+    
+    Args:
+        count: Number of symbols
+    
+    Returns:
+        List like ['SYM0000.NS', 'SYM0001.NS', ...]
+    """
+    return [f"SYM{i:04d}.NS" for i in range(count)]
+
+def bar_timestamps(days: int, interval: str, end: datetime = None) -> pd.DatetimeIndex:
+    """
+    Bar open timestamps covering the last `days` business days
+    
+    Args:
+        days: Number of calendar days of history
+        interval: '15m', '1h', '1d' or '1wk'
+        end: Last day to include (defaults to 2025-06-03)
+    
+    Returns:
+        Timezone-aware DatetimeIndex in the bar timezone
+    """
+    end = pd.Timestamp(end or '2025-06-03').normalize()
+    days_index = pd.bdate_range(end=end, periods=max(1, int(days * 5 / 7)))
+    
+    if interval == '1wk':
+        days_index = days_index[days_index.weekday == 0]
+        if len(days_index) == 0:
+            days_index = pd.DatetimeIndex([end - pd.Timedelta(days=end.weekday())])
+    
+    if interval in ('1d', '1wk'):
+        return days_index.tz_localize(BAR_TIMEZONE)
+    
+    offsets = pd.to_timedelta(BAR_OFFSETS[interval]) + SESSION_OPEN
+    stamps = (days_index.values[:, None] + offsets.values[None, :]).ravel()
+    return pd.DatetimeIndex(stamps).tz_localize(BAR_TIMEZONE)
+
+def generate_ohlcv(symbols: List[str], days: int, interval: str = '15m',
+                   end: datetime = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate random-walk OHLCV bars in the standard long format
+    
+    The same arguments always produce the same data. Prices are float32
+    values widened to float64, as yfinance returns them.
+    
+    Args:
+        symbols: Symbols to generate (the '.NS' suffix is stripped)
+        days: Number of calendar days of history
+        interval: '15m', '1h', '1d' or '1wk'
+        end: Last day to include
+        seed: Random seed
+    
+    Returns:
+        DataFrame with standard bar columns sorted by Symbol and Datetime
+    """
+    timestamps = bar_timestamps(days, interval, end)
+    n_symbols, n_bars = len(symbols), len(timestamps)
+    rng = np.random.default_rng(seed)
+    
+    start_prices = rng.uniform(100.0, 5000.0, size=(n_symbols, 1))
+    returns = rng.normal(0.0, 0.004, size=(n_symbols, n_bars))
+    close = start_prices * np.exp(np.cumsum(returns, axis=1))
+    open_ = np.concatenate([start_prices, close[:, :-1]], axis=1)
+    spread = np.abs(rng.normal(0.0, 0.002, size=(n_symbols, n_bars)))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.integers(1_000, 500_000, size=(n_symbols, n_bars))
+    
+    names = [symbol.replace('.NS', '') for symbol in symbols]
+    return pd.DataFrame({
+        'Datetime': np.tile(timestamps, n_symbols),
+        'Symbol': np.repeat(names, n_bars),
+        'Open': open_.ravel().round(2).astype('float32').astype('float64'),
+        'High': high.ravel().round(2).astype('float32').astype('float64'),
+        'Low': low.ravel().round(2).astype('float32').astype('float64'),
+        'Close': close.ravel().round(2).astype('float32').astype('float64'),
+        'Volume': volume.ravel()
+    }, columns=BAR_COLUMNS)
+
+class SyntheticDataSource(BaseDataSource):
+    """
+    Fake data source returning deterministic bars with simulated latency
+    
+    Each request sleeps for `latency` plus uniform jitter and fails with
+    probability `error_rate`. Requests go through the shared rate limiter
+    like real sources; pass `requests_per_second` to set its quota.
+    """
+    
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0, max_workers: int = 1, requests_per_second: float = None,
+                 rate_limit_delay: float = 0.0):
+        super().__init__(rate_limit_delay, max_workers=max_workers)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        
+        # Request counter per symbol, so latency and failures are reproducible
+        self._attempts = Counter()
+        self._attempts_lock = threading.Lock()
+        
+        if requests_per_second:
+            rate_limiter.configure(self.source_name, requests_per_second, burst=max(1, max_workers))
+    
+    def _symbol_seed(self, symbol: str) -> int:
+        """Stable per-symbol seed"""
+        return zlib.crc32(symbol.encode()) ^ self.seed
+    
+    def _request(self, symbol: str, days: int, interval: str, end: Optional[datetime]) -> pd.DataFrame:
+        """Simulate a provider round trip"""
+        with self._attempts_lock:
+            attempt = self._attempts[symbol]
+            self._attempts[symbol] += 1
+        
+        rng = np.random.default_rng([self._symbol_seed(symbol), attempt])
+        time.sleep(self.latency + rng.uniform(0.0, self.jitter))
+        
+        if rng.random() < self.error_rate:
+            raise ConnectionError(f"Simulated failure for {symbol}")
+        
+        return generate_ohlcv([symbol], days, interval, end=end, seed=self._symbol_seed(symbol))
+    
+    def get_stock_data(self, symbol: str, period: str, interval: str,
+                       start: datetime = None, end: datetime = None) -> Optional[pd.DataFrame]:
+        """
+        Generate data for a single symbol
+        
+        Returns:
+            DataFrame with standard columns or None on a simulated error
+        """
+        try:
+            if start is not None:
+                days = max(1, ((end or datetime.now(start.tzinfo)) - start).days + 1)
+            else:
+                horizon = period_to_timedelta(period) or timedelta(days=365)
+                days = max(1, horizon.days)
+            
+            data = self.rate_limited_request(self._request, symbol, days, interval, end)
+            return self.standardize_dataframe(data, symbol)
+            
+        except Exception:
+            return None
+    
+    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str,
+                                 start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        """
+        Generate data for multiple symbols (concurrently when max_workers > 1)
+        """
+        if self.max_workers > 1:
+            return self.fetch_concurrently(symbols, period, interval, start=start, end=end)
+        
+        all_data = []
+        for symbol in symbols:
+            data = self.get_stock_data(symbol, period, interval, start=start, end=end)
+            if data is not None and not data.empty:
+                all_data.append(data)
+            if self.rate_limit_delay:
+                time.sleep(self.rate_limit_delay)
+        
+        return concat_bars(all_data)
+    
+    def is_available(self) -> bool:
+        """Synthetic data is always available"""
+        return True
@@ -3,16 +3,18 @@ Scheduling configuration for different timeframes
 """
 from datetime import time, datetime
 
+from utils.trading_calendar import trading_calendar
+
 # Cron-like schedule definitions
 SCHEDULES = {
     '15m': {
-        'description': 'Every 15 minutes during market hours',
+        'description': 'After each 15-minute bar close during market hours',
         'cron': '*/15 9-15 * * 1-5',  # Every 15 min, 9-15 hours, Mon-Fri
         'enabled': True,
         'market_hours_only': True
     },
     '1h': {
-        'description': 'Every hour during market hours',
+        'description': 'After each hourly bar close during market hours',
         'cron': '0 9-15 * * 1-5',     # Every hour at minute 0, 9-15 hours, Mon-Fri
         'enabled': True,
         'market_hours_only': True
@@ -43,22 +45,7 @@ MANUAL_UPDATE_WINDOWS = {
     }
 }
 
-# Holiday configuration (when markets are closed)
-MARKET_HOLIDAYS_2024 = [
-    '2024-01-26',  # Republic Day
-    '2024-03-08',  # Holi
-    '2024-03-29',  # Good Friday
-    '2024-04-11',  # Ram Navami
-    '2024-04-17',  # Mahavir Jayanti
-    '2024-05-01',  # Maharashtra Day
-    '2024-08-15',  # Independence Day
-    '2024-08-26',  # Janmashtami
-    '2024-10-02',  # Gandhi Jayanti
-    '2024-10-12',  # Dussehra
-    '2024-11-01',  # Diwali
-    '2024-11-15',  # Guru Nanak Jayanti
-    '2024-12-25',  # Christmas
-]
+# Exchange holidays live in config/holidays/{year}.csv (see utils.trading_calendar)
 
 def is_market_holiday(date_str=None):
     """
@@ -73,7 +60,7 @@ def is_market_holiday(date_str=None):
     if date_str is None:
         date_str = datetime.now().strftime('%Y-%m-%d')
     
-    return date_str in MARKET_HOLIDAYS_2024
+    return trading_calendar.is_holiday(date_str)
 
 def is_trading_day(date_obj=None):
     """
@@ -88,10 +75,4 @@ def is_trading_day(date_obj=None):
     if date_obj is None:
         date_obj = datetime.now()
     
-    # Check if weekend (Saturday=5, Sunday=6)
-    if date_obj.weekday() in [5, 6]:
-        return False
-    
-    # Check if holiday
-    date_str = date_obj.strftime('%Y-%m-%d')
-    return not is_market_holiday(date_str) 
\ No newline at end of file
+    return trading_calendar.is_session(date_obj)
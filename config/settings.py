@@ -6,15 +6,79 @@ from datetime import time
 
 # Data source configuration
 DEFAULT_DATA_SOURCE = 'yfinance'  # Can be changed to 'fyers' later
-RATE_LIMIT_DELAY = 2.0  # Seconds between API calls
+RATE_LIMIT_DELAY = 2.0  # Seconds between API calls (serial fetch mode)
+
+# Concurrent fetching
+MAX_CONCURRENT_REQUESTS = 8   # Worker threads for multi-symbol fetches (1 = serial)
+ASYNC_MAX_CONCURRENCY = 4     # Blocking stages (fetch, load, save) AsyncDataService runs at once
+
+# Batched downloads (one multi-ticker request per chunk, YFinance only)
+BATCH_DOWNLOAD_ENABLED = True
+BATCH_DOWNLOAD_SIZE = 100     # Max tickers per request; larger universes are chunked
+
+# Process-wide token-bucket quotas per data source (keyed by source_name)
+RATE_LIMITS = {
+    'default': {'requests_per_second': 1.0, 'burst': 2},
+    'YFinance': {'requests_per_second': 5.0, 'burst': 10},
+    'Fyers': {'requests_per_second': 8.0, 'burst': 10}
+}
+
+# Adaptive backoff on HTTP 429 / empty responses
+RATE_LIMIT_BACKOFF = {
+    'initial_seconds': 5.0,          # First pause after throttling (doubles on repeats)
+    'max_seconds': 300.0,
+    'decrease_factor': 0.5,          # Rate multiplier on each throttle event
+    'recovery_step': 0.1,            # Fraction of base rate restored per success
+    'min_rate_fraction': 0.1,        # Never drop below 10% of the base rate
+    'empty_response_threshold': 3    # Consecutive empty responses treated as throttling
+}
 
 # File storage configuration
+DEFAULT_STORAGE_TYPE = 'file'  # 'file' (CSV), 'parquet', 'partitioned', 'partitioned_parquet', 'mmap' or 'database'
 DATA_STORAGE_PATH = os.path.join(os.getcwd(), 'data')
 CSV_FILE_PREFIX = 'market_data'
+CSV_CHUNK_SIZE = 100000  # Rows per chunk for streaming reads
+
+# In-memory bar cache (LRU per timeframe/symbol, invalidated on save)
+BAR_CACHE_ENABLED = True
+BAR_CACHE_MAX_MB = 256
+
+# Metadata index (per timeframe/symbol first, last, rows, checksum) kept next to the data.
+# Non-CSV storage types suffix it, the journal and snapshot dirs with their name (e.g. _metadata_index_mmap.json)
+METADATA_INDEX_FILENAME = '_metadata_index.json'
+
+# Crash-safe writes - data files are replaced via temp file + atomic rename
+FSYNC_WRITES = True            # Flush files to disk before renaming (False trades power-loss safety for speed)
+WRITE_JOURNAL_ENABLED = True   # Journal each batch before applying it; interrupted saves are replayed on startup
+JOURNAL_DIRNAME = '_journal'
+
+# Incremental snapshots - saved batches kept per day, so any retained day can be restored
+SNAPSHOTS_ENABLED = True
+SNAPSHOT_DIRNAME = '_snapshots'
+
+# Database storage (storage_type='database', embedded SQLite)
+DATABASE_PATH = os.path.join(DATA_STORAGE_PATH, 'market_data.db')
+DATABASE_TABLE = 'market_data'
+
+# In-memory bar dtypes (categorical Symbol, int64 Volume and these price columns)
+BAR_PRICE_DTYPE = 'auto'       # 'float32', 'float64' or 'auto' (float32 when it loses no precision)
+BAR_PRICE_TOLERANCE = 1e-6     # Largest float32 round-trip error 'auto' accepts
+
+# Parquet storage (storage_type='parquet', requires pyarrow)
+PARQUET_PRICE_DTYPE = 'float64'  # 'float32' halves price storage where precision allows
+PARQUET_COMPRESSION = 'snappy'
 
 # Market hours (IST)
 MARKET_OPEN_TIME = time(9, 15)   # 9:15 AM
 MARKET_CLOSE_TIME = time(15, 30)  # 3:30 PM
+MARKET_TIMEZONE = 'Asia/Kolkata'
+
+# Trading calendar - exchange holidays are read from one CSV per year (date,description)
+MARKET_HOLIDAYS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'holidays')
+TRADING_CALENDAR_START_YEAR = None   # First precomputed year (None: first year with a holiday file; queries outside the range extend it)
+
+# Intraday jobs fire this long after each bar close (anchored at the open), once the provider has the bar
+BAR_CLOSE_DELAY_SECONDS = 10
 
 # Timeframe configurations
 TIMEFRAME_CONFIGS = {
@@ -28,7 +92,8 @@ TIMEFRAME_CONFIGS = {
         'period': '5d',      # Last 5 days for intraday  
         'interval': '1h',
         'update_frequency_minutes': 60,
-        'active_during_market_hours_only': True
+        'active_during_market_hours_only': True,
+        'resample_from': '15m'  # Built from stored 15m bars (see RESAMPLE_ENABLED)
     },
     '1d': {
         'period': '1y',      # Last 1 year for daily data
@@ -47,6 +112,39 @@ TIMEFRAME_CONFIGS = {
     }
 }
 
+# Derived timeframes - timeframes with 'resample_from' are built from stored bars, not fetched
+RESAMPLE_ENABLED = True
+RESAMPLE_RECONCILE_ENABLED = True   # Periodically compare derived bars with the provider's
+RESAMPLE_RECONCILE_CRON = {'day_of_week': 'mon-fri', 'hour': 16, 'minute': 45}
+RESAMPLE_BAR_CLOSE_DELAY_SECONDS = 60   # Derived intraday jobs run later, after the source bars are saved
+
+# Incremental fetching - only request bars newer than the stored high-water mark
+INCREMENTAL_FETCH_ENABLED = True
+INCREMENTAL_OVERLAP_BARS = 2        # Re-fetch this many bars before the mark to pick up revisions
+INCREMENTAL_GROUP_TOLERANCE_HOURS = 24  # Symbols whose windows start this close share one request
+
+# Gap backfill - on scheduler start, fetch only the bar ranges missing within each timeframe's period
+BACKFILL_ENABLED = True
+BACKFILL_MAX_REQUESTS = 20   # Provider requests per timeframe and run (the rest wait for the next run)
+BACKFILL_MERGE_BARS = 25     # Gaps of one symbol this few stored bars apart are fetched as one range
+BACKFILL_EMPTY_FILENAME = '_backfill_empty.json'  # Ranges the provider returned no bars for, kept next to the data
+BACKFILL_EMPTY_RETRY_DAYS = 7  # Such ranges are skipped for this long, then requested again
+
+# Streaming updates - fetch, normalize and save in stages connected by bounded queues
+PIPELINE_ENABLED = True
+PIPELINE_BATCH_ROWS = 50000   # Rows per saved micro-batch (each save merges into the stored file)
+PIPELINE_QUEUE_SIZE = 4       # Frames buffered between stages before the upstream stage blocks
+
+# Scheduler mode - 'timeframe' runs one job per timeframe over all symbols; 'queue' splits each
+# run into per-symbol work items in a priority queue (intraday first, late items shed per symbol)
+SCHEDULER_MODE = 'timeframe'
+WORK_QUEUE_WORKERS = 4   # Threads draining the queue (provider requests still share the rate limiter)
+
+# Process pool - shard normalization, merging and CSV formatting of large batches across cores
+PROCESS_POOL_ENABLED = False
+PROCESS_POOL_WORKERS = None       # Worker processes (None: one per CPU core)
+PROCESS_POOL_MIN_ROWS = 250000    # Smaller saves are merged and written in-process
+
 # Logging configuration
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
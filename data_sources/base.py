@@ -3,20 +3,78 @@ Abstract base class for data sources
 This allows easy switching between yfinance, fyers, etc.
 """
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
+import threading
+import time
+from datetime import datetime
+import numpy as np
 import pandas as pd
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from storage.schema import compact_bars, concat_bars
+from utils.rate_limiter import rate_limiter, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+def standardize_bars(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """
+    Standardize a provider DataFrame to the common bar format
+    
+    Bars come out in the compact in-memory dtypes: categorical Symbol,
+    float32 prices where that loses no precision, and int64 Volume. This is
+    a module-level function so process pool workers can run it.
+    
+    Args:
+        df: Raw DataFrame from data source
+        symbol: Stock symbol
+    
+    Returns:
+        Standardized DataFrame
+    """
+    if df.empty:
+        return df
+    
+    # Ensure required columns exist
+    required_columns = ['Datetime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']
+    
+    # Add Symbol column if missing
+    if 'Symbol' not in df.columns:
+        df['Symbol'] = symbol.replace('.NS', '')
+    
+    # Ensure Datetime is properly formatted
+    if 'Datetime' in df.columns:
+        df['Datetime'] = pd.to_datetime(df['Datetime'])
+    
+    # Select only required columns (if they exist)
+    available_columns = [col for col in required_columns if col in df.columns]
+    df = df[available_columns]
+    
+    return compact_bars(df)
 
 class BaseDataSource(ABC):
     """
     Abstract base class for all data sources
     """
     
-    def __init__(self, rate_limit_delay: float = 1.0):
+    def __init__(self, rate_limit_delay: float = 1.0, max_workers: int = 1):
         self.rate_limit_delay = rate_limit_delay
         self.source_name = self.__class__.__name__
+        
+        # Concurrent fetch settings - request budget comes from the shared rate limiter
+        self.max_workers = max(1, int(max_workers or 1))
+        self._local = threading.local()
+        
+        # Per-symbol latency (seconds) of the last multi-symbol fetch
+        self.last_fetch_latencies: Dict[str, float] = {}
+        
+        # Requests that raised - callers log and swallow these, so count them here
+        self.request_errors = 0
+        self._errors_lock = threading.Lock()
     
     @abstractmethod
-    def get_stock_data(self, symbol: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+    def get_stock_data(self, symbol: str, period: str, interval: str,
+                       start: datetime = None, end: datetime = None) -> Optional[pd.DataFrame]:
         """
         Fetch OHLCV data for a single stock
         
@@ -24,6 +82,8 @@ class BaseDataSource(ABC):
             symbol: Stock symbol (e.g., 'RELIANCE.NS')
             period: Data period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
             interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
+            start: Optional window start (overrides period when given)
+            end: Optional window end (defaults to now)
         
         Returns:
             DataFrame with columns: ['Datetime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']
@@ -32,7 +92,8 @@ class BaseDataSource(ABC):
         pass
     
     @abstractmethod
-    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str) -> pd.DataFrame:
+    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str,
+                                 start: datetime = None, end: datetime = None) -> pd.DataFrame:
         """
         Fetch data for multiple stocks with rate limiting
         
@@ -40,6 +101,8 @@ class BaseDataSource(ABC):
             symbols: List of symbols ['RELIANCE.NS', 'TCS.NS', ...]
             period: Data period
             interval: Data interval
+            start: Optional window start (overrides period when given)
+            end: Optional window end (defaults to now)
         
         Returns:
             Combined DataFrame with all stocks data
@@ -56,6 +119,221 @@ class BaseDataSource(ABC):
         """
         pass
     
+    def rate_limited_request(self, request_fn: Callable, *args, **kwargs):
+        """
+        Run a single provider request under the process-wide rate limiter
+        
+        Draws a token for this source, times the request and reports the
+        outcome back so the limiter can back off on throttling.
+        
+        Args:
+            request_fn: Callable performing the provider request
+            *args, **kwargs: Arguments passed to request_fn
+        
+        Returns:
+            Whatever request_fn returns
+        """
+        rate_limiter.acquire(self.source_name)
+        
+        start = time.perf_counter()
+        try:
+            result = request_fn(*args, **kwargs)
+        except Exception as e:
+            with self._errors_lock:
+                self.request_errors += 1
+            if is_rate_limit_error(e):
+                rate_limiter.report_throttled(self.source_name)
+            raise
+        finally:
+            self._local.last_latency = time.perf_counter() - start
+        
+        if result is None or getattr(result, 'empty', False):
+            rate_limiter.report_empty(self.source_name)
+        else:
+            rate_limiter.report_success(self.source_name)
+        
+        return result
+    
+    def get_failure_count(self) -> int:
+        """
+        Failed and throttled requests of this source so far
+        
+        Fetch methods return None or empty data on errors, so compare the
+        count before and after a fetch to tell "no bars" from a failure.
+        """
+        throttles = rate_limiter.get_bucket(self.source_name).get_stats()['throttle_events']
+        with self._errors_lock:
+            return self.request_errors + throttles
+    
+    def get_last_request_latency(self) -> Optional[float]:
+        """Latency in seconds of the last request made by the calling thread"""
+        return getattr(self._local, 'last_latency', None)
+    
+    def fetch_concurrently(self, symbols: List[str], period: str, interval: str,
+                           start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        """
+        Fetch multiple symbols with a bounded thread pool
+        
+        Every request draws from the process-wide rate limiter, so the
+        provider sees the configured quota regardless of the number of
+        workers or concurrently running jobs.
+        
+        Args:
+            symbols: List of symbols to fetch
+            period: Data period
+            interval: Data interval
+            start: Optional window start
+            end: Optional window end
+        
+        Returns:
+            Combined DataFrame in input symbol order
+        """
+        results = dict(self.iter_concurrently(symbols, period, interval, start=start, end=end))
+        
+        ordered = [results[symbol] for symbol in symbols if symbol in results]
+        return concat_bars(ordered)
+    
+    def iter_concurrently(self, symbols: List[str], period: str, interval: str,
+                          start: datetime = None, end: datetime = None,
+                          max_pending: int = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Fetch symbols with a bounded thread pool, yielding each one as it completes
+        
+        At most `max_pending` requests (default: twice the workers) are in
+        flight or waiting to be consumed, so a slow consumer throttles the
+        fetching instead of letting results pile up in memory.
+        
+        Args:
+            symbols: List of symbols to fetch
+            period: Data period
+            interval: Data interval
+            start: Optional window start
+            end: Optional window end
+            max_pending: Maximum requests submitted ahead of the consumer
+        
+        Yields:
+            (symbol, DataFrame) for every symbol that returned data, in completion order
+        """
+        latencies: Dict[str, float] = {}
+        
+        def fetch_one(symbol: str):
+            self._local.last_latency = None
+            data = self.get_stock_data(symbol, period, interval, start=start, end=end)
+            return data, self.get_last_request_latency()
+        
+        workers = min(self.max_workers, len(symbols)) or 1
+        max_pending = max_pending or workers * 2
+        logger.info(f"Fetching {len(symbols)} symbols with {workers} workers "
+                    f"at {rate_limiter.get_rate(self.source_name):.2f} requests/sec")
+        
+        cycle_start = time.perf_counter()
+        fetched = 0
+        remaining = iter(symbols)
+        pending = {}
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{self.source_name}-fetch')
+        
+        def submit_next():
+            symbol = next(remaining, None)
+            if symbol is not None:
+                pending[executor.submit(fetch_one, symbol)] = symbol
+        
+        try:
+            for _ in range(max_pending):
+                submit_next()
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = pending.pop(future)
+                    # Keep the pool busy while the consumer handles this result
+                    submit_next()
+                    
+                    try:
+                        data, latency = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching data for {symbol}: {str(e)}")
+                        continue
+                    
+                    if latency is not None:
+                        latencies[symbol] = latency
+                    if data is not None and not data.empty:
+                        fetched += 1
+                        yield symbol, data
+        finally:
+            # A consumer that stops early shouldn't wait for requests it will never read
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.last_fetch_latencies = latencies
+        
+        elapsed = time.perf_counter() - cycle_start
+        if latencies:
+            values = np.fromiter(latencies.values(), dtype=float)
+            logger.info(f"Fetched {fetched}/{len(symbols)} symbols in {elapsed:.2f} seconds "
+                        f"(latency p50 {np.percentile(values, 50):.2f}s, "
+                        f"p99 {np.percentile(values, 99):.2f}s, max {values.max():.2f}s)")
+    
+    def iter_serially(self, symbols: List[str], period: str, interval: str,
+                      start: datetime = None, end: datetime = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Fetch symbols one at a time, waiting `rate_limit_delay` seconds between requests
+        
+        Args:
+            symbols: List of symbols to fetch
+            period: Data period
+            interval: Data interval
+            start: Optional window start
+            end: Optional window end
+        
+        Yields:
+            (symbol, DataFrame) for every symbol that returned data, in input order
+        """
+        latencies: Dict[str, float] = {}
+        logger.info(f"Fetching data for {len(symbols)} symbols")
+        
+        try:
+            for i, symbol in enumerate(symbols):
+                logger.info(f"Fetching {symbol} ({i+1}/{len(symbols)})")
+                
+                self._local.last_latency = None
+                data = self.get_stock_data(symbol, period, interval, start=start, end=end)
+                if self.get_last_request_latency() is not None:
+                    latencies[symbol] = self.get_last_request_latency()
+                if data is not None and not data.empty:
+                    yield symbol, data
+                
+                # Rate limiting - wait between requests
+                if i < len(symbols) - 1:  # Don't wait after last symbol
+                    time.sleep(self.rate_limit_delay)
+        finally:
+            self.last_fetch_latencies = latencies
+    
+    def iter_stocks_data(self, symbols: List[str], period: str, interval: str,
+                         start: datetime = None, end: datetime = None) -> Iterator[pd.DataFrame]:
+        """
+        Fetch multiple stocks, yielding data as it arrives instead of one combined frame
+        
+        The default fetches symbol by symbol, through `iter_concurrently`
+        when more than one worker is configured and with the serial
+        `rate_limit_delay` pacing of `iter_serially` otherwise; sources
+        with bulk requests override this to yield per request.
+        
+        Args:
+            symbols: List of symbols
+            period: Data period
+            interval: Data interval
+            start: Optional window start (overrides period when given)
+            end: Optional window end (defaults to now)
+        
+        Yields:
+            Non-empty DataFrames in the standard format
+        """
+        if self.max_workers > 1 and len(symbols) > 1:
+            fetched = self.iter_concurrently(symbols, period, interval, start=start, end=end)
+        else:
+            fetched = self.iter_serially(symbols, period, interval, start=start, end=end)
+        
+        for _, data in fetched:
+            yield data
+    
     def validate_symbol(self, symbol: str) -> bool:
         """
         Validate if symbol format is correct for this data source
@@ -71,7 +349,7 @@ class BaseDataSource(ABC):
     
     def standardize_dataframe(self, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
         """
-        Standardize DataFrame to common format
+        Standardize DataFrame to common format (see `standardize_bars`)
         
         Args:
             df: Raw DataFrame from data source
@@ -80,25 +358,7 @@ class BaseDataSource(ABC):
         Returns:
             Standardized DataFrame
         """
-        if df.empty:
-            return df
-        
-        # Ensure required columns exist
-        required_columns = ['Datetime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']
-        
-        # Add Symbol column if missing
-        if 'Symbol' not in df.columns:
-            df['Symbol'] = symbol.replace('.NS', '')
-        
-        # Ensure Datetime is properly formatted
-        if 'Datetime' in df.columns:
-            df['Datetime'] = pd.to_datetime(df['Datetime'])
-        
-        # Select only required columns (if they exist)
-        available_columns = [col for col in required_columns if col in df.columns]
-        df = df[available_columns]
-        
-        return df
+        return standardize_bars(df, symbol)
     
     def get_supported_intervals(self) -> List[str]:
         """
@@ -2,6 +2,7 @@
 Fyers data source implementation (placeholder for future implementation)
 """
 import pandas as pd
+from datetime import datetime
 from typing import List, Optional
 import logging
 
@@ -15,14 +16,16 @@ class FyersDataSource(BaseDataSource):
     This is a placeholder - implement when switching to Fyers API
     """
     
-    def __init__(self, rate_limit_delay: float = 1.0, api_key: str = None, secret_key: str = None):
-        super().__init__(rate_limit_delay)
+    def __init__(self, rate_limit_delay: float = 1.0, api_key: str = None, secret_key: str = None,
+                 max_workers: int = 1):
+        super().__init__(rate_limit_delay, max_workers)
         self.source_name = "Fyers"
         self.api_key = api_key
         self.secret_key = secret_key
         self.is_authenticated = False
     
-    def get_stock_data(self, symbol: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+    def get_stock_data(self, symbol: str, period: str, interval: str,
+                       start: datetime = None, end: datetime = None) -> Optional[pd.DataFrame]:
         """
         Fetch OHLCV data for a single stock using Fyers API
         
@@ -31,7 +34,8 @@ class FyersDataSource(BaseDataSource):
         logger.warning("Fyers data source not yet implemented")
         return None
     
-    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str) -> pd.DataFrame:
+    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str,
+                                 start: datetime = None, end: datetime = None) -> pd.DataFrame:
         """
         Fetch data for multiple stocks using Fyers API
         
@@ -89,13 +93,15 @@ class FyersDataSource(BaseDataSource):
 
 # Example implementation structure for when you implement Fyers:
 """
-def get_stock_data(self, symbol: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+def get_stock_data(self, symbol: str, period: str, interval: str,
+                   start: datetime = None, end: datetime = None) -> Optional[pd.DataFrame]:
     try:
         # Convert period/interval to Fyers API format
         fyers_symbol = self._convert_symbol_to_fyers_format(symbol)
         
-        # Make Fyers API call
-        # response = fyers.get_historical_data(
+        # Make Fyers API call (through the shared rate limiter)
+        # response = self.rate_limited_request(
+        #     fyers.get_historical_data,
         #     symbol=fyers_symbol,
         #     resolution=interval,
         #     from_date=start_date,
@@ -2,12 +2,14 @@
 YFinance data source implementation
 """
 import yfinance as yf
+import numpy as np
 import pandas as pd
-import time
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional
 import logging
 
 from .base import BaseDataSource
+from storage.schema import concat_bars
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +18,19 @@ class YFinanceDataSource(BaseDataSource):
     YFinance implementation of BaseDataSource
     """
     
-    def __init__(self, rate_limit_delay: float = 2.0):
-        super().__init__(rate_limit_delay)
+    # Price fields in the order of the standard output format
+    OHLCV_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+    
+    def __init__(self, rate_limit_delay: float = 2.0, max_workers: int = 1,
+                 batch_size: int = None):
+        super().__init__(rate_limit_delay, max_workers)
         self.source_name = "YFinance"
+        
+        # Batch mode: fetch chunks of tickers with a single yf.download call
+        self.batch_size = batch_size
     
-    def get_stock_data(self, symbol: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+    def get_stock_data(self, symbol: str, period: str, interval: str,
+                       start: datetime = None, end: datetime = None) -> Optional[pd.DataFrame]:
         """
         Fetch OHLCV data for a single stock using yfinance
         """
@@ -31,7 +41,9 @@ class YFinanceDataSource(BaseDataSource):
                 return None
             
             ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period, interval=interval)
+            data = self.rate_limited_request(
+                ticker.history, interval=interval, **self._window_kwargs(period, start, end)
+            )
             
             if data.empty:
                 logger.warning(f"No data found for {symbol}")
@@ -69,33 +81,191 @@ class YFinanceDataSource(BaseDataSource):
             logger.error(f"Error fetching data for {symbol}: {str(e)}")
             return None
     
-    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str) -> pd.DataFrame:
+    def get_multiple_stocks_data(self, symbols: List[str], period: str, interval: str,
+                                 start: datetime = None, end: datetime = None) -> pd.DataFrame:
         """
         Fetch data for multiple stocks with rate limiting
+        
+        Uses batched downloads when a batch size is configured, the concurrent
+        fetch engine when more than one worker is configured, and otherwise
+        fetches serially with a fixed delay.
         """
-        all_data = []
+        if self.batch_size and self.batch_size > 1 and len(symbols) > 1:
+            return self.get_batch_data(symbols, period, interval, start=start, end=end)
         
-        logger.info(f"Fetching data for {len(symbols)} symbols")
+        if self.max_workers > 1 and len(symbols) > 1:
+            combined_data = self.fetch_concurrently(symbols, period, interval, start=start, end=end)
+            if combined_data.empty:
+                logger.warning("No data retrieved for any symbols")
+            else:
+                logger.info(f"Combined data: {len(combined_data)} total records")
+            return combined_data
         
-        for i, symbol in enumerate(symbols):
-            logger.info(f"Fetching {symbol} ({i+1}/{len(symbols)})")
-            
-            data = self.get_stock_data(symbol, period, interval)
-            if data is not None:
-                all_data.append(data)
-            
-            # Rate limiting - wait between requests
-            if i < len(symbols) - 1:  # Don't wait after last symbol
-                time.sleep(self.rate_limit_delay)
+        all_data = [data for _, data in self.iter_serially(symbols, period, interval, start=start, end=end)]
+        
+        if all_data:
+            combined_data = concat_bars(all_data)
+            logger.info(f"Combined data: {len(combined_data)} total records")
+            return combined_data
+        else:
+            logger.warning("No data retrieved for any symbols")
+            return pd.DataFrame()
+    
+    def iter_stocks_data(self, symbols: List[str], period: str, interval: str,
+                         start: datetime = None, end: datetime = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield fetched data per batch request in batch mode, per symbol otherwise
+        """
+        if self.batch_size and self.batch_size > 1 and len(symbols) > 1:
+            yield from self.iter_batch_data(symbols, period, interval, start=start, end=end)
+        else:
+            yield from super().iter_stocks_data(symbols, period, interval, start=start, end=end)
+    
+    def get_batch_data(self, symbols: List[str], period: str, interval: str,
+                       start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        """
+        Fetch many tickers with one yf.download call per chunk
+        
+        Universes larger than the batch size are split into chunks, each
+        drawing a single token from the shared rate limiter.
+        
+        Args:
+            symbols: List of symbols to fetch
+            period: Data period
+            interval: Data interval
+            start: Optional window start (overrides period when given)
+            end: Optional window end
+        
+        Returns:
+            Combined DataFrame in the standard long format
+        """
+        all_data = list(self.iter_batch_data(symbols, period, interval, start=start, end=end))
         
         if all_data:
-            combined_data = pd.concat(all_data, ignore_index=True)
+            combined_data = concat_bars(all_data)
             logger.info(f"Combined data: {len(combined_data)} total records")
             return combined_data
         else:
             logger.warning("No data retrieved for any symbols")
             return pd.DataFrame()
     
+    def iter_batch_data(self, symbols: List[str], period: str, interval: str,
+                        start: datetime = None, end: datetime = None) -> Iterator[pd.DataFrame]:
+        """
+        Fetch tickers in chunks of `batch_size`, yielding each chunk's data
+        
+        Yields:
+            Non-empty DataFrames in the standard long format, one per chunk
+        """
+        chunk_size = self.batch_size or len(symbols)
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+        
+        logger.info(f"Batch fetching {len(symbols)} symbols in {len(chunks)} request(s)")
+        
+        latencies = {}
+        
+        try:
+            for i, chunk in enumerate(chunks):
+                try:
+                    self._local.last_latency = None
+                    raw = self.rate_limited_request(
+                        yf.download,
+                        tickers=chunk,
+                        interval=interval,
+                        group_by='column',
+                        auto_adjust=True,
+                        actions=False,
+                        progress=False,
+                        **self._window_kwargs(period, start, end)
+                    )
+                    
+                    latency = self.get_last_request_latency()
+                    if latency is not None:
+                        latencies.update(dict.fromkeys(chunk, latency))
+                    
+                    data = self._reshape_batch(raw, chunk)
+                    if data.empty:
+                        logger.warning(f"No data found for batch {i+1}/{len(chunks)}")
+                        continue
+                    
+                    missing = set(s.replace('.NS', '') for s in chunk) - set(data['Symbol'].unique())
+                    if missing:
+                        logger.warning(f"No data found for {len(missing)} symbols: {sorted(missing)}")
+                    
+                    data = self.standardize_dataframe(data, chunk[0])
+                    logger.info(f"Fetched {len(data)} records for batch {i+1}/{len(chunks)} "
+                                f"({len(chunk)} symbols)")
+                    
+                except Exception as e:
+                    logger.error(f"Error fetching batch {i+1}/{len(chunks)}: {str(e)}")
+                    continue
+                
+                yield data
+        finally:
+            self.last_fetch_latencies = latencies
+    
+    def _window_kwargs(self, period: str, start: datetime = None, end: datetime = None) -> dict:
+        """
+        Build yfinance window arguments (start/end take precedence over period)
+        """
+        if start is None:
+            return {'period': period}
+        
+        window = {'start': start}
+        if end is not None:
+            window['end'] = end
+        return window
+    
+    def _reshape_batch(self, raw: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+        """
+        Convert a wide yf.download result into the standard long format
+        
+        The (field, ticker) column grid is reshaped with a single NumPy
+        transpose instead of looping over tickers.
+        
+        Args:
+            raw: DataFrame returned by yf.download
+            tickers: Tickers requested in this batch
+        
+        Returns:
+            DataFrame with columns ['Datetime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']
+        """
+        if raw is None or raw.empty:
+            return pd.DataFrame()
+        
+        fields = self.OHLCV_FIELDS
+        
+        if isinstance(raw.columns, pd.MultiIndex):
+            # group_by='column' puts the price field on level 0, but be tolerant
+            if not set(fields) & set(raw.columns.get_level_values(0)):
+                raw = raw.swaplevel(0, 1, axis=1)
+            returned = set(raw.columns.get_level_values(1))
+            present = [ticker for ticker in tickers if ticker in returned]
+        else:
+            # Older yfinance versions return flat columns for a single ticker
+            raw = pd.concat({tickers[0]: raw}, axis=1).swaplevel(0, 1, axis=1)
+            present = tickers[:1]
+        
+        if not present:
+            return pd.DataFrame()
+        
+        n_bars, n_tickers, n_fields = len(raw), len(present), len(fields)
+        
+        # (bars, fields * tickers) -> (tickers * bars, fields)
+        grid = raw.reindex(columns=pd.MultiIndex.from_product([fields, present]))
+        values = grid.to_numpy(dtype='float64').reshape(n_bars, n_fields, n_tickers)
+        values = values.transpose(2, 0, 1).reshape(n_tickers * n_bars, n_fields)
+        
+        data = pd.DataFrame(values, columns=fields)
+        data.insert(0, 'Datetime', raw.index[np.tile(np.arange(n_bars), n_tickers)])
+        data.insert(1, 'Symbol', np.repeat([t.replace('.NS', '') for t in present], n_bars))
+        
+        # The download aligns every ticker on a shared index - drop the padding
+        data = data.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all')
+        data['Volume'] = data['Volume'].fillna(0).astype('int64')
+        
+        return data.reset_index(drop=True)
+    
     def is_available(self) -> bool:
         """
         Check if YFinance is available by testing a simple request
@@ -103,7 +273,7 @@ class YFinanceDataSource(BaseDataSource):
         try:
             # Test with a reliable symbol
             ticker = yf.Ticker("RELIANCE.NS")
-            test_data = ticker.history(period="1d", interval="1d")
+            test_data = self.rate_limited_request(ticker.history, period="1d", interval="1d")
             return not test_data.empty
         except Exception as e:
             logger.error(f"YFinance availability check failed: {str(e)}")
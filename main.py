@@ -46,12 +46,18 @@ Examples:
   %(prog)s scheduler stop                           # Stop scheduler
   %(prog)s data summary                            # Show data summary
   %(prog)s data load --timeframe 1h                # Load 1-hour data
+  %(prog)s data restore --timeframe 1d --date 2024-01-15  # Restore daily data as of a day
+  %(prog)s data gaps --timeframe 15m               # List bars missing from stored 15m data
+  %(prog)s data backfill                           # Fetch only the missing bars of every timeframe
         """
     )
     
     # Global options
     parser.add_argument('--data-source', choices=['yfinance', 'fyers'], 
                        help='Data source to use (default: from config)')
+    parser.add_argument('--storage-type',
+                       choices=['file', 'parquet', 'partitioned', 'partitioned_parquet', 'mmap', 'database'],
+                       help='Storage backend to use (default: from config)')
     parser.add_argument('--symbol-set', default='development',
                        choices=['development', 'production', 'sector_banking', 'sector_it', 'sector_auto'],
                        help='Symbol set to use (default: development)')
@@ -103,6 +109,28 @@ Examples:
                             help='Number of rows to display (default: 10)')
     
     cleanup_parser = data_subparsers.add_parser('cleanup', help='Cleanup old files')
+    restore_parser = data_subparsers.add_parser('restore', help='Restore a timeframe from a daily snapshot')
+    restore_parser.add_argument('--timeframe', required=True,
+                               choices=['15m', '1h', '1d', '1wk'],
+                               help='Timeframe to restore')
+    restore_parser.add_argument('--date', help='Day to restore (YYYY-MM-DD); lists available days if omitted')
+    gaps_parser = data_subparsers.add_parser('gaps', help='Check stored bars against the trading calendar')
+    gaps_parser.add_argument('--timeframe', required=True,
+                            choices=['15m', '1h', '1d', '1wk'],
+                            help='Timeframe to check')
+    gaps_parser.add_argument('--symbols', nargs='+',
+                            help='Specific symbols to check')
+    gaps_parser.add_argument('--start-date', help='Start date (YYYY-MM-DD)')
+    gaps_parser.add_argument('--end-date', help='End date (YYYY-MM-DD)')
+    gaps_parser.add_argument('--head', type=int, default=20,
+                            help='Number of gaps to display (default: 20)')
+    backfill_parser = data_subparsers.add_parser('backfill', help='Fetch only the bars missing from storage')
+    backfill_parser.add_argument('--timeframe', choices=['15m', '1h', '1d', '1wk'],
+                                help='Timeframe to backfill (default: all)')
+    backfill_parser.add_argument('--symbols', nargs='+',
+                                help='Specific symbols to backfill')
+    backfill_parser.add_argument('--max-requests', type=int,
+                                help='Provider requests per timeframe (default: BACKFILL_MAX_REQUESTS)')
     
     # Interactive mode
     interactive_parser = subparsers.add_parser('interactive', help='Start interactive mode')
@@ -122,7 +150,8 @@ Examples:
         service_instance = create_data_service(
             data_source=args.data_source,
             symbol_set=args.symbol_set,
-            auto_start=False
+            auto_start=False,
+            storage_type=args.storage_type
         )
         logger.info("Service initialized successfully")
     except Exception as e:
@@ -247,6 +276,12 @@ def cmd_scheduler(service: DataService, args) -> int:
             for timeframe, update_time in status['last_updates'].items():
                 print(f"  {timeframe}: {update_time}")
         
+        if status.get('work_queue'):
+            queue = status['work_queue']
+            print(f"\nWork Queue ({queue['workers']} workers):")
+            print(f"  Queued: {queue['queued'] or 'none'}")
+            print(f"  Shed: {queue['shed'] or 'none'}")
+        
         return 0
         
     elif args.scheduler_action == 'update':
@@ -305,6 +340,62 @@ def cmd_data(service: DataService, args) -> int:
         service.storage_manager.cleanup_old_files()
         print("Cleanup completed")
         return 0
+        
+    elif args.data_action == 'restore':
+        if not args.date:
+            days = service.list_snapshots(args.timeframe)
+            print(f"\nSnapshots for {args.timeframe}: {', '.join(days) if days else 'none'}")
+            return 0
+        
+        if service.restore_snapshot(args.timeframe, args.date):
+            print(f"Restored {args.timeframe} data as of {args.date}")
+            return 0
+        print(f"Failed to restore {args.timeframe} data as of {args.date}")
+        return 1
+        
+    elif args.data_action == 'gaps':
+        coverage = service.check_coverage(
+            timeframe=args.timeframe,
+            symbols=args.symbols,
+            start_date=args.start_date,
+            end_date=args.end_date
+        )
+        
+        if coverage is None:
+            print(f"Failed to check coverage for {args.timeframe}")
+            return 1
+        if coverage.summary.empty:
+            print(f"No data found for {args.timeframe}")
+            return 1
+        
+        totals = coverage.summary.sum()
+        print(f"\n=== Coverage of {args.timeframe} ===")
+        print(f"Symbols: {len(coverage.summary)}")
+        print(f"Expected bars: {totals['expected']}")
+        print(f"Missing bars: {totals['missing']} in {len(coverage.gaps)} gaps")
+        print(f"Extra bars: {totals['extra']}")
+        
+        if not coverage.gaps.empty:
+            print(f"\nLargest {min(args.head, len(coverage.gaps))} gaps:\n")
+            print(coverage.gaps.nlargest(args.head, 'bars').to_string(index=False))
+        
+        return 0
+        
+    elif args.data_action == 'backfill':
+        results = service.backfill(args.timeframe, args.symbols, args.max_requests)
+        
+        print("\n=== Backfill ===")
+        failed = False
+        for timeframe, result in results.items():
+            if 'error' in result:
+                print(f"{timeframe}: Error - {result['error']}")
+                failed = True
+            else:
+                print(f"{timeframe}: {result['bars']} bars from {result['requests']} requests"
+                      + (f", {result['deferred']} deferred" if result['deferred'] else ""))
+                failed = failed or not result['success']
+        
+        return 1 if failed else 0
     
     return 0
 
@@ -3,21 +3,27 @@ Main data scheduler for automated updates
 """
 import logging
 import schedule
-import time
 import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.interval import IntervalTrigger
 
 from data_sources.base import BaseDataSource
 from storage.file_storage import FileStorageManager
 from schedulers.timeframe_handlers import get_handler_for_timeframe
-from utils.market_hours import market_hours, is_market_open_now
+from schedulers.triggers import BarCloseTrigger
+from schedulers.work_queue import SymbolWorkQueue
+from services.resampler import TimeframeResampler
+from services.backfill import BackfillPlanner
+from utils.market_hours import market_hours
 from utils.logging_config import get_logger, PerformanceLogger
-from config.settings import TIMEFRAME_CONFIGS
+from utils.rate_limiter import rate_limiter
+from config.settings import (
+    TIMEFRAME_CONFIGS, RESAMPLE_ENABLED, RESAMPLE_RECONCILE_ENABLED, RESAMPLE_RECONCILE_CRON,
+    RESAMPLE_BAR_CLOSE_DELAY_SECONDS, BACKFILL_ENABLED, SCHEDULER_MODE
+)
 from config.schedules import SCHEDULES
 from config.symbols import get_symbols
 
@@ -38,6 +44,9 @@ class DataScheduler:
         # APScheduler instance
         self.scheduler = BackgroundScheduler(timezone='Asia/Kolkata')
         
+        # Per-symbol work queue the jobs submit to (SCHEDULER_MODE = 'queue')
+        self.work_queue = SymbolWorkQueue(data_source, storage_manager) if SCHEDULER_MODE == 'queue' else None
+        
         # Track last update times
         self.last_updates: Dict[str, datetime] = {}
         
@@ -61,6 +70,9 @@ class DataScheduler:
             # Setup scheduled jobs
             self._setup_scheduled_jobs()
             
+            if self.work_queue:
+                self.work_queue.start()
+            
             # Start the scheduler
             self.scheduler.start()
             self.is_running = True
@@ -84,6 +96,8 @@ class DataScheduler:
                 return
             
             self.scheduler.shutdown(wait=True)
+            if self.work_queue:
+                self.work_queue.stop()
             self.is_running = False
             logger.info("Data scheduler stopped")
             
@@ -101,23 +115,15 @@ class DataScheduler:
                 continue
             
             # Add job based on timeframe
-            if timeframe == '15m':
-                # Every 15 minutes during market hours
-                self.scheduler.add_job(
-                    func=self._update_timeframe,
-                    trigger=IntervalTrigger(minutes=15),
-                    args=[timeframe],
-                    id=f'update_{timeframe}',
-                    name=f'Update {timeframe} data',
-                    max_instances=1,
-                    coalesce=True
-                )
-                
-            elif timeframe == '1h':
-                # Every hour during market hours
+            if timeframe in ('15m', '1h'):
+                # Just after each bar close during sessions (derived bars once their source is saved)
+                derived = RESAMPLE_ENABLED and config.get('resample_from')
                 self.scheduler.add_job(
                     func=self._update_timeframe,
-                    trigger=IntervalTrigger(hours=1),
+                    trigger=BarCloseTrigger(
+                        config['update_frequency_minutes'],
+                        delay_seconds=RESAMPLE_BAR_CLOSE_DELAY_SECONDS if derived else None
+                    ),
                     args=[timeframe],
                     id=f'update_{timeframe}',
                     name=f'Update {timeframe} data',
@@ -150,6 +156,18 @@ class DataScheduler:
                 )
             
             logger.info(f"Scheduled job for {timeframe}: {schedule_config['description']}")
+            
+            # Derived timeframes are checked against the provider once a day
+            if RESAMPLE_ENABLED and RESAMPLE_RECONCILE_ENABLED and config.get('resample_from'):
+                self.scheduler.add_job(
+                    func=self._reconcile_timeframe,
+                    trigger=CronTrigger(**RESAMPLE_RECONCILE_CRON),
+                    args=[timeframe],
+                    id=f'reconcile_{timeframe}',
+                    name=f'Reconcile {timeframe} data with provider',
+                    max_instances=1,
+                    coalesce=True
+                )
         
         # Add cleanup job - daily at 2 AM
         self.scheduler.add_job(
@@ -175,13 +193,20 @@ class DataScheduler:
                     timeframe, self.data_source, self.storage_manager
                 )
                 
-                # Check if update is needed based on market hours
+                # Check if update is needed based on market hours (a bar that closed
+                # with the session, e.g. 15:15-15:30, is still fetched after the close)
                 config = TIMEFRAME_CONFIGS.get(timeframe, {})
                 if config.get('active_during_market_hours_only', False):
-                    if not is_market_open_now():
+                    bar_length = timedelta(minutes=config['update_frequency_minutes'])
+                    if not market_hours.is_market_open(market_hours.get_current_ist_time() - bar_length):
                         logger.info(f"Market closed, skipping {timeframe} update")
                         return
                 
+                # Queue mode - per-symbol items, completion is reported by _on_run_complete
+                if self.work_queue:
+                    self.work_queue.submit(timeframe, self.symbols, on_complete=self._on_run_complete)
+                    return
+                
                 # Perform update
                 success = handler.update_data(timeframe, self.symbols)
                 
@@ -194,16 +219,48 @@ class DataScheduler:
         except Exception as e:
             logger.error(f"Error in scheduled update for {timeframe}: {str(e)}")
     
+    def _on_run_complete(self, timeframe: str, stats: Dict):
+        """
+        Record a finished work queue run
+        
+        Args:
+            timeframe: Timeframe of the run
+            stats: Run statistics from SymbolWorkQueue
+        """
+        if stats['success']:
+            self.last_updates[timeframe] = datetime.now()
+            logger.info(f"Successfully completed scheduled update for {timeframe}")
+        else:
+            logger.error(f"Failed scheduled update for {timeframe} "
+                         f"({len(stats['failed'])} symbols failed, {len(stats['shed'])} shed)")
+    
+    def _reconcile_timeframe(self, timeframe: str):
+        """
+        Reconcile a derived timeframe against the provider
+        
+        Args:
+            timeframe: Derived timeframe to reconcile
+        """
+        try:
+            with PerformanceLogger(f"Reconciliation of {timeframe}"):
+                rate_limiter.wait_for_cooldown(self.data_source.source_name)
+                resampler = TimeframeResampler(self.storage_manager)
+                resampler.reconcile(timeframe, self.symbols, self.data_source)
+                
+        except Exception as e:
+            logger.error(f"Error reconciling {timeframe}: {str(e)}")
+    
     def _run_initial_update(self):
-        """Run initial update for timeframes that have no data"""
+        """Run initial update for timeframes that have no data and backfill the others"""
         logger.info("Running initial data check...")
         
+        stored_timeframes = []
         for timeframe in TIMEFRAME_CONFIGS.keys():
             try:
-                # Check if we have any data for this timeframe
-                existing_data = self.storage_manager.load_data(timeframe)
-                
-                if existing_data.empty:
+                # Check if we have any data for this timeframe (index lookup, no bar reads)
+                if self.storage_manager.get_latest_data_times(timeframe):
+                    stored_timeframes.append(timeframe)
+                else:
                     logger.info(f"No existing data for {timeframe}, running initial update")
                     
                     # Run update in background thread to avoid blocking
@@ -215,11 +272,43 @@ class DataScheduler:
                     update_thread.daemon = True
                     update_thread.start()
                     
-                    # Small delay between timeframes to avoid overwhelming the API
-                    time.sleep(5)
+                    # No delay needed here - all threads share the process-wide rate limiter
                     
             except Exception as e:
                 logger.error(f"Error checking initial data for {timeframe}: {str(e)}")
+        
+        # Fill holes left while the scheduler was down
+        if BACKFILL_ENABLED and stored_timeframes:
+            backfill_thread = threading.Thread(
+                target=self._backfill_timeframes,
+                args=[stored_timeframes],
+                name='Backfill'
+            )
+            backfill_thread.daemon = True
+            backfill_thread.start()
+    
+    def _backfill_timeframes(self, timeframes: List[str]):
+        """
+        Fetch the bars missing from stored timeframes
+        
+        Runs the timeframes in order, so derived timeframes are rebuilt
+        after their source timeframe has been backfilled.
+        
+        Args:
+            timeframes: Timeframes to backfill
+        """
+        planner = BackfillPlanner(self.data_source, self.storage_manager)
+        
+        for timeframe in timeframes:
+            try:
+                with PerformanceLogger(f"Backfill of {timeframe}"):
+                    rate_limiter.wait_for_cooldown(self.data_source.source_name)
+                    result = planner.run(timeframe, self.symbols)
+                    logger.info(f"Backfilled {result['bars']} {timeframe} bars with {result['requests']} requests"
+                                + (f" ({result['deferred']} deferred)" if result['deferred'] else ""))
+                                
+            except Exception as e:
+                logger.error(f"Error backfilling {timeframe}: {str(e)}")
     
     def _cleanup_old_files(self):
         """Cleanup old backup files"""
@@ -280,9 +369,13 @@ class DataScheduler:
             'symbol_set': self.symbol_set,
             'market_status': market_hours.get_market_status(),
             'last_updates': self.last_updates.copy(),
+            'rate_limits': rate_limiter.get_status(),
             'scheduled_jobs': []
         }
         
+        if self.work_queue:
+            status['work_queue'] = self.work_queue.get_status()
+        
         if self.is_running:
             for job in self.scheduler.get_jobs():
                 status['scheduled_jobs'].append({
@@ -2,14 +2,19 @@
 Individual timeframe handlers for data updates
 """
 import logging
+import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from data_sources.base import BaseDataSource
 from storage.file_storage import FileStorageManager
 from utils.market_hours import market_hours
 from utils.logging_config import log_performance, PerformanceLogger
-from config.settings import TIMEFRAME_CONFIGS
+from utils.rate_limiter import rate_limiter
+from services.incremental_fetch import IncrementalFetcher
+from services.resampler import TimeframeResampler
+from services.pipeline import BarPipeline
+from config.settings import TIMEFRAME_CONFIGS, INCREMENTAL_FETCH_ENABLED, RESAMPLE_ENABLED, PIPELINE_ENABLED
 
 logger = logging.getLogger(__name__)
 
@@ -73,12 +78,11 @@ class TimeframeHandler:
                 return True
             
             with PerformanceLogger(f"Fetching {timeframe} data for {len(symbols_to_update)} symbols"):
-                # Fetch data from source
-                data = self.data_source.get_multiple_stocks_data(
-                    symbols=symbols_to_update,
-                    period=config['period'],
-                    interval=config['interval']
-                )
+                if PIPELINE_ENABLED:
+                    return self._update_pipelined(timeframe, symbols_to_update)
+                
+                # Fetch data from source (requests draw from the shared rate limiter)
+                data = self.fetch_data(timeframe, symbols_to_update)
                 
                 if data.empty:
                     logger.warning(f"No data retrieved for {timeframe}")
@@ -102,6 +106,90 @@ class TimeframeHandler:
             logger.error(f"Error updating {timeframe} data: {str(e)}")
             return False
     
+    def _update_pipelined(self, timeframe: str, symbols: List[str]) -> bool:
+        """
+        Stream fetched bars into storage in micro-batches
+        
+        Args:
+            timeframe: Timeframe to update
+            symbols: Symbols to update
+        
+        Returns:
+            True if data was retrieved and every batch was saved
+        """
+        pipeline = BarPipeline(self.data_source, self.storage_manager)
+        stats = pipeline.run(
+            timeframe,
+            self.iter_fetch_data(timeframe, symbols),
+            append=self.should_append_data(timeframe)
+        )
+        
+        if stats['rows'] == 0:
+            logger.warning(f"No data retrieved for {timeframe}")
+            return False
+        
+        if stats['failed_batches']:
+            logger.error(f"Saved {stats['saved_rows']}/{stats['rows']} {timeframe} records "
+                         f"({stats['failed_batches']} batches failed)")
+            return False
+        
+        logger.info(f"Successfully updated {timeframe} data: {stats['saved_rows']} records "
+                    f"in {stats['batches']} batches")
+        return True
+    
+    def fetch_data(self, timeframe: str, symbols: List[str]):
+        """
+        Fetch data for the symbols, incrementally when possible
+        
+        Incremental fetches only make sense when the result is appended -
+        an overwrite needs the full period.
+        
+        Args:
+            timeframe: Timeframe to fetch
+            symbols: Symbols to fetch
+        
+        Returns:
+            DataFrame with fetched data
+        """
+        # Don't start a new request stream while the source is backing off
+        rate_limiter.wait_for_cooldown(self.data_source.source_name)
+        
+        if INCREMENTAL_FETCH_ENABLED and self.should_append_data(timeframe):
+            fetcher = IncrementalFetcher(self.data_source, self.storage_manager)
+            return fetcher.fetch(timeframe, symbols)
+        
+        config = TIMEFRAME_CONFIGS[timeframe]
+        return self.data_source.get_multiple_stocks_data(
+            symbols=symbols,
+            period=config['period'],
+            interval=config['interval']
+        )
+    
+    def iter_fetch_data(self, timeframe: str, symbols: List[str]) -> Iterator[pd.DataFrame]:
+        """
+        Streaming counterpart of fetch_data - yields data per symbol or provider batch
+        
+        Args:
+            timeframe: Timeframe to fetch
+            symbols: Symbols to fetch
+        
+        Yields:
+            DataFrames with fetched data
+        """
+        rate_limiter.wait_for_cooldown(self.data_source.source_name)
+        
+        if INCREMENTAL_FETCH_ENABLED and self.should_append_data(timeframe):
+            fetcher = IncrementalFetcher(self.data_source, self.storage_manager)
+            yield from fetcher.iter_fetch(timeframe, symbols)
+            return
+        
+        config = TIMEFRAME_CONFIGS[timeframe]
+        yield from self.data_source.iter_stocks_data(
+            symbols=symbols,
+            period=config['period'],
+            interval=config['interval']
+        )
+    
     def should_append_data(self, timeframe: str) -> bool:
         """
         Check if data should be appended (vs overwritten)
@@ -181,6 +269,31 @@ class WeeklyHandler(TimeframeHandler):
         
         return symbols
 
+class ResampledHandler(TimeframeHandler):
+    """
+    Handler for timeframes derived from stored lower-timeframe bars (no network calls)
+    """
+    
+    def __init__(self, data_source: BaseDataSource, storage_manager: FileStorageManager):
+        super().__init__(data_source, storage_manager)
+        self.resampler = TimeframeResampler(storage_manager)
+    
+    def should_append_data(self, timeframe: str) -> bool:
+        """Derived bars are merged over the stored ones"""
+        return True
+    
+    def fetch_data(self, timeframe: str, symbols: List[str]):
+        """
+        Build the timeframe from stored source bars instead of the provider
+        """
+        return self.resampler.derive(timeframe, symbols)
+    
+    def iter_fetch_data(self, timeframe: str, symbols: List[str]) -> Iterator[pd.DataFrame]:
+        """
+        Derived bars are built in one pass from local data
+        """
+        yield self.fetch_data(timeframe, symbols)
+
 class SmartUpdateHandler(TimeframeHandler):
     """
     Smart handler that checks what data is missing and updates accordingly
@@ -192,20 +305,24 @@ class SmartUpdateHandler(TimeframeHandler):
         """
         symbols_to_update = []
         
+        # One index lookup for the whole universe (15m is the reference timeframe)
+        latest_times = self.storage_manager.get_latest_data_times('15m')
+        current_time = market_hours.get_current_ist_time()
+        market_open = market_hours.is_market_open()
+        
         for symbol in symbols:
             # Get last update time for this symbol
-            last_update = self.storage_manager.get_latest_data_time('15m', symbol)  # Use 15m as reference
+            last_update = latest_times.get(symbol.replace('.NS', ''))
             
             if last_update is None:
                 # Never updated, add to list
                 symbols_to_update.append(symbol)
             else:
                 # Check if data is stale
-                current_time = market_hours.get_current_ist_time()
                 time_diff = current_time - last_update
                 
                 # If more than 1 hour old during market hours, update
-                if market_hours.is_market_open() and time_diff.total_seconds() > 3600:
+                if market_open and time_diff.total_seconds() > 3600:
                     symbols_to_update.append(symbol)
         
         return symbols_to_update
@@ -223,7 +340,9 @@ def get_handler_for_timeframe(timeframe: str, data_source: BaseDataSource,
     Returns:
         Appropriate handler instance
     """
-    if timeframe in ['15m', '1h']:
+    if RESAMPLE_ENABLED and TIMEFRAME_CONFIGS.get(timeframe, {}).get('resample_from'):
+        return ResampledHandler(data_source, storage_manager)
+    elif timeframe in ['15m', '1h']:
         return IntradayHandler(data_source, storage_manager)
     elif timeframe == '1d':
         return DailyHandler(data_source, storage_manager)
@@ -0,0 +1,67 @@
+"""
+APScheduler triggers driven by the trading calendar
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytz
+from apscheduler.triggers.base import BaseTrigger
+
+from utils.trading_calendar import TradingCalendar, trading_calendar
+from config.settings import MARKET_TIMEZONE, BAR_CLOSE_DELAY_SECONDS
+
+class BarCloseTrigger(BaseTrigger):
+    """
+    Fires a few seconds after each intraday bar close
+    
+    Bars are anchored at the session open (9:15), so a 15m trigger fires
+    after 9:30, 9:45, ..., 15:30 and a 1h trigger after 10:15, ..., 15:15
+    and the 15:30 close. Between sessions (nights, weekends, holidays) the
+    next fire time is the first bar close of the next session, so the job
+    never wakes up without a complete new bar to fetch. Holidays come from
+    the calendar's files in config/holidays; a year without one counts
+    its weekday holidays as sessions (the calendar logs a warning).
+    """
+    
+    def __init__(self, minutes: int, delay_seconds: float = None, calendar: TradingCalendar = None,
+                 timezone: str = MARKET_TIMEZONE, jitter: Optional[int] = None):
+        """
+        Args:
+            minutes: Bar length in minutes
+            delay_seconds: Time after each bar close to fire (defaults to BAR_CLOSE_DELAY_SECONDS),
+                           leaving the provider time to publish the bar
+            calendar: Trading calendar (default: the global one)
+            timezone: Timezone of the returned fire times
+            jitter: Maximum random seconds added to each fire time
+        """
+        self.minutes = minutes
+        self.delay = timedelta(seconds=BAR_CLOSE_DELAY_SECONDS if delay_seconds is None else delay_seconds)
+        self.calendar = calendar or trading_calendar
+        self.timezone = pytz.timezone(timezone)
+        self.jitter = jitter
+    
+    def get_next_fire_time(self, previous_fire_time: Optional[datetime], now: datetime) -> Optional[datetime]:
+        """
+        Get the first fire time after the previous one (or from now on)
+        
+        Args:
+            previous_fire_time: Last time the trigger fired (None if it never did)
+            now: Current time
+        
+        Returns:
+            Timezone-aware fire time
+        """
+        if previous_fire_time is not None:
+            close = self.calendar.next_bar_close(previous_fire_time - self.delay, self.minutes)
+        else:
+            close = self.calendar.next_bar_close(now - self.delay, self.minutes, inclusive=True)
+        
+        fire_time = close.tz_convert(self.timezone).to_pydatetime() + self.delay
+        return self._apply_jitter(fire_time, self.jitter, now)
+    
+    def __str__(self):
+        return f"bar close[{self.minutes}m, +{int(self.delay.total_seconds())}s]"
+    
+    def __repr__(self):
+        return (f"<{self.__class__.__name__} (minutes={self.minutes}, "
+                f"delay_seconds={self.delay.total_seconds():g}, timezone='{self.timezone}')>")
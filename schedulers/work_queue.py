@@ -0,0 +1,286 @@
+"""
+Priority work queue - per-symbol fetch jobs drained by a worker pool
+"""
+import heapq
+import itertools
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from data_sources.base import BaseDataSource
+from schedulers.timeframe_handlers import TimeframeHandler, get_handler_for_timeframe
+from storage.schema import concat_bars
+from utils.market_hours import market_hours
+from utils.trading_calendar import trading_calendar
+from config.settings import TIMEFRAME_CONFIGS, RESAMPLE_ENABLED, WORK_QUEUE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+class _Run:
+    """Bookkeeping for one submission of a timeframe"""
+    
+    def __init__(self, timeframe: str, handler: TimeframeHandler, on_complete: Optional[Callable]):
+        self.timeframe = timeframe
+        self.handler = handler
+        self.on_complete = on_complete
+        self.queued = 0
+        self.active = 0
+        self.frames: List[pd.DataFrame] = []
+        self.saved_rows = 0
+        self.failed_saves = 0
+        self.shed: List[str] = []
+        self.failed: List[str] = []
+
+class WorkItem(NamedTuple):
+    """
+    One fetch in the queue, ordered by priority, then deadline, then submission
+    """
+    priority: int              # Bar length in minutes - shorter timeframes run first
+    deadline: datetime         # Shed if not started by then
+    sequence: int
+    timeframe: str
+    symbols: Tuple[str, ...]   # One symbol (every symbol for derived timeframes)
+    run: _Run
+
+class SymbolWorkQueue:
+    """
+    Runs scheduled updates as one work item per (timeframe, symbol)
+    
+    Items are taken in priority order - intraday before daily before
+    weekly, then earliest deadline first - by a pool of worker threads,
+    so a slow symbol holds up one worker instead of its whole timeframe,
+    and queued daily or weekly work yields to intraday items as soon as
+    they arrive. An item's deadline is the next bar close of its
+    timeframe (one bar length later for daily and weekly); an item not
+    started by then is shed, as is one superseded by a newer submission
+    of the same symbol, while the rest of the timeframe still runs.
+    
+    Fetched bars are buffered per submission and saved once, by the
+    worker that finishes its last item, so a run costs one save rather
+    than one per symbol; runs of the same timeframe never save at the
+    same time. Saves are always merged into the stored bars, so symbols
+    shed from a run keep their history. Derived timeframes make no
+    provider requests and run as one item covering every symbol.
+    """
+    
+    def __init__(self, data_source: BaseDataSource, storage_manager, workers: int = None):
+        self.data_source = data_source
+        self.storage_manager = storage_manager
+        self.workers = max(1, int(workers or WORK_QUEUE_WORKERS))
+        
+        self._heap: List[WorkItem] = []
+        self._latest: Dict[Tuple[str, Tuple[str, ...]], int] = {}   # Newest sequence per item key
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._save_locks: Dict[str, threading.Lock] = {}   # Runs of one timeframe save one at a time
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        
+        self.shed_counts: Counter = Counter()
+        self.last_completed: Dict[str, datetime] = {}
+    
+    def start(self):
+        """Start the worker threads"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'WorkQueue-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Work queue started with {self.workers} workers")
+    
+    def stop(self, timeout: float = 30.0):
+        """
+        Stop the workers after their current items, dropping queued work
+        
+        Args:
+            timeout: Seconds to wait for each worker
+        """
+        with self._condition:
+            self._running = False
+            dropped = len(self._heap)
+            self._heap.clear()
+            self._latest.clear()
+            self._condition.notify_all()
+        
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        
+        logger.info(f"Work queue stopped ({dropped} queued items dropped)")
+    
+    def _deadline(self, timeframe: str, now: datetime) -> datetime:
+        """Next bar close of an intraday timeframe, one bar length ahead otherwise"""
+        minutes = TIMEFRAME_CONFIGS[timeframe]['update_frequency_minutes']
+        if minutes < 1440:
+            return trading_calendar.next_bar_close(now, minutes).to_pydatetime()
+        return now + timedelta(minutes=minutes)
+    
+    def submit(self, timeframe: str, symbols: List[str], now: datetime = None,
+               on_complete: Callable[[str, Dict], None] = None) -> int:
+        """
+        Queue an update of a timeframe, one item per symbol
+        
+        Args:
+            timeframe: Timeframe to update
+            symbols: Symbols to update
+            now: Submission time (defaults to current IST time)
+            on_complete: Called with (timeframe, stats) once every item has been run or shed
+        
+        Returns:
+            Number of items queued
+        """
+        now = now or market_hours.get_current_ist_time()
+        handler = get_handler_for_timeframe(timeframe, self.data_source, self.storage_manager)
+        symbols = handler.get_symbols_to_update(symbols)
+        if not symbols:
+            logger.info(f"No symbols need updating for {timeframe}")
+            return 0
+        
+        config = TIMEFRAME_CONFIGS[timeframe]
+        if RESAMPLE_ENABLED and config.get('resample_from'):
+            groups = [tuple(symbols)]
+        else:
+            groups = [(symbol,) for symbol in symbols]
+        
+        run = _Run(timeframe, handler, on_complete)
+        deadline = self._deadline(timeframe, now)
+        
+        with self._condition:
+            for group in groups:
+                item = WorkItem(config['update_frequency_minutes'], deadline, next(self._sequence),
+                                timeframe, group, run)
+                # A queued item for the same symbols is superseded and shed when popped
+                self._latest[(timeframe, group)] = item.sequence
+                heapq.heappush(self._heap, item)
+            run.queued = len(groups)
+            self._condition.notify_all()
+        
+        logger.info(f"Queued {len(groups)} {timeframe} items (deadline {deadline.isoformat()})")
+        return len(groups)
+    
+    def _next_item(self) -> Optional[WorkItem]:
+        """Block until an item that is still due is available (None once stopped)"""
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                if not self._running:
+                    return None
+                
+                item = heapq.heappop(self._heap)
+                item.run.queued -= 1
+                item.run.active += 1
+                
+                key = (item.timeframe, item.symbols)
+                superseded = self._latest.get(key) != item.sequence
+                if not superseded:
+                    del self._latest[key]
+            
+            if not superseded and market_hours.get_current_ist_time() <= item.deadline:
+                return item
+            
+            reason = 'superseded' if superseded else f"missed deadline {item.deadline.isoformat()}"
+            logger.debug(f"Shed {item.timeframe} {', '.join(item.symbols)}: {reason}")
+            self._finish(item, shed=True)
+    
+    def _worker(self):
+        """Drain the queue until stopped"""
+        while True:
+            item = self._next_item()
+            if item is None:
+                return
+            
+            data, failed = None, False
+            try:
+                data = item.run.handler.fetch_data(item.timeframe, list(item.symbols))
+            except Exception as e:
+                logger.error(f"Error fetching {item.timeframe} data for {', '.join(item.symbols)}: {str(e)}")
+                failed = True
+            
+            self._finish(item, data=data, failed=failed or data is None or data.empty)
+    
+    def _finish(self, item: WorkItem, data: pd.DataFrame = None, shed: bool = False, failed: bool = False):
+        """Record an item's outcome; the run's last item saves its bars and completes it"""
+        run = item.run
+        
+        with self._condition:
+            if shed:
+                run.shed.extend(item.symbols)
+                self.shed_counts[item.timeframe] += len(item.symbols)
+            elif failed:
+                run.failed.extend(item.symbols)
+            else:
+                run.frames.append(data)
+            
+            run.active -= 1
+            complete = run.queued == 0 and run.active == 0
+            if not complete:
+                return
+            frames, run.frames = run.frames, []
+            save_lock = self._save_locks.setdefault(run.timeframe, threading.Lock())
+        
+        if frames:
+            batch = concat_bars(frames)
+            with save_lock:
+                saved = self.storage_manager.save_data(batch, run.timeframe, append=True)
+            if saved:
+                run.saved_rows += len(batch)
+            else:
+                run.failed_saves += 1
+                logger.error(f"Failed to save {len(batch)} {run.timeframe} records")
+        
+        self._complete(run)
+    
+    def _complete(self, run: _Run):
+        """Log a finished run and notify its submitter"""
+        stats = {
+            'saved_rows': run.saved_rows,
+            'shed': list(run.shed),
+            'failed': list(run.failed),
+            'failed_saves': run.failed_saves,
+            'success': not run.failed and not run.failed_saves and run.saved_rows > 0
+        }
+        self.last_completed[run.timeframe] = datetime.now()
+        
+        message = f"Completed {run.timeframe} run: {run.saved_rows} records saved"
+        if run.shed:
+            message += f", {len(run.shed)} shed ({', '.join(run.shed[:10])}{', ...' if len(run.shed) > 10 else ''})"
+        if run.failed:
+            message += f", {len(run.failed)} failed"
+        if run.failed_saves:
+            message += f", {run.failed_saves} saves failed"
+        (logger.warning if run.shed or run.failed or run.failed_saves else logger.info)(message)
+        
+        if run.on_complete:
+            try:
+                run.on_complete(run.timeframe, stats)
+            except Exception as e:
+                logger.error(f"Error in {run.timeframe} completion callback: {str(e)}")
+    
+    def get_status(self) -> Dict:
+        """
+        Get queue status
+        
+        Returns:
+            Dictionary with workers, queued items per timeframe, shed counts and last completions
+        """
+        with self._condition:
+            queued = Counter(item.timeframe for item in self._heap)
+        
+        return {
+            'running': self._running,
+            'workers': self.workers,
+            'queued': dict(queued),
+            'shed': dict(self.shed_counts),
+            'last_completed': {tf: t.isoformat() for tf, t in self.last_completed.items()}
+        }
@@ -0,0 +1,167 @@
+"""
+Asyncio API over DataService with concurrent timeframe updates
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Callable
+import pandas as pd
+
+from services.data_service import DataService
+from utils.logging_config import get_logger
+from config.settings import TIMEFRAME_CONFIGS, RESAMPLE_ENABLED, ASYNC_MAX_CONCURRENCY
+
+logger = get_logger(__name__)
+
+class AsyncDataService:
+    """
+    Coroutine versions of DataService.fetch_data, manual_update and load_data
+    
+    Blocking network and storage calls run on a bounded thread pool
+    (`max_concurrency` workers), so the fetch of one timeframe overlaps with
+    the parsing and saving of another. Saves to the same timeframe are
+    serialized.
+    
+    Cancelling a coroutine stops it at the next stage boundary: queued work
+    never starts, and bars whose fetch was cancelled are never saved. A
+    fetch or save that has already started runs to completion in its
+    thread (saves are atomic).
+    
+    Usage:
+        async with AsyncDataService(DataService()) as service:
+            await service.manual_update()
+    """
+    
+    def __init__(self, service: DataService, max_concurrency: int = None):
+        self.service = service
+        self.max_concurrency = max_concurrency or ASYNC_MAX_CONCURRENCY
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix='async-data')
+        self._save_locks: Dict[str, asyncio.Lock] = {}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+    
+    async def _run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking call on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+    
+    def _save_lock(self, timeframe: str) -> asyncio.Lock:
+        """Lock serializing saves to one timeframe"""
+        if timeframe not in self._save_locks:
+            self._save_locks[timeframe] = asyncio.Lock()
+        return self._save_locks[timeframe]
+    
+    async def fetch_data(self, timeframe: str, symbols: List[str] = None,
+                         save_data: bool = True, incremental: bool = None) -> pd.DataFrame:
+        """
+        Fetch data for a timeframe without blocking the event loop
+        
+        Args:
+            timeframe: '15m', '1h', '1d', or '1wk'
+            symbols: List of symbols (defaults to the service's symbols)
+            save_data: Whether to save the data to storage
+            incremental: Only fetch bars newer than the stored data
+                         (defaults to INCREMENTAL_FETCH_ENABLED; requires save_data)
+        
+        Returns:
+            DataFrame with fetched data
+        
+        Raises:
+            asyncio.CancelledError: If cancelled (nothing is saved)
+        """
+        try:
+            data = await self._run(self.service._fetch_bars, timeframe, symbols, save_data, incremental)
+            
+            if data.empty:
+                logger.warning(f"No data retrieved for {timeframe}")
+                return data
+            
+            if save_data:
+                async with self._save_lock(timeframe):
+                    await self._run(self.service._save_bars, timeframe, data)
+            
+            return data
+            
+        except asyncio.CancelledError:
+            logger.info(f"Fetch of {timeframe} data cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching data for {timeframe}: {str(e)}")
+            return pd.DataFrame()
+    
+    async def load_data(self, timeframe: str, symbols: List[str] = None,
+                        start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Load data from storage without blocking the event loop
+        
+        Args:
+            timeframe: Timeframe to load
+            symbols: Symbols to filter (None for all)
+            start_date: Start date filter (YYYY-MM-DD)
+            end_date: End date filter (YYYY-MM-DD)
+        
+        Returns:
+            DataFrame with loaded data
+        """
+        return await self._run(self.service.load_data, timeframe, symbols, start_date, end_date)
+    
+    async def manual_update(self, timeframe: str = None, symbols: List[str] = None) -> bool:
+        """
+        Update one or all timeframes, running the timeframes concurrently
+        
+        With a running scheduler each timeframe goes through its handler,
+        as in DataService.manual_update, and derived timeframes wait for
+        the timeframe they are resampled from.
+        
+        Args:
+            timeframe: Specific timeframe to update (None for all)
+            symbols: Specific symbols to update (None for all)
+        
+        Returns:
+            True if every timeframe was updated
+        """
+        timeframes = [timeframe] if timeframe else list(TIMEFRAME_CONFIGS.keys())
+        logger.info(f"Async update requested for timeframes: {timeframes}")
+        
+        # Only scheduler handlers build derived timeframes from stored bars
+        resample = RESAMPLE_ENABLED and self.service.scheduler is not None
+        
+        tasks: Dict[str, asyncio.Task] = {}
+        for tf in timeframes:
+            source = TIMEFRAME_CONFIGS[tf].get('resample_from') if resample else None
+            tasks[tf] = asyncio.ensure_future(self._update_timeframe(tf, symbols, tasks.get(source)))
+        
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            logger.info("Async update cancelled")
+            raise
+        
+        return all(results)
+    
+    async def _update_timeframe(self, timeframe: str, symbols: List[str] = None,
+                                after: asyncio.Task = None) -> bool:
+        """
+        Update a single timeframe, optionally after another timeframe's update
+        """
+        if after is not None:
+            await asyncio.wait([after])
+        
+        scheduler = self.service.scheduler
+        if scheduler:
+            async with self._save_lock(timeframe):
+                return await self._run(scheduler.manual_update, timeframe, symbols)
+        
+        data = await self.fetch_data(timeframe, symbols)
+        return not data.empty
+    
+    def close(self):
+        """Shut down the worker pool, dropping queued work"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
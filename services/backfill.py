@@ -0,0 +1,338 @@
+"""
+Gap-aware backfill - fetch only the bar ranges missing from storage
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Tuple
+
+import pandas as pd
+
+from data_sources.base import BaseDataSource
+from services.coverage import check_coverage, expected_bars
+from services.incremental_fetch import period_to_timedelta
+from services.resampler import resample_bars
+from storage.atomic import atomic_write
+from storage.schema import concat_bars, storage_symbol, to_bar_timestamp
+from utils.market_hours import market_hours
+from config.settings import (
+    TIMEFRAME_CONFIGS, RESAMPLE_ENABLED, DATA_STORAGE_PATH, BACKFILL_MAX_REQUESTS, BACKFILL_MERGE_BARS,
+    BACKFILL_EMPTY_FILENAME, BACKFILL_EMPTY_RETRY_DAYS
+)
+
+logger = logging.getLogger(__name__)
+
+class BackfillRequest(NamedTuple):
+    """
+    One date-range fetch covering the same missing bars of several symbols
+    """
+    start: pd.Timestamp    # Start of the first missing bar
+    end: pd.Timestamp      # End of the last missing bar (exclusive)
+    symbols: List[str]     # Provider symbols (e.g. 'RELIANCE.NS')
+    bars: int              # Missing bars covered, over all symbols
+
+class EmptyRangeLog:
+    """
+    JSON record of {timeframe: {symbol: [[start, end, recorded], ...]}}
+    
+    Holds the ranges a provider returned no bars for (a listing gap, a
+    suspension, an unlisted holiday), so planning can skip them instead
+    of spending the request budget on them every run. Entries expire
+    after `retry_days`, since an empty answer may also have been a
+    transient provider failure.
+    """
+    
+    def __init__(self, path: str, retry_days: float = None):
+        self.path = path
+        self.retry = pd.Timedelta(days=BACKFILL_EMPTY_RETRY_DAYS if retry_days is None else retry_days)
+        self._lock = threading.Lock()
+        self._ranges = self._load()
+    
+    def _load(self) -> dict:
+        """Load the record from disk (an unreadable record is dropped)"""
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable backfill record {self.path}: {str(e)}")
+            return {}
+    
+    def _save(self):
+        """Atomically persist the record (caller holds the lock)"""
+        def write(temp_path):
+            with open(temp_path, 'w') as f:
+                json.dump(self._ranges, f)
+        
+        atomic_write(self.path, write)
+    
+    def get_ranges(self, timeframe: str, now: pd.Timestamp) -> Dict[str, List[Tuple[pd.Timestamp, pd.Timestamp]]]:
+        """
+        Get the unexpired empty ranges of a timeframe
+        
+        Returns:
+            Dictionary of {symbol: [(start, end), ...]} (end exclusive)
+        """
+        with self._lock:
+            symbols = self._ranges.get(timeframe, {})
+            return {
+                symbol: [(to_bar_timestamp(start), to_bar_timestamp(end))
+                         for start, end, recorded in entries if to_bar_timestamp(recorded) + self.retry > now]
+                for symbol, entries in symbols.items()
+            }
+    
+    def record(self, timeframe: str, ranges: List[Tuple[str, pd.Timestamp, pd.Timestamp]],
+               now: pd.Timestamp, horizon_start: pd.Timestamp):
+        """
+        Record ranges that came back empty, dropping expired entries and
+        entries that ended before the backfill horizon
+        
+        Args:
+            timeframe: Timeframe identifier
+            ranges: (symbol, start, end) tuples
+            now: Recording time
+            horizon_start: Start of the timeframe's backfill window
+        """
+        with self._lock:
+            symbols = self._ranges.setdefault(timeframe, {})
+            for symbol, start, end in ranges:
+                symbols.setdefault(symbol, []).append([start.isoformat(), end.isoformat(), now.isoformat()])
+            
+            for symbol in list(symbols):
+                symbols[symbol] = [
+                    entry for entry in symbols[symbol]
+                    if to_bar_timestamp(entry[1]) > horizon_start
+                    and to_bar_timestamp(entry[2]) + self.retry > now
+                ]
+                if not symbols[symbol]:
+                    del symbols[symbol]
+            
+            self._save()
+
+def _subtract_ranges(first: int, last: int, excluded: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Parts of grid positions [first, last] outside the sorted [lo, hi] ranges"""
+    pieces = []
+    for lo, hi in excluded:
+        if hi < first or lo > last:
+            continue
+        if lo > first:
+            pieces.append((first, lo - 1))
+        first = hi + 1
+        if first > last:
+            return pieces
+    pieces.append((first, last))
+    return pieces
+
+class BackfillPlanner:
+    """
+    Fills holes in stored bars with targeted date-range requests
+    
+    Stored coverage over the timeframe's configured period is compared
+    with the trading calendar. Each symbol's gaps are merged when only a
+    few stored bars separate them (re-fetching those is cheaper than
+    another request), and symbols with the same merged range share one
+    request. Requests run most recent first, at most `max_requests` per
+    run; the rest are left for the next run, which plans them again.
+    Ranges the provider answered with no bars are recorded (see
+    EmptyRangeLog) and left out of later plans until they expire.
+    
+    Derived timeframes (see RESAMPLE_ENABLED) are rebuilt from stored
+    source bars instead, so backfill their source timeframe first.
+    """
+    
+    def __init__(self, data_source: BaseDataSource, storage_manager,
+                 max_requests: int = None, merge_bars: int = None, empty_ranges: EmptyRangeLog = None):
+        self.data_source = data_source
+        self.storage_manager = storage_manager
+        self.max_requests = BACKFILL_MAX_REQUESTS if max_requests is None else max_requests
+        self.merge_bars = BACKFILL_MERGE_BARS if merge_bars is None else merge_bars
+        if empty_ranges is None:
+            if hasattr(storage_manager, 'get_state_path'):
+                path = storage_manager.get_state_path(BACKFILL_EMPTY_FILENAME)
+            else:
+                path = os.path.join(getattr(storage_manager, 'base_path', DATA_STORAGE_PATH), BACKFILL_EMPTY_FILENAME)
+            empty_ranges = EmptyRangeLog(path)
+        self.empty_ranges = empty_ranges
+    
+    def _is_derived(self, timeframe: str) -> bool:
+        """Whether a timeframe is resampled from stored bars rather than fetched"""
+        return bool(RESAMPLE_ENABLED and TIMEFRAME_CONFIGS[timeframe].get('resample_from'))
+    
+    def _window(self, timeframe: str, now: datetime = None):
+        """Reference time and (start, end) of a timeframe's backfill window (None if open-ended)"""
+        config = TIMEFRAME_CONFIGS[timeframe]
+        horizon = period_to_timedelta(config['period'])
+        
+        # Only bars that have closed by now are expected
+        bar_length = pd.Timedelta(minutes=config['update_frequency_minutes'])
+        now = to_bar_timestamp(now or market_hours.get_current_ist_time())
+        if horizon is None:
+            return now, None
+        return now, (now - horizon, now - bar_length)
+    
+    def plan(self, timeframe: str, symbols: List[str], now: datetime = None) -> List[BackfillRequest]:
+        """
+        Compute the requests that fill every gap in the configured period,
+        except ranges recorded as empty
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbols: Symbols to check (provider format, e.g. 'RELIANCE.NS')
+            now: Reference time (defaults to current IST time)
+        
+        Returns:
+            Requests, most recent first
+        """
+        config = TIMEFRAME_CONFIGS[timeframe]
+        now, window = self._window(timeframe, now)
+        if window is None:
+            logger.warning(f"Cannot backfill {timeframe}: period {config['period']} is open-ended")
+            return []
+        
+        bar_length = pd.Timedelta(minutes=config['update_frequency_minutes'])
+        start, end = window
+        
+        data = self.storage_manager.load_data(timeframe, symbol_filter=symbols,
+                                              start_date=start, end_date=end)
+        coverage = check_coverage(data, timeframe, start=start, end=end)
+        grid = coverage.grid if not data.empty else expected_bars(timeframe, start, end)
+        if grid.empty:
+            return []
+        
+        # Gaps as (first, last) grid positions per stored symbol name
+        gaps = coverage.gaps
+        ranges = sorted(zip(gaps['Symbol'], grid.searchsorted(gaps['start']),
+                            grid.searchsorted(gaps['end']), gaps['bars']))
+        
+        # Symbols with no bars in the period miss all of it
+        names = {storage_symbol(symbol): symbol for symbol in symbols}
+        for name in sorted(set(names) - set(coverage.summary.index)):
+            ranges.append((name, 0, len(grid) - 1, len(grid)))
+        ranges.sort()
+        
+        # Leave out bars the provider already returned empty (gaps are runs of
+        # consecutive grid positions, so each piece misses all of its bars)
+        empty = {}
+        for name, entries in self.empty_ranges.get_ranges(timeframe, now).items():
+            positions = [(grid.searchsorted(lo), grid.searchsorted(hi) - 1) for lo, hi in entries]
+            empty[name] = sorted((lo, hi) for lo, hi in positions if hi >= lo)
+        if empty:
+            ranges = [(name, lo, hi, hi - lo + 1)
+                      for name, first, last, bars in ranges
+                      for lo, hi in (_subtract_ranges(first, last, empty[name]) if name in empty
+                                     else [(first, last)])]
+        
+        # Merge a symbol's gaps separated by at most merge_bars stored bars
+        merged = []
+        for name, first, last, bars in ranges:
+            if merged and merged[-1][0] == name and first - merged[-1][2] - 1 <= self.merge_bars:
+                merged[-1][2] = last
+                merged[-1][3] += bars
+            else:
+                merged.append([name, first, last, bars])
+        
+        # Symbols with the same range share a request
+        groups: Dict[tuple, list] = {}
+        for name, first, last, bars in merged:
+            group = groups.setdefault((first, last), [[], 0])
+            group[0].append(names.get(name, name))
+            group[1] += bars
+        
+        requests = [BackfillRequest(grid[first], grid[last] + bar_length, group_symbols, int(bars))
+                    for (first, last), (group_symbols, bars) in groups.items()]
+        requests.sort(key=lambda request: (request.end, request.start), reverse=True)
+        
+        logger.info(f"Backfill plan for {timeframe}: {sum(request.bars for request in requests)} missing bars "
+                    f"of {len(merged)} symbol ranges in {len(requests)} requests")
+        return requests
+    
+    def _fetch(self, timeframe: str, request: BackfillRequest) -> pd.DataFrame:
+        """Fetch (or, for derived timeframes, rebuild) the bars of one request"""
+        config = TIMEFRAME_CONFIGS[timeframe]
+        
+        if self._is_derived(timeframe):
+            source = config['resample_from']
+            data = self.storage_manager.load_data(source, symbol_filter=request.symbols,
+                                                  start_date=request.start,
+                                                  end_date=request.end - pd.Timedelta(1, unit='ns'))
+            return resample_bars(data, timeframe)
+        
+        return self.data_source.get_multiple_stocks_data(
+            symbols=request.symbols,
+            period=config['period'],
+            interval=config['interval'],
+            start=request.start.to_pydatetime(),
+            end=request.end.to_pydatetime()
+        )
+    
+    def run(self, timeframe: str, symbols: List[str], now: datetime = None) -> Dict:
+        """
+        Fill the gaps of a timeframe within the request budget
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbols: Symbols to backfill
+            now: Reference time (defaults to current IST time)
+        
+        Returns:
+            Dictionary with requests made, requests deferred, bars saved and success
+        """
+        requests = self.plan(timeframe, symbols, now)
+        
+        # Derived timeframes are rebuilt locally, so they have no request budget
+        selected = requests if self._is_derived(timeframe) else requests[:self.max_requests]
+        deferred = len(requests) - len(selected)
+        if deferred:
+            logger.warning(f"Backfill budget of {self.max_requests} requests reached for {timeframe}, "
+                           f"{deferred} requests deferred to the next run")
+        
+        # Derived timeframes come back empty only while their source is missing
+        record_empty = not self._is_derived(timeframe)
+        
+        frames = []
+        empty = []
+        for request in selected:
+            failures = self.data_source.get_failure_count() if record_empty else 0
+            try:
+                logger.info(f"Backfilling {timeframe} from {request.start.isoformat()} to "
+                            f"{request.end.isoformat()} for {len(request.symbols)} symbols")
+                data = self._fetch(timeframe, request)
+            except Exception as e:
+                logger.error(f"Error backfilling {timeframe} from {request.start.isoformat()}: {str(e)}")
+                continue
+            
+            returned = set()
+            if data is not None and not data.empty:
+                frames.append(data)
+                returned = set(data['Symbol'].astype(str).map(storage_symbol))
+            
+            # Sources answer errors and throttling with no data too - only a
+            # request that went through cleanly shows the provider has no bars
+            if not record_empty:
+                continue
+            if self.data_source.get_failure_count() != failures:
+                logger.warning(f"Backfill request from {request.start.isoformat()} hit errors or throttling, "
+                               f"not recording its empty symbols")
+                continue
+            empty.extend((name, request.start, request.end)
+                         for name in map(storage_symbol, request.symbols) if name not in returned)
+        
+        if empty:
+            logger.info(f"Recording {len(empty)} empty {timeframe} ranges, skipped by backfill "
+                        f"for the next {self.empty_ranges.retry.days} days")
+            now, window = self._window(timeframe, now)
+            self.empty_ranges.record(timeframe, empty, now, window[0])
+        
+        data = concat_bars(frames)
+        success = data.empty or self.storage_manager.save_data(data, timeframe, append=True)
+        
+        return {
+            'requests': len(selected),
+            'deferred': deferred,
+            'bars': len(data),
+            'success': bool(success)
+        }
@@ -0,0 +1,192 @@
+"""
+Vectorized check of stored bars against the trading calendar's expected bar grid
+"""
+import logging
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from services.resampler import bucket_starts
+from storage.schema import BAR_TIMEZONE, normalize_datetimes, to_bar_timestamp
+from utils.trading_calendar import TradingCalendar, trading_calendar
+from config.settings import TIMEFRAME_CONFIGS
+
+logger = logging.getLogger(__name__)
+
+class BarCoverage(NamedTuple):
+    """
+    Stored bars compared with the bars the exchange calendar expects
+    
+    Fields:
+        grid: Expected bar starts over the checked span (DatetimeIndex in the bar timezone)
+        in_session: Per input row, whether its timestamp is an expected bar of a session
+        gaps: Runs of consecutive missing bars (Symbol, start, end, bars)
+        missing: Every missing bar (Symbol, Datetime)
+        extra: Bars inside the checked window that are not expected, e.g. on
+               holidays or at off-grid times (Symbol, Datetime)
+        summary: Expected, stored, missing and extra bar counts, indexed by Symbol
+    """
+    grid: pd.DatetimeIndex
+    in_session: np.ndarray
+    gaps: pd.DataFrame
+    missing: pd.DataFrame
+    extra: pd.DataFrame
+    summary: pd.DataFrame
+
+def _to_datetimes(values: np.ndarray) -> pd.DatetimeIndex:
+    """Epoch nanoseconds (UTC) as timestamps in the bar timezone"""
+    return pd.DatetimeIndex(np.asarray(values, dtype='int64').view('M8[ns]')).tz_localize('UTC').tz_convert(BAR_TIMEZONE)
+
+def expected_bars(timeframe: str, start, end, calendar: TradingCalendar = None) -> pd.DatetimeIndex:
+    """
+    Get the bars a timeframe should have between two instants
+    
+    Intraday bars are anchored at each session's open and cut off at the
+    close; daily bars are stamped at midnight of every session and weekly
+    bars at midnight of the Monday of every week with a session.
+    
+    Args:
+        timeframe: Timeframe identifier
+        start: First instant (date, datetime or string)
+        end: Last instant (bars starting at `end` are included)
+        calendar: Trading calendar (default: the global one)
+    
+    Returns:
+        DatetimeIndex of bar starts in the bar timezone
+    """
+    calendar = calendar or trading_calendar
+    minutes = TIMEFRAME_CONFIGS[timeframe]['update_frequency_minutes']
+    start, end = to_bar_timestamp(start), to_bar_timestamp(end)
+    
+    if minutes < 1440:
+        return _to_datetimes(calendar.bar_starts(start, end, minutes))
+    
+    days = calendar.sessions_in_range(start, end)
+    if minutes >= 7 * 1440:
+        # 1970-01-01 was a Thursday; step back to each week's Monday
+        days = np.unique(days - (days.astype('int64') + 3) % 7)
+    
+    grid = pd.DatetimeIndex(days).as_unit('ns').tz_localize(BAR_TIMEZONE)
+    return grid[(grid >= start) & (grid <= end)]
+
+def _empty_coverage() -> BarCoverage:
+    """Coverage of no bars"""
+    return BarCoverage(
+        grid=_to_datetimes(np.empty(0, dtype='int64')),
+        in_session=np.zeros(0, dtype=bool),
+        gaps=pd.DataFrame(columns=['Symbol', 'start', 'end', 'bars']),
+        missing=pd.DataFrame(columns=['Symbol', 'Datetime']),
+        extra=pd.DataFrame(columns=['Symbol', 'Datetime']),
+        summary=pd.DataFrame(columns=['expected', 'stored', 'missing', 'extra'])
+    )
+
+def check_coverage(data: pd.DataFrame, timeframe: str, start=None, end=None,
+                   calendar: TradingCalendar = None) -> BarCoverage:
+    """
+    Compare stored bars with the expected bar grid, per symbol
+    
+    Each symbol is checked from `start` (default: its first stored bar)
+    through `end` (default: the latest bar of any symbol), so a symbol
+    that stopped updating shows its missing tail. Daily and weekly bars
+    match their day or week regardless of the time they are stamped at.
+    Everything is computed with sorted-array operations, so millions of
+    rows take a fraction of a second.
+    
+    Args:
+        data: Bars with Symbol and Datetime columns (any order, duplicates allowed)
+        timeframe: Timeframe of the bars
+        start: Start of the checked window (date, datetime or string)
+        end: End of the checked window
+        calendar: Trading calendar (default: the global one)
+    
+    Returns:
+        BarCoverage with the grid, per-row mask, gaps, missing and extra bars
+    """
+    if data.empty:
+        return _empty_coverage()
+    
+    datetimes = normalize_datetimes(data['Datetime'])
+    if TIMEFRAME_CONFIGS[timeframe]['update_frequency_minutes'] >= 1440:
+        datetimes = bucket_starts(datetimes, timeframe)
+    values = datetimes.array.asi8
+    codes, names = pd.factorize(data['Symbol'].astype(str), sort=True)
+    
+    # Checked window per symbol
+    if start is None:
+        starts = np.full(len(names), np.iinfo(np.int64).max)
+        np.minimum.at(starts, codes, values)
+    else:
+        starts = np.full(len(names), to_bar_timestamp(start).value)
+    end_value = values.max() if end is None else to_bar_timestamp(end).value
+    
+    grid = expected_bars(timeframe, pd.Timestamp(int(starts.min()), tz='UTC'),
+                         pd.Timestamp(int(end_value), tz='UTC'), calendar)
+    grid_values = grid.asi8
+    size = len(grid_values)
+    
+    # Rows that are grid bars, and rows inside their symbol's window
+    positions = np.searchsorted(grid_values, values)
+    on_grid = positions < size
+    on_grid[on_grid] = grid_values[positions[on_grid]] == values[on_grid]
+    in_window = (values >= starts[codes]) & (values <= end_value)
+    extra = in_window & ~on_grid
+    
+    # Each symbol's expected bars are grid positions [first, stop)
+    first = np.searchsorted(grid_values, starts)
+    stop = np.maximum(np.searchsorted(grid_values, end_value, side='right'), first)
+    
+    # Encode (symbol, position + 1) as one key, with a sentinel just
+    # outside either end of every symbol's window, so the runs between
+    # consecutive keys of one symbol are exactly its gaps
+    stride = size + 2
+    symbol_ids = np.arange(len(names), dtype=np.int64)
+    stored = on_grid & in_window
+    keys = np.sort(np.concatenate([
+        codes[stored].astype(np.int64) * stride + positions[stored] + 1,
+        symbol_ids * stride + first,
+        symbol_ids * stride + stop + 1
+    ]))
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]   # Duplicate rows count once
+    present = np.bincount(keys // stride, minlength=len(names)) - 2
+    
+    is_gap = (keys[1:] // stride == keys[:-1] // stride) & (np.diff(keys) > 1)
+    gap_symbols = keys[:-1][is_gap] // stride
+    gap_first = keys[:-1][is_gap] % stride
+    gap_last = keys[1:][is_gap] % stride - 2
+    gap_bars = gap_last - gap_first + 1
+    
+    # Expand the runs into individual missing bars
+    total = int(gap_bars.sum())
+    missing_positions = (np.repeat(gap_first, gap_bars)
+                         + np.arange(total) - np.repeat(np.cumsum(gap_bars) - gap_bars, gap_bars))
+    
+    expected = stop - first
+    extra_counts = np.bincount(codes[extra], minlength=len(names))
+    logger.info(f"Coverage of {timeframe}: {len(names)} symbols, {int(expected.sum())} expected bars, "
+                f"{total} missing in {len(gap_bars)} gaps, {int(extra_counts.sum())} extra")
+    
+    return BarCoverage(
+        grid=grid,
+        in_session=on_grid,
+        gaps=pd.DataFrame({
+            'Symbol': names.take(gap_symbols),
+            'start': grid[gap_first],
+            'end': grid[gap_last],
+            'bars': gap_bars
+        }),
+        missing=pd.DataFrame({
+            'Symbol': names.take(np.repeat(gap_symbols, gap_bars)),
+            'Datetime': grid[missing_positions]
+        }),
+        extra=pd.DataFrame({
+            'Symbol': names.take(codes[extra]),
+            'Datetime': datetimes.array[extra]
+        }),
+        summary=pd.DataFrame({
+            'expected': expected,
+            'stored': present,
+            'missing': expected - present,
+            'extra': extra_counts
+        }, index=pd.Index(names, name='Symbol'))
+    )
@@ -2,18 +2,30 @@
 Main data service that orchestrates all components
 """
 import logging
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Union, Iterator
 import pandas as pd
 from datetime import datetime
 
 from data_sources.yfinance_source import YFinanceDataSource
 from data_sources.fyers_source import FyersDataSource
 from storage.file_storage import FileStorageManager
+from storage.parquet_storage import ParquetStorageManager
+from storage.partitioned_storage import PartitionedStorageManager, PartitionedParquetStorageManager
+from storage.mmap_storage import MmapStorageManager
 from storage.database import DatabaseManager
+from storage.cache import CachedStorageManager
 from schedulers.data_scheduler import DataScheduler
+from services.incremental_fetch import IncrementalFetcher
+from services.coverage import BarCoverage, check_coverage
+from services.backfill import BackfillPlanner
+from storage.schema import to_bar_timestamp
 from utils.logging_config import setup_logging, get_logger
 from utils.market_hours import market_hours
-from config.settings import DEFAULT_DATA_SOURCE, RATE_LIMIT_DELAY
+from config.settings import (
+    DEFAULT_DATA_SOURCE, DEFAULT_STORAGE_TYPE, RATE_LIMIT_DELAY, MAX_CONCURRENT_REQUESTS,
+    BATCH_DOWNLOAD_ENABLED, BATCH_DOWNLOAD_SIZE, INCREMENTAL_FETCH_ENABLED,
+    BAR_CACHE_ENABLED, BAR_CACHE_MAX_MB, TIMEFRAME_CONFIGS
+)
 from config.symbols import get_symbols
 
 logger = get_logger(__name__)
@@ -24,14 +36,15 @@ class DataService:
     """
     
     def __init__(self, data_source_type: str = None, symbol_set: str = 'development',
-                 storage_type: str = 'file', auto_start_scheduler: bool = False):
+                 storage_type: str = None, auto_start_scheduler: bool = False):
         """
         Initialize the data service
         
         Args:
             data_source_type: 'yfinance' or 'fyers' (defaults to config setting)
             symbol_set: Symbol set to use ('development', 'production', etc.)
-            storage_type: 'file' or 'database' (currently only 'file' is implemented)
+            storage_type: 'file', 'parquet', 'partitioned', 'partitioned_parquet', 'mmap'
+                          or 'database' (defaults to config setting)
             auto_start_scheduler: Whether to automatically start the scheduler
         """
         # Setup logging
@@ -39,7 +52,7 @@ class DataService:
         
         self.data_source_type = data_source_type or DEFAULT_DATA_SOURCE
         self.symbol_set = symbol_set
-        self.storage_type = storage_type
+        self.storage_type = storage_type or DEFAULT_STORAGE_TYPE
         
         # Initialize components
         self.data_source = self._initialize_data_source()
@@ -52,7 +65,7 @@ class DataService:
         logger.info(f"DataService initialized:")
         logger.info(f"  - Data source: {self.data_source_type}")
         logger.info(f"  - Symbol set: {symbol_set} ({len(self.symbols)} symbols)")
-        logger.info(f"  - Storage: {storage_type}")
+        logger.info(f"  - Storage: {self.storage_type}")
         
         # Start scheduler if requested
         if auto_start_scheduler:
@@ -61,20 +74,44 @@ class DataService:
     def _initialize_data_source(self):
         """Initialize the appropriate data source"""
         if self.data_source_type == 'yfinance':
-            return YFinanceDataSource(rate_limit_delay=RATE_LIMIT_DELAY)
+            return YFinanceDataSource(
+                rate_limit_delay=RATE_LIMIT_DELAY,
+                max_workers=MAX_CONCURRENT_REQUESTS,
+                batch_size=BATCH_DOWNLOAD_SIZE if BATCH_DOWNLOAD_ENABLED else None
+            )
         elif self.data_source_type == 'fyers':
-            return FyersDataSource(rate_limit_delay=RATE_LIMIT_DELAY)
+            return FyersDataSource(
+                rate_limit_delay=RATE_LIMIT_DELAY,
+                max_workers=MAX_CONCURRENT_REQUESTS
+            )
         else:
             raise ValueError(f"Unsupported data source: {self.data_source_type}")
     
     def _initialize_storage(self):
         """Initialize the appropriate storage manager"""
         if self.storage_type == 'file':
-            return FileStorageManager()
+            storage = FileStorageManager()
+        elif self.storage_type == 'parquet':
+            storage = ParquetStorageManager()
+        elif self.storage_type == 'partitioned':
+            storage = PartitionedStorageManager()
+        elif self.storage_type == 'partitioned_parquet':
+            storage = PartitionedParquetStorageManager()
+        elif self.storage_type == 'mmap':
+            storage = MmapStorageManager()
         elif self.storage_type == 'database':
-            return DatabaseManager()  # Placeholder for now
+            storage = DatabaseManager()
         else:
             raise ValueError(f"Unsupported storage type: {self.storage_type}")
+        
+        # Finish saves that were interrupted by a crash before anything reads the data
+        if hasattr(storage, 'replay_journal'):
+            storage.replay_journal()
+        
+        if BAR_CACHE_ENABLED:
+            storage = CachedStorageManager(storage, max_bytes=BAR_CACHE_MAX_MB * 1024 * 1024)
+        
+        return storage
     
     def start_scheduler(self) -> bool:
         """
@@ -109,7 +146,7 @@ class DataService:
             logger.warning("No scheduler running")
     
     def fetch_data(self, timeframe: str, symbols: List[str] = None, 
-                   save_data: bool = True) -> pd.DataFrame:
+                   save_data: bool = True, incremental: bool = None) -> pd.DataFrame:
         """
         Fetch data for specific timeframe and symbols
         
@@ -117,41 +154,21 @@ class DataService:
             timeframe: '15m', '1h', '1d', or '1wk'
             symbols: List of symbols (defaults to configured symbols)
             save_data: Whether to save the data to storage
+            incremental: Only fetch bars newer than the stored data
+                         (defaults to INCREMENTAL_FETCH_ENABLED; requires save_data)
         
         Returns:
             DataFrame with fetched data
         """
         try:
-            from config.settings import TIMEFRAME_CONFIGS
-            
-            symbols_to_fetch = symbols or self.symbols
-            config = TIMEFRAME_CONFIGS.get(timeframe)
-            
-            if not config:
-                raise ValueError(f"Invalid timeframe: {timeframe}")
-            
-            logger.info(f"Fetching {timeframe} data for {len(symbols_to_fetch)} symbols")
-            
-            data = self.data_source.get_multiple_stocks_data(
-                symbols=symbols_to_fetch,
-                period=config['period'],
-                interval=config['interval']
-            )
+            data = self._fetch_bars(timeframe, symbols, save_data, incremental)
             
             if data.empty:
                 logger.warning(f"No data retrieved for {timeframe}")
                 return data
             
             if save_data:
-                success = self.storage_manager.save_data(
-                    data=data,
-                    timeframe=timeframe,
-                    append=True
-                )
-                if success:
-                    logger.info(f"Saved {len(data)} records for {timeframe}")
-                else:
-                    logger.error(f"Failed to save data for {timeframe}")
+                self._save_bars(timeframe, data)
             
             return data
             
@@ -159,6 +176,55 @@ class DataService:
             logger.error(f"Error fetching data for {timeframe}: {str(e)}")
             return pd.DataFrame()
     
+    def _fetch_bars(self, timeframe: str, symbols: List[str] = None,
+                    save_data: bool = True, incremental: bool = None) -> pd.DataFrame:
+        """
+        Fetch bars from the data source (the network half of fetch_data)
+        
+        Raises:
+            ValueError: If the timeframe is not configured
+        """
+        from config.settings import TIMEFRAME_CONFIGS
+        
+        symbols_to_fetch = symbols or self.symbols
+        config = TIMEFRAME_CONFIGS.get(timeframe)
+        
+        if not config:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
+        
+        logger.info(f"Fetching {timeframe} data for {len(symbols_to_fetch)} symbols")
+        
+        if incremental is None:
+            incremental = INCREMENTAL_FETCH_ENABLED
+        
+        if incremental and save_data:
+            fetcher = IncrementalFetcher(self.data_source, self.storage_manager)
+            return fetcher.fetch(timeframe, symbols_to_fetch)
+        
+        return self.data_source.get_multiple_stocks_data(
+            symbols=symbols_to_fetch,
+            period=config['period'],
+            interval=config['interval']
+        )
+    
+    def _save_bars(self, timeframe: str, data: pd.DataFrame) -> bool:
+        """
+        Append fetched bars to storage (the disk half of fetch_data)
+        
+        Returns:
+            True if saved
+        """
+        success = self.storage_manager.save_data(
+            data=data,
+            timeframe=timeframe,
+            append=True
+        )
+        if success:
+            logger.info(f"Saved {len(data)} records for {timeframe}")
+        else:
+            logger.error(f"Failed to save data for {timeframe}")
+        return success
+    
     def load_data(self, timeframe: str, symbols: List[str] = None,
                   start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """
@@ -174,21 +240,17 @@ class DataService:
             DataFrame with loaded data
         """
         try:
-            data = self.storage_manager.load_data(timeframe, symbol_filter=symbols)
+            # Symbol and date filters are applied by the storage backend
+            data = self.storage_manager.load_data(
+                timeframe,
+                symbol_filter=symbols,
+                start_date=start_date,
+                end_date=end_date
+            )
             
             if data.empty:
                 return data
             
-            # Apply date filters if provided
-            if start_date or end_date:
-                if 'Datetime' in data.columns:
-                    data['Datetime'] = pd.to_datetime(data['Datetime'])
-                    
-                    if start_date:
-                        data = data[data['Datetime'] >= start_date]
-                    if end_date:
-                        data = data[data['Datetime'] <= end_date]
-            
             logger.info(f"Loaded {len(data)} records for {timeframe}")
             return data
             
@@ -196,6 +258,121 @@ class DataService:
             logger.error(f"Error loading data for {timeframe}: {str(e)}")
             return pd.DataFrame()
     
+    def iter_data(self, timeframe: str, symbols: List[str] = None,
+                  start_date: str = None, end_date: str = None,
+                  chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream data from storage in chunks (constant memory for large histories)
+        
+        Args:
+            timeframe: Timeframe to load
+            symbols: Symbols to filter (None for all)
+            start_date: Start date filter (YYYY-MM-DD)
+            end_date: End date filter (YYYY-MM-DD)
+            chunksize: Rows per chunk read from storage
+        
+        Yields:
+            DataFrames of matching rows
+        """
+        return self.storage_manager.iter_data(
+            timeframe,
+            symbol_filter=symbols,
+            start_date=start_date,
+            end_date=end_date,
+            chunksize=chunksize
+        )
+    
+    def check_coverage(self, timeframe: str, symbols: List[str] = None,
+                       start_date: str = None, end_date: str = None) -> Optional[BarCoverage]:
+        """
+        Compare stored bars with the bars the trading calendar expects
+        
+        Args:
+            timeframe: Timeframe to check
+            symbols: Symbols to check (None for all stored)
+            start_date: Start of the checked window (default: each symbol's first bar)
+            end_date: End of the checked window (default: the latest stored bar)
+        
+        Returns:
+            BarCoverage with per-symbol gaps and extra bars, or None on error
+        """
+        try:
+            data = self.load_data(timeframe, symbols, start_date, end_date)
+            return check_coverage(data, timeframe, start=start_date, end=end_date)
+            
+        except Exception as e:
+            logger.error(f"Error checking coverage for {timeframe}: {str(e)}")
+            return None
+    
+    def backfill(self, timeframe: str = None, symbols: List[str] = None,
+                 max_requests: int = None) -> Dict[str, Dict]:
+        """
+        Fetch only the bars missing from storage within each timeframe's period
+        
+        Args:
+            timeframe: Timeframe to backfill (None for all, in configured order)
+            symbols: Symbols to backfill (None for the service's symbol set)
+            max_requests: Provider requests per timeframe (defaults to BACKFILL_MAX_REQUESTS)
+        
+        Returns:
+            Dictionary mapping timeframe to requests made, requests deferred,
+            bars saved and success (or an error)
+        """
+        planner = BackfillPlanner(self.data_source, self.storage_manager, max_requests=max_requests)
+        timeframes = [timeframe] if timeframe else list(TIMEFRAME_CONFIGS.keys())
+        
+        results = {}
+        for tf in timeframes:
+            try:
+                results[tf] = planner.run(tf, symbols or self.symbols)
+            except Exception as e:
+                logger.error(f"Error backfilling {tf}: {str(e)}")
+                results[tf] = {'error': str(e)}
+        
+        return results
+    
+    def list_snapshots(self, timeframe: str) -> List[str]:
+        """
+        List the days a timeframe can be restored to
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Sorted list of YYYYMMDD day keys (empty if the backend keeps no snapshots)
+        """
+        if not hasattr(self.storage_manager, 'list_snapshots'):
+            return []
+        return self.storage_manager.list_snapshots(timeframe)
+    
+    def restore_snapshot(self, timeframe: str, day: str) -> bool:
+        """
+        Replace a timeframe's stored data with its state at the end of a day
+        
+        Args:
+            timeframe: Timeframe identifier
+            day: Day to restore (YYYY-MM-DD or YYYYMMDD)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not hasattr(self.storage_manager, 'load_snapshot'):
+                logger.error(f"Storage type {self.storage_type} does not keep snapshots")
+                return False
+            
+            data = self.storage_manager.load_snapshot(timeframe, day)
+            if data.empty:
+                logger.error(f"No {timeframe} snapshot data as of {day}")
+                return False
+            
+            # Saved through the cache wrapper so cached bars are invalidated
+            return self.storage_manager.save_data(data, timeframe, append=False)
+            
+        except Exception as e:
+            logger.error(f"Error restoring {timeframe} snapshot for {day}: {str(e)}")
+            return False
+    
     def manual_update(self, timeframe: str = None, symbols: List[str] = None) -> bool:
         """
         Manually trigger a data update
@@ -259,6 +436,9 @@ class DataService:
         if hasattr(self.storage_manager, 'get_data_summary'):
             status['storage'] = self.storage_manager.get_data_summary()
         
+        if hasattr(self.storage_manager, 'get_cache_stats'):
+            status['cache'] = self.storage_manager.get_cache_stats()
+        
         return status
     
     def get_data_summary(self) -> Dict:
@@ -274,6 +454,13 @@ class DataService:
         
         for timeframe in TIMEFRAME_CONFIGS.keys():
             try:
+                # Answer from the metadata index without reading bar data when available
+                if hasattr(self.storage_manager, 'get_symbol_metadata'):
+                    summary[timeframe] = self._summarize_metadata(
+                        self.storage_manager.get_symbol_metadata(timeframe)
+                    )
+                    continue
+                
                 data = self.load_data(timeframe)
                 if not data.empty:
                     summary[timeframe] = {
@@ -298,6 +485,36 @@ class DataService:
         
         return summary
     
+    def _summarize_metadata(self, entries: Dict[str, Dict]) -> Dict:
+        """
+        Build a timeframe summary from metadata index entries
+        
+        Args:
+            entries: {symbol: {'first', 'last', 'rows', 'checksum'}}
+        
+        Returns:
+            Summary dictionary in the same shape as get_data_summary entries
+        """
+        if not entries:
+            return {
+                'records': 0,
+                'symbols': 0,
+                'date_range': None,
+                'last_update': None
+            }
+        
+        first = min(to_bar_timestamp(entry['first']) for entry in entries.values())
+        last = max(to_bar_timestamp(entry['last']) for entry in entries.values())
+        return {
+            'records': sum(entry['rows'] for entry in entries.values()),
+            'symbols': len(entries),
+            'date_range': {
+                'start': first.isoformat(),
+                'end': last.isoformat()
+            },
+            'last_update': last
+        }
+    
     def switch_data_source(self, new_source: str) -> bool:
         """
         Switch to a different data source
@@ -366,6 +583,10 @@ class DataService:
             if hasattr(self.storage_manager, 'cleanup_old_files'):
                 self.storage_manager.cleanup_old_files()
             
+            # Release database connections
+            if hasattr(self.storage_manager, 'close'):
+                self.storage_manager.close()
+            
             logger.info("DataService cleanup completed")
             
         except Exception as e:
@@ -373,7 +594,7 @@ class DataService:
 
 # Factory function for easy service creation
 def create_data_service(data_source: str = None, symbol_set: str = 'development',
-                       auto_start: bool = False) -> DataService:
+                       auto_start: bool = False, storage_type: str = None) -> DataService:
     """
     Factory function to create a configured DataService
     
@@ -381,6 +602,8 @@ def create_data_service(data_source: str = None, symbol_set: str = 'development'
         data_source: Data source type ('yfinance', 'fyers')
         symbol_set: Symbol set to use
         auto_start: Whether to start scheduler automatically
+        storage_type: Storage backend ('file', 'parquet', 'partitioned',
+                      'partitioned_parquet', 'mmap', 'database')
     
     Returns:
         Configured DataService instance
@@ -388,5 +611,6 @@ def create_data_service(data_source: str = None, symbol_set: str = 'development'
     return DataService(
         data_source_type=data_source,
         symbol_set=symbol_set,
+        storage_type=storage_type,
         auto_start_scheduler=auto_start
     ) 
\ No newline at end of file
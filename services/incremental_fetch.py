@@ -0,0 +1,175 @@
+"""
+Incremental fetching - only request bars newer than the stored high-water mark
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from data_sources.base import BaseDataSource
+from storage.schema import concat_bars
+from utils.market_hours import market_hours, IST
+from config.settings import (
+    TIMEFRAME_CONFIGS, INCREMENTAL_OVERLAP_BARS, INCREMENTAL_GROUP_TOLERANCE_HOURS
+)
+
+logger = logging.getLogger(__name__)
+
+# Approximate calendar length of period units (used only to cap windows)
+PERIOD_UNITS = {
+    'd': timedelta(days=1),
+    'wk': timedelta(weeks=1),
+    'mo': timedelta(days=30),
+    'y': timedelta(days=365)
+}
+
+def period_to_timedelta(period: str) -> Optional[timedelta]:
+    """
+    Convert a provider period string to a timedelta
+    
+    Args:
+        period: Period such as '5d', '1mo', '2y'
+    
+    Returns:
+        Timedelta, or None for open-ended periods ('ytd', 'max')
+    """
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period or '')
+    if not match:
+        return None
+    return int(match.group(1)) * PERIOD_UNITS[match.group(2)]
+
+class IncrementalFetcher:
+    """
+    Fetches only the bars after each symbol's latest stored timestamp
+    
+    Symbols without stored data, or whose data is older than the configured
+    period, fall back to a full period fetch.
+    """
+    
+    def __init__(self, data_source: BaseDataSource, storage_manager,
+                 overlap_bars: int = INCREMENTAL_OVERLAP_BARS):
+        self.data_source = data_source
+        self.storage_manager = storage_manager
+        self.overlap_bars = overlap_bars
+    
+    def plan(self, timeframe: str, symbols: List[str],
+             now: datetime = None) -> List[Tuple[Optional[datetime], List[str]]]:
+        """
+        Group symbols into fetch windows
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbols: Symbols to fetch (provider format, e.g. 'RELIANCE.NS')
+            now: Reference time (defaults to current IST time)
+        
+        Returns:
+            List of (window start, symbols) - a None start means a full period fetch
+        """
+        config = TIMEFRAME_CONFIGS[timeframe]
+        bar_length = timedelta(minutes=config['update_frequency_minutes'])
+        horizon = period_to_timedelta(config['period'])
+        now = now or market_hours.get_current_ist_time()
+        
+        if hasattr(self.storage_manager, 'get_latest_data_times'):
+            marks = self.storage_manager.get_latest_data_times(timeframe)
+        else:
+            marks = {}
+        
+        full_fetch = []
+        starts = []
+        for symbol in symbols:
+            mark = marks.get(symbol.replace('.NS', ''))
+            if mark is None or pd.isna(mark):
+                full_fetch.append(symbol)
+                continue
+            
+            mark = pd.Timestamp(mark)
+            mark = mark.tz_localize(IST) if mark.tzinfo is None else mark.tz_convert(IST)
+            start = mark - self.overlap_bars * bar_length
+            
+            if horizon is not None and start < now - horizon:
+                full_fetch.append(symbol)
+            else:
+                starts.append((start, symbol))
+        
+        windows = []
+        if full_fetch:
+            windows.append((None, full_fetch))
+        
+        # Merge windows that start close together into a single request
+        tolerance = timedelta(hours=INCREMENTAL_GROUP_TOLERANCE_HOURS)
+        for start, symbol in sorted(starts):
+            if windows and windows[-1][0] is not None and start - windows[-1][0] <= tolerance:
+                windows[-1][1].append(symbol)
+            else:
+                windows.append((start, [symbol]))
+        
+        return windows
+    
+    def fetch(self, timeframe: str, symbols: List[str]) -> pd.DataFrame:
+        """
+        Fetch new bars for the given symbols
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbols: Symbols to fetch
+        
+        Returns:
+            Combined DataFrame with the fetched bars
+        """
+        config = TIMEFRAME_CONFIGS[timeframe]
+        
+        all_data = []
+        for start, window_symbols in self._windows(timeframe, symbols):
+            data = self.data_source.get_multiple_stocks_data(
+                symbols=window_symbols,
+                period=config['period'],
+                interval=config['interval'],
+                start=start
+            )
+            
+            if not data.empty:
+                all_data.append(data)
+        
+        return concat_bars(all_data)
+    
+    def iter_fetch(self, timeframe: str, symbols: List[str]) -> Iterator[pd.DataFrame]:
+        """
+        Fetch new bars for the given symbols, yielding data as it arrives
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbols: Symbols to fetch
+        
+        Yields:
+            Non-empty DataFrames with fetched bars (per symbol or per provider batch)
+        """
+        config = TIMEFRAME_CONFIGS[timeframe]
+        
+        for start, window_symbols in self._windows(timeframe, symbols):
+            yield from self.data_source.iter_stocks_data(
+                symbols=window_symbols,
+                period=config['period'],
+                interval=config['interval'],
+                start=start
+            )
+    
+    def _windows(self, timeframe: str, symbols: List[str]) -> Iterator[Tuple[Optional[datetime], List[str]]]:
+        """
+        Plan fetch windows and log each one as it is fetched
+        
+        Yields:
+            (window start as a datetime or None for a full fetch, symbols)
+        """
+        config = TIMEFRAME_CONFIGS[timeframe]
+        
+        for start, window_symbols in self.plan(timeframe, symbols):
+            if start is None:
+                logger.info(f"Full {config['period']} fetch of {timeframe} for {len(window_symbols)} symbols")
+            else:
+                logger.info(f"Incremental fetch of {timeframe} since {start.isoformat()} "
+                            f"for {len(window_symbols)} symbols")
+            
+            yield (start.to_pydatetime() if start is not None else None), window_symbols
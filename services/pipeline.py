@@ -0,0 +1,212 @@
+"""
+Streaming fetch -> normalize -> persist pipeline with bounded queues
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from data_sources.base import BaseDataSource, standardize_bars
+from storage.schema import normalize_datetimes, concat_bars
+from storage.process_pool import process_pool
+from config.settings import PIPELINE_BATCH_ROWS, PIPELINE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_END = object()
+
+class _StageError:
+    """An exception raised in an upstream stage, passed down the queue"""
+    
+    def __init__(self, stage: str, error: Exception):
+        self.stage = stage
+        self.error = error
+
+class BarPipeline:
+    """
+    Fetch, normalize and persist bars as a stream instead of one big frame
+    
+    A producer thread drains the fetch iterator (network I/O), a normalizer
+    thread runs `standardize_dataframe` on each frame, and the calling
+    thread saves micro-batches of about `batch_rows` rows. The stages are
+    connected by queues holding at most `queue_size` frames, so a slow
+    stage blocks the one before it and memory stays bounded by a few frames
+    plus one micro-batch. Every micro-batch is appended as soon as it is
+    full, so a failure late in the run keeps the batches saved before it.
+    
+    With the process pool enabled (PROCESS_POOL_ENABLED) the normalizer
+    submits frames to the pool workers instead, keeping up to one frame
+    per worker in flight, and the calling thread collects them in order.
+    Data sources that override `standardize_dataframe` are always
+    normalized in-process.
+    
+    Overwriting saves (append=False) can't be split without losing the
+    rest of the timeframe, so they are buffered and saved once at the end.
+    """
+    
+    def __init__(self, data_source: BaseDataSource, storage_manager,
+                 batch_rows: int = None, queue_size: int = None):
+        self.data_source = data_source
+        self.storage_manager = storage_manager
+        self.batch_rows = batch_rows or PIPELINE_BATCH_ROWS
+        self.queue_size = queue_size or PIPELINE_QUEUE_SIZE
+    
+    def run(self, timeframe: str, frames: Iterable[pd.DataFrame], append: bool = True) -> Dict:
+        """
+        Stream frames into storage
+        
+        Args:
+            timeframe: Timeframe identifier
+            frames: Iterable of fetched DataFrames (consumed in a worker thread)
+            append: Whether to merge with stored data or replace the timeframe
+        
+        Returns:
+            Dictionary with frames, rows, saved_rows, batches, failed_batches and errors
+        """
+        stats = {'frames': 0, 'rows': 0, 'saved_rows': 0, 'batches': 0, 'failed_batches': 0, 'errors': 0}
+        stop = threading.Event()
+        fetched = queue.Queue(maxsize=self.queue_size)
+        in_flight = max(self.queue_size, process_pool.workers) if self._uses_pool() else self.queue_size
+        normalized = queue.Queue(maxsize=in_flight)
+        
+        stages = [
+            threading.Thread(target=self._produce, args=(frames, fetched, stop),
+                             name=f'pipeline-fetch-{timeframe}', daemon=True),
+            threading.Thread(target=self._normalize_stage, args=(fetched, normalized, stop),
+                             name=f'pipeline-normalize-{timeframe}', daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+        
+        buffer: List[pd.DataFrame] = []
+        buffered = 0
+        
+        try:
+            while True:
+                item = normalized.get()
+                if item is _END:
+                    break
+                
+                if isinstance(item, _StageError):
+                    stats['errors'] += 1
+                    logger.error(f"Pipeline {item.stage} stage failed for {timeframe}: {str(item.error)}")
+                    continue
+                
+                if isinstance(item, Future):
+                    try:
+                        item = process_pool.collect(item)
+                    except Exception as e:
+                        stats['errors'] += 1
+                        logger.error(f"Pipeline normalize stage failed for {timeframe}: {str(e)}")
+                        continue
+                
+                buffer.append(item)
+                buffered += len(item)
+                stats['frames'] += 1
+                stats['rows'] += len(item)
+                
+                if append and buffered >= self.batch_rows:
+                    self._persist(timeframe, buffer, True, stats)
+                    buffer, buffered = [], 0
+            
+            if buffer:
+                self._persist(timeframe, buffer, append, stats)
+                
+        finally:
+            stop.set()
+        
+        for stage in stages:
+            stage.join()
+        
+        logger.info(f"Pipeline for {timeframe}: {stats['rows']} rows from {stats['frames']} frames, "
+                    f"{stats['saved_rows']} saved in {stats['batches']} batches "
+                    f"({stats['failed_batches']} failed)")
+        return stats
+    
+    def _persist(self, timeframe: str, buffer: List[pd.DataFrame], append: bool, stats: Dict):
+        """Save one micro-batch"""
+        batch = concat_bars(buffer)
+        
+        if self.storage_manager.save_data(data=batch, timeframe=timeframe, append=append):
+            stats['saved_rows'] += len(batch)
+            stats['batches'] += 1
+        else:
+            stats['failed_batches'] += 1
+            logger.error(f"Failed to save a {len(batch)}-row {timeframe} batch")
+    
+    def normalize(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Bring a fetched frame into the stored format
+        
+        Args:
+            frame: DataFrame from the data source
+        
+        Returns:
+            Standardized DataFrame with timezone-aware Datetime
+        """
+        frame = self.data_source.standardize_dataframe(frame, self._frame_symbol(frame))
+        
+        if 'Datetime' in frame.columns:
+            frame = frame.assign(Datetime=normalize_datetimes(frame['Datetime']))
+        return frame
+    
+    def _frame_symbol(self, frame: pd.DataFrame) -> str:
+        """Symbol of a fetched frame ('' if it has no Symbol column)"""
+        return str(frame['Symbol'].iloc[0]) if 'Symbol' in frame.columns else ''
+    
+    def _uses_pool(self) -> bool:
+        """Whether frames are normalized in the process pool"""
+        return (process_pool.enabled and
+                type(self.data_source).standardize_dataframe is BaseDataSource.standardize_dataframe)
+    
+    def _put(self, target: queue.Queue, item, stop: threading.Event) -> bool:
+        """Block until there is room downstream, giving up once the pipeline stops"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _produce(self, frames: Iterable[pd.DataFrame], output: queue.Queue, stop: threading.Event):
+        """Fetch stage - drain the frame iterator"""
+        iterator = iter(frames)
+        try:
+            for frame in iterator:
+                if frame is None or frame.empty:
+                    continue
+                if not self._put(output, frame, stop):
+                    break
+        except Exception as e:
+            self._put(output, _StageError('fetch', e), stop)
+        finally:
+            # Stop outstanding requests if the pipeline ended early
+            if hasattr(iterator, 'close'):
+                iterator.close()
+            self._put(output, _END, stop)
+    
+    def _normalize_stage(self, source: queue.Queue, output: queue.Queue, stop: threading.Event):
+        """Normalize stage - standardize each frame (or hand it to the process pool)"""
+        use_pool = self._uses_pool()
+        while not stop.is_set():
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            if item is not _END and not isinstance(item, _StageError):
+                try:
+                    if use_pool:
+                        item = process_pool.submit_normalize(standardize_bars, item, self._frame_symbol(item))
+                    else:
+                        item = self.normalize(item)
+                except Exception as e:
+                    item = _StageError('normalize', e)
+            
+            if not self._put(output, item, stop) or item is _END:
+                return
@@ -0,0 +1,198 @@
+"""
+Vectorized resampling of stored bars into higher timeframes
+"""
+import logging
+from typing import List, Dict
+
+import numpy as np
+import pandas as pd
+
+from data_sources.base import BaseDataSource
+from storage.schema import BAR_COLUMNS, normalize_datetimes
+from utils.market_hours import market_hours
+from config.settings import TIMEFRAME_CONFIGS
+
+logger = logging.getLogger(__name__)
+
+# How each column of the source bars aggregates into a higher-timeframe bar
+RESAMPLE_AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum'
+}
+
+def _session_offsets():
+    """Session open and close as offsets from midnight"""
+    session_open = pd.Timedelta(hours=market_hours.market_open.hour, minutes=market_hours.market_open.minute)
+    session_close = pd.Timedelta(hours=market_hours.market_close.hour, minutes=market_hours.market_close.minute)
+    return session_open, session_close
+
+def bucket_starts(datetimes: pd.Series, timeframe: str) -> pd.Series:
+    """
+    Map bar timestamps to the start of the target-timeframe bar containing them
+    
+    Intraday buckets are anchored at the session open (9:15), so hourly bars
+    start at :15 like the exchange's own. Daily buckets start at midnight
+    and weekly buckets on Monday.
+    
+    Args:
+        datetimes: Timezone-aware bar timestamps (bar timezone)
+        timeframe: Target timeframe identifier
+    
+    Returns:
+        Series of bucket start timestamps
+    """
+    minutes = TIMEFRAME_CONFIGS[timeframe]['update_frequency_minutes']
+    day = datetimes.dt.normalize()
+    
+    if minutes >= 7 * 1440:
+        return day - pd.to_timedelta(day.dt.weekday, unit='D')
+    if minutes >= 1440:
+        return day
+    
+    session_open, _ = _session_offsets()
+    freq = pd.Timedelta(minutes=minutes)
+    return day + session_open + ((datetimes - day - session_open) // freq) * freq
+
+def resample_bars(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate lower-timeframe bars into `timeframe` bars
+    
+    Intraday targets only use bars inside the trading session; the last
+    bucket of a session is cut off at the close (15:15-15:30 for 1h).
+    
+    Args:
+        data: Bars with standard columns (any number of symbols)
+        timeframe: Target timeframe identifier
+    
+    Returns:
+        DataFrame with standard columns sorted by Symbol and Datetime
+    """
+    if data.empty:
+        return data
+    
+    data = data.sort_values(['Symbol', 'Datetime'], kind='stable')
+    datetimes = normalize_datetimes(data['Datetime'])
+    
+    if TIMEFRAME_CONFIGS[timeframe]['update_frequency_minutes'] < 1440:
+        session_open, session_close = _session_offsets()
+        time_of_day = datetimes - datetimes.dt.normalize()
+        in_session = ((time_of_day >= session_open) & (time_of_day < session_close)).to_numpy()
+        data = data[in_session]
+        datetimes = datetimes[in_session]
+    
+    buckets = data.assign(Datetime=bucket_starts(datetimes, timeframe))
+    resampled = buckets.groupby(['Symbol', 'Datetime'], sort=True, observed=True).agg(RESAMPLE_AGGREGATIONS)
+    return resampled.reset_index()[BAR_COLUMNS]
+
+class TimeframeResampler:
+    """
+    Derives timeframes marked with `resample_from` in TIMEFRAME_CONFIGS
+    from the stored bars of their source timeframe
+    """
+    
+    def __init__(self, storage_manager):
+        self.storage_manager = storage_manager
+    
+    def source_timeframe(self, timeframe: str) -> str:
+        """
+        Get the timeframe a derived timeframe is built from
+        
+        Raises:
+            ValueError: If the timeframe isn't configured for resampling
+        """
+        source = TIMEFRAME_CONFIGS.get(timeframe, {}).get('resample_from')
+        if not source:
+            raise ValueError(f"Timeframe {timeframe} has no resample_from source")
+        return source
+    
+    def derive(self, timeframe: str, symbols: List[str] = None) -> pd.DataFrame:
+        """
+        Build `timeframe` bars from stored source bars
+        
+        Only source bars from the latest stored derived bar onwards are read,
+        so the (possibly still forming) last bar is rebuilt and older ones
+        are left alone.
+        
+        Args:
+            timeframe: Derived timeframe identifier
+            symbols: Symbols to derive (None for every stored symbol)
+        
+        Returns:
+            DataFrame with derived bars
+        """
+        source = self.source_timeframe(timeframe)
+        marks = self.storage_manager.get_latest_data_times(timeframe)
+        
+        if symbols:
+            symbol_marks = [marks.get(symbol.replace('.NS', '')) for symbol in symbols]
+        else:
+            symbol_marks = list(marks.values()) or [None]
+        
+        # Any symbol without derived bars needs its whole source history
+        start = None if any(mark is None for mark in symbol_marks) else min(symbol_marks)
+        
+        data = self.storage_manager.load_data(source, symbol_filter=symbols, start_date=start)
+        derived = resample_bars(data, timeframe)
+        
+        logger.info(f"Derived {len(derived)} {timeframe} bars from {len(data)} {source} bars"
+                    + (f" since {start.isoformat()}" if start is not None else ""))
+        return derived
+    
+    def reconcile(self, timeframe: str, symbols: List[str], data_source: BaseDataSource) -> Dict:
+        """
+        Compare derived bars with the provider's own bars and store the provider's
+        
+        Args:
+            timeframe: Derived timeframe identifier
+            symbols: Symbols to reconcile
+            data_source: Provider to fetch reference bars from
+        
+        Returns:
+            Dictionary with provider, missing and mismatched bar counts
+        """
+        config = TIMEFRAME_CONFIGS[timeframe]
+        provider = data_source.get_multiple_stocks_data(
+            symbols=symbols,
+            period=config['period'],
+            interval=config['interval']
+        )
+        
+        stats = {'provider_bars': len(provider), 'missing': 0, 'mismatched': 0}
+        if provider.empty:
+            logger.warning(f"No provider data to reconcile {timeframe} against")
+            return stats
+        
+        provider = provider.assign(Datetime=normalize_datetimes(provider['Datetime']))
+        derived = self.storage_manager.load_data(
+            timeframe,
+            symbol_filter=symbols,
+            start_date=provider['Datetime'].min()
+        )
+        
+        if derived.empty:
+            stats['missing'] = len(provider)
+        else:
+            merged = provider.merge(
+                derived[BAR_COLUMNS].astype({'Symbol': str}),
+                on=['Symbol', 'Datetime'],
+                how='left',
+                suffixes=('', '_derived')
+            )
+            missing = merged['Close_derived'].isna().to_numpy()
+            differs = np.zeros(len(merged), dtype=bool)
+            for column in ['Open', 'High', 'Low', 'Close']:
+                differs |= ~np.isclose(merged[column], merged[f'{column}_derived'], rtol=1e-4)
+            differs |= ~np.isclose(merged['Volume'], merged['Volume_derived'], rtol=1e-2)
+            
+            stats['missing'] = int(missing.sum())
+            stats['mismatched'] = int((differs & ~missing).sum())
+        
+        logger.info(f"Reconciled {timeframe}: {stats['provider_bars']} provider bars, "
+                    f"{stats['missing']} missing and {stats['mismatched']} mismatched derived bars")
+        
+        # Provider bars are authoritative
+        self.storage_manager.save_data(provider, timeframe, append=True)
+        return stats
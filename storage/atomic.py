@@ -0,0 +1,99 @@
+"""
+Crash-safe file replacement helpers
+"""
+import os
+import stat
+import tempfile
+from typing import Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMP_SUFFIX = '.tmp'
+
+# Process umask, read once (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def fsync_path(path: str):
+    """Flush a file's contents to disk"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def fsync_directory(path: str):
+    """Flush a directory entry (makes a rename durable); a no-op on Windows"""
+    if os.name == 'nt':
+        return
+    fd = os.open(path or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _file_mode(path: str) -> int:
+    """Permission bits for a rewritten file: the existing file's, or the umask default for a new one"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def atomic_write(path: str, write_fn: Callable[[str], None], fsync: bool = True):
+    """
+    Write a file via a temp file in the same directory and an atomic rename
+    
+    Readers see either the old or the new file, never a partial one, even if
+    the process is killed mid-write.
+    
+    Args:
+        path: Destination path
+        write_fn: Callable writing the complete contents to the path it is given
+        fsync: Whether to flush the file and directory so the write survives power loss
+    """
+    directory = os.path.dirname(path) or '.'
+    mode = _file_mode(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix=TEMP_SUFFIX)
+    os.close(fd)
+    
+    try:
+        write_fn(temp_path)
+        # mkstemp creates the file owner-only; keep the permissions a plain write would have
+        os.chmod(temp_path, mode)
+        if fsync:
+            fsync_path(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    if fsync:
+        fsync_directory(directory)
+
+def remove_stale_temp_files(directory: str) -> int:
+    """
+    Remove temp files left behind by writes that were interrupted
+    
+    Args:
+        directory: Directory to scan (not recursive)
+    
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    if not os.path.isdir(directory):
+        return removed
+    
+    for filename in os.listdir(directory):
+        if filename.startswith('.') and filename.endswith(TEMP_SUFFIX):
+            try:
+                os.remove(os.path.join(directory, filename))
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove temp file {filename}: {str(e)}")
+    
+    if removed:
+        logger.info(f"Removed {removed} interrupted temp files from {directory}")
+    return removed
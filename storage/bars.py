@@ -0,0 +1,219 @@
+"""
+Columnar NumPy view of OHLCV bars with zero-copy pandas conversion
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+import logging
+
+from storage.schema import BAR_COLUMNS, BAR_TIMEZONE, PRICE_COLUMNS, compact_bars
+
+logger = logging.getLogger(__name__)
+
+def _is_compact(data: pd.DataFrame) -> bool:
+    """Whether a frame's bar columns already have the dtypes BarBlock shares"""
+    return (all(col in data.columns for col in BAR_COLUMNS)
+            and isinstance(data['Symbol'].dtype, pd.CategoricalDtype)
+            and isinstance(data['Datetime'].dtype, pd.DatetimeTZDtype)
+            and all(data[col].dtype in ('float32', 'float64') for col in PRICE_COLUMNS)
+            and data['Volume'].dtype == 'int64')
+
+class BarBlock:
+    """
+    OHLCV bars as typed NumPy arrays
+    
+    Columns:
+        symbols: Symbol names (object array); rows refer to them by id
+        symbol_ids: Smallest signed integer dtype holding every id
+        timestamps: int64 epoch nanoseconds (UTC)
+        open, high, low, close: float32 or float64 prices
+        volume: int64
+    
+    A frame with compact bar dtypes (see `compact_bars`) converts in both
+    directions without copying the column data: the symbol ids are the
+    categorical codes and the timestamps are the datetime64[ns] values.
+    """
+    
+    def __init__(self, symbols: np.ndarray, symbol_ids: np.ndarray, timestamps: np.ndarray,
+                 open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 volume: np.ndarray):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.symbol_ids = np.asarray(symbol_ids)
+        self.timestamps = np.asarray(timestamps, dtype='int64')
+        self.open = np.asarray(open)
+        self.high = np.asarray(high)
+        self.low = np.asarray(low)
+        self.close = np.asarray(close)
+        self.volume = np.asarray(volume, dtype='int64')
+        
+        lengths = {len(column) for column in self.to_numpy().values()}
+        if len(lengths) > 1:
+            raise ValueError(f"BarBlock columns differ in length: {sorted(lengths)}")
+    
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'BarBlock':
+        """
+        Build a block from a bar DataFrame
+        
+        Columns already in compact dtypes are shared with the frame, others
+        are converted first.
+        
+        Args:
+            data: DataFrame with standard bar columns
+        
+        Returns:
+            BarBlock over the frame's rows
+        """
+        if data.empty:
+            return cls.empty()
+        
+        if not _is_compact(data):
+            data = compact_bars(data)
+        symbol = data['Symbol'].array
+        timestamps = data['Datetime'].dt.tz_convert('UTC').dt.as_unit('ns').array
+        
+        return cls(
+            symbols=symbol.categories.to_numpy(dtype=object),
+            symbol_ids=symbol.codes,
+            timestamps=timestamps.asi8,
+            **{col.lower(): data[col].to_numpy() for col in PRICE_COLUMNS},
+            volume=data['Volume'].to_numpy()
+        )
+    
+    @classmethod
+    def empty(cls, price_dtype: str = 'float32') -> 'BarBlock':
+        """An empty block"""
+        prices = {col.lower(): np.empty(0, dtype=price_dtype) for col in PRICE_COLUMNS}
+        return cls(np.empty(0, dtype=object), np.empty(0, dtype='int8'),
+                   np.empty(0, dtype='int64'), volume=np.empty(0, dtype='int64'), **prices)
+    
+    def to_frame(self, timezone: Optional[str] = None) -> pd.DataFrame:
+        """
+        Convert to a bar DataFrame without copying the column data
+        
+        Args:
+            timezone: Timezone of the Datetime column (default: BAR_TIMEZONE)
+        
+        Returns:
+            DataFrame with the standard bar columns in compact dtypes
+        """
+        utc = pd.DatetimeIndex(self.timestamps.view('M8[ns]'), copy=False).tz_localize('UTC')
+        symbol = pd.Categorical.from_codes(self.symbol_ids, categories=pd.Index(self.symbols, dtype=str),
+                                           validate=False)
+        
+        return pd.DataFrame({
+            'Datetime': utc.tz_convert(timezone or BAR_TIMEZONE),
+            'Symbol': symbol,
+            'Open': self.open,
+            'High': self.high,
+            'Low': self.low,
+            'Close': self.close,
+            'Volume': self.volume
+        }, copy=False)
+    
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """
+        The per-row columns as a dictionary of arrays (views, not copies)
+        
+        Returns:
+            Dictionary of symbol_ids, timestamps, open, high, low, close and volume
+        """
+        return {
+            'symbol_ids': self.symbol_ids,
+            'timestamps': self.timestamps,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the per-row arrays"""
+        return sum(column.nbytes for column in self.to_numpy().values())
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def __repr__(self) -> str:
+        return f"BarBlock({len(self)} bars, {len(self.symbols)} symbols, {self.nbytes} bytes)"
+
+def _recode(block: BarBlock, symbols: pd.Index) -> np.ndarray:
+    """A block's symbol ids relative to another list of symbols"""
+    if np.array_equal(block.symbols, symbols.to_numpy(dtype=object)):
+        return block.symbol_ids
+    return symbols.get_indexer(block.symbols)[block.symbol_ids]
+
+def _strictly_sorted(symbol_ids: np.ndarray, timestamps: np.ndarray) -> bool:
+    """Whether rows are ordered by (symbol id, timestamp) with no repeated key"""
+    if len(symbol_ids) < 2:
+        return True
+    same_symbol = symbol_ids[1:] == symbol_ids[:-1]
+    return bool(np.all((symbol_ids[1:] > symbol_ids[:-1]) | (same_symbol & (timestamps[1:] > timestamps[:-1]))))
+
+def merge_sorted(stored: BarBlock, new: BarBlock) -> Optional[Tuple[BarBlock, int]]:
+    """
+    Merge new bars into stored bars sorted by (symbol, timestamp)
+    
+    Each new bar's position is found by binary search within its symbol's
+    run of stored bars. Bars with a stored key replace it, the others are
+    inserted, so apart from copying the columns once the cost depends on
+    the new bars, not on the stored history. Of repeated keys the new bar
+    wins, and within the batch the last one does.
+    
+    Args:
+        stored: Bars strictly sorted by (symbol, timestamp), symbols in sorted order
+        new: Bars to merge (any order)
+    
+    Returns:
+        (merged block, number of bars dropped as duplicates), or None if the
+        stored bars are not sorted and must be merged by a full sort
+    """
+    symbols = pd.Index(stored.symbols, dtype=str).union(pd.Index(new.symbols, dtype=str))
+    stored_ids = _recode(stored, symbols)
+    timestamps = stored.timestamps
+    if not _strictly_sorted(stored_ids, timestamps):
+        return None
+    
+    # Sort the batch by key, keeping the last of repeated keys (lexsort is stable)
+    new_ids = _recode(new, symbols)
+    order = np.lexsort((new.timestamps, new_ids))
+    new_ids, new_times = new_ids[order], new.timestamps[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (new_ids[1:] != new_ids[:-1]) | (new_times[1:] != new_times[:-1])
+    order, new_ids, new_times = order[last], new_ids[last], new_times[last]
+    
+    # Binary search each symbol's new bars within its stored run
+    positions = np.empty(len(order), dtype=np.intp)
+    run_ids, run_starts = np.unique(new_ids, return_index=True)
+    run_ends = np.append(run_starts[1:], len(order))
+    stored_starts = np.searchsorted(stored_ids, run_ids, side='left')
+    stored_ends = np.searchsorted(stored_ids, run_ids, side='right')
+    for start, end, lo, hi in zip(run_starts, run_ends, stored_starts, stored_ends):
+        positions[start:end] = lo + np.searchsorted(timestamps[lo:hi], new_times[start:end])
+    
+    matched = np.zeros(len(order), dtype=bool)
+    if len(timestamps):
+        at = np.minimum(positions, len(timestamps) - 1)
+        matched = (positions < len(timestamps)) & (stored_ids[at] == new_ids) & (timestamps[at] == new_times)
+    
+    # Stored rows being replaced move right by the number of bars inserted before them
+    insert_at = positions[~matched]
+    replace_at = positions[matched]
+    replace_at = replace_at + np.searchsorted(insert_at, replace_at, side='right')
+    
+    def merge_column(stored_values: np.ndarray, new_values: np.ndarray) -> np.ndarray:
+        new_values = new_values[order]
+        dtype = np.result_type(stored_values, new_values)
+        merged = np.insert(stored_values.astype(dtype, copy=False), insert_at, new_values[~matched])
+        merged[replace_at] = new_values[matched]
+        return merged
+    
+    columns = {name: merge_column(values, new.to_numpy()[name])
+               for name, values in stored.to_numpy().items() if name != 'symbol_ids'}
+    ids = np.insert(stored_ids.astype(np.result_type(stored_ids, new_ids), copy=False),
+                    insert_at, new_ids[~matched])
+    
+    merged = BarBlock(symbols=symbols.to_numpy(dtype=object), symbol_ids=ids, **columns)
+    return merged, len(stored) + len(new) - len(merged)
@@ -0,0 +1,234 @@
+"""
+In-memory LRU cache of stored bars, keyed by (timeframe, symbol)
+"""
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
+import logging
+
+from storage.schema import storage_symbol, filter_date_range, concat_bars
+from config.settings import BAR_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+class BarCache:
+    """
+    Thread-safe LRU cache of per-symbol bar DataFrames with a memory budget
+    
+    Entries are evicted least-recently-used first once the summed
+    DataFrame memory usage exceeds the budget. Every invalidation bumps
+    the timeframe's generation; a `put` from a load that started in an
+    older generation is dropped, so a load racing a save can't cache
+    bars the save has already replaced.
+    """
+    
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else BAR_CACHE_MAX_MB * 1024 * 1024
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._clears = 0   # Part of every timeframe's generation
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, timeframe: str, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        Get cached bars for a symbol (marks the entry as recently used)
+        
+        Returns:
+            Cached DataFrame or None on a miss
+        """
+        key = (timeframe, symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def generation(self, timeframe: str) -> int:
+        """Current generation of a timeframe (read it before loading from storage)"""
+        with self._lock:
+            return self._clears + self._generations.get(timeframe, 0)
+    
+    def put(self, timeframe: str, symbol: str, data: pd.DataFrame, generation: int = None):
+        """
+        Cache bars for a symbol, evicting old entries to stay within budget
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol: Stored symbol name
+            data: All stored bars of the symbol
+            generation: Generation the bars were loaded in; ignored if the
+                        timeframe has been invalidated since
+        """
+        size = int(data.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        
+        key = (timeframe, symbol)
+        with self._lock:
+            if generation is not None and generation != self._clears + self._generations.get(timeframe, 0):
+                return
+            
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            
+            self._entries[key] = (data, size)
+            self.current_bytes += size
+            
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+    
+    def invalidate(self, timeframe: str, symbols: List[str] = None):
+        """
+        Drop cached entries of a timeframe
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbols: Stored symbol names to drop (None drops the whole timeframe)
+        """
+        with self._lock:
+            self._generations[timeframe] = self._generations.get(timeframe, 0) + 1
+            
+            if symbols is None:
+                keys = [key for key in self._entries if key[0] == timeframe]
+            else:
+                keys = [(timeframe, symbol) for symbol in symbols]
+            
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.current_bytes -= entry[1]
+    
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self._clears += 1
+            self.current_bytes = 0
+    
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with hit/miss counters and memory usage
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+class CachedStorageManager:
+    """
+    Wraps a storage manager with a BarCache
+    
+    Loads are served per symbol from the cache and only missing symbols are
+    read from the underlying storage. Saves go to storage first and then
+    invalidate the affected entries (write-through), so the cache never
+    serves bars older than what is on disk. Everything else is delegated
+    to the wrapped manager.
+    """
+    
+    def __init__(self, storage_manager, max_bytes: int = None):
+        self.storage_manager = storage_manager
+        self.cache = BarCache(max_bytes)
+    
+    def __getattr__(self, name):
+        return getattr(self.storage_manager, name)
+    
+    def save_data(self, data: pd.DataFrame, timeframe: str, append: bool = False) -> bool:
+        """
+        Save through to storage and invalidate the saved symbols
+        
+        Args:
+            data: DataFrame to save
+            timeframe: Timeframe identifier
+            append: Whether to merge with existing data or replace the timeframe
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            return self.storage_manager.save_data(data, timeframe, append=append)
+        finally:
+            if append and not data.empty and 'Symbol' in data.columns:
+                self.cache.invalidate(timeframe, [str(symbol) for symbol in data['Symbol'].unique()])
+            else:
+                self.cache.invalidate(timeframe)
+    
+    def load_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Load data, reading only symbols missing from the cache
+        
+        The cache holds each symbol's full history. Missing symbols are
+        therefore read and cached in full even when dates are given, so a
+        later load of any range hits the cache, and the date filters
+        are applied to the returned frame.
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional list of symbols to load
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
+        
+        Returns:
+            DataFrame with loaded data sorted by Symbol and Datetime
+        """
+        try:
+            if symbol_filter:
+                symbols = [storage_symbol(symbol) for symbol in symbol_filter]
+            else:
+                symbols = sorted(self.storage_manager.get_latest_data_times(timeframe))
+            
+            frames = {}
+            missing = []
+            for symbol in symbols:
+                cached = self.cache.get(timeframe, symbol)
+                if cached is None:
+                    missing.append(symbol)
+                else:
+                    frames[symbol] = cached
+            
+            if missing:
+                # A save finishing during the read invalidates the generation, and the stale bars aren't cached
+                generation = self.cache.generation(timeframe)
+                loaded = self.storage_manager.load_data(timeframe, symbol_filter=missing)
+                if not loaded.empty:
+                    for symbol, symbol_data in loaded.groupby('Symbol', sort=False, observed=True):
+                        symbol_data = symbol_data.sort_values('Datetime').reset_index(drop=True)
+                        self.cache.put(timeframe, str(symbol), symbol_data, generation)
+                        frames[str(symbol)] = symbol_data
+            
+            parts = [frames[symbol] for symbol in sorted(frames)]
+            if not parts:
+                return pd.DataFrame()
+            
+            # concat copies, so callers can't mutate cached frames
+            data = concat_bars(parts)
+            return filter_date_range(data, start_date, end_date).reset_index(drop=True)
+            
+        except Exception as e:
+            logger.error(f"Error loading cached data for {timeframe}: {str(e)}")
+            return pd.DataFrame()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get bar cache statistics"""
+        return self.cache.get_stats()
@@ -1,105 +1,411 @@
 """
-Database storage for market data (placeholder for future SQL integration)
+Database storage for market data (embedded SQLite)
 """
+import os
+import re
+import sqlite3
+import threading
 import pandas as pd
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Dict, Iterator
 import logging
 
+from storage.schema import (
+    BAR_TIMEZONE, normalize_datetimes, storage_symbol, to_bar_timestamp, compact_bars, concat_bars
+)
+from config.settings import DATABASE_PATH, DATABASE_TABLE, CSV_CHUNK_SIZE
+
 logger = logging.getLogger(__name__)
 
+# Stored column -> standard DataFrame column
+COLUMN_MAPPING = {
+    'datetime': 'Datetime',
+    'symbol': 'Symbol',
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'volume': 'Volume'
+}
+
 class DatabaseManager:
     """
     Database manager for market data storage
-    This is a placeholder for future SQL database integration
+    
+    Bars live in one SQLite table in WAL mode keyed by
+    (symbol, timeframe, datetime), with timestamps stored as UTC epoch
+    seconds. Saves are bulk upserts in a single transaction and loads push
+    symbol and date filters down into SQL.
     """
     
-    def __init__(self, connection_string: str = None):
-        self.connection_string = connection_string
+    def __init__(self, connection_string: str = None, table_name: str = None):
+        self.connection_string = connection_string or DATABASE_PATH
+        self.table_name = table_name or DATABASE_TABLE
+        self.connection = None
         self.is_connected = False
-        logger.info("Database manager initialized (placeholder)")
+        
+        # sqlite3 connections aren't safe for concurrent use across scheduler threads
+        self._lock = threading.RLock()
+        
+        if self.connect():
+            self.create_tables()
     
     def connect(self) -> bool:
         """
         Connect to the database
         
-        TODO: Implement actual database connection
+        Returns:
+            True if connected, False otherwise
         """
-        logger.warning("Database connection not yet implemented")
-        return False
+        try:
+            directory = os.path.dirname(self.connection_string)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            
+            self.connection = sqlite3.connect(
+                self.connection_string,
+                check_same_thread=False,
+                isolation_level=None  # Transactions are managed explicitly
+            )
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('PRAGMA temp_store=MEMORY')
+            
+            self.is_connected = True
+            logger.info(f"Connected to database: {self.connection_string}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Database connection failed: {str(e)}")
+            self.is_connected = False
+            return False
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            self.is_connected = False
     
-    def save_data(self, data: pd.DataFrame, timeframe: str, table_name: str = None) -> bool:
+    def _table(self, table_name: str = None) -> str:
+        """Validate and return the table name to use"""
+        table = table_name or self.table_name
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', table):
+            raise ValueError(f"Invalid table name: {table}")
+        return table
+    
+    def create_tables(self, table_name: str = None) -> bool:
         """
-        Save DataFrame to database table
+        Create necessary database tables and indexes
+        
+        The primary key doubles as the covering index for per-symbol
+        lookups; a second index serves timeframe-wide date-range scans.
         
-        TODO: Implement database save operation
+        Returns:
+            True if successful, False otherwise
         """
-        logger.warning("Database save operation not yet implemented")
-        return False
+        try:
+            table = self._table(table_name)
+            with self._lock:
+                self.connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        symbol TEXT NOT NULL,
+                        timeframe TEXT NOT NULL,
+                        datetime INTEGER NOT NULL,
+                        open REAL,
+                        high REAL,
+                        low REAL,
+                        close REAL,
+                        volume INTEGER,
+                        PRIMARY KEY (symbol, timeframe, datetime)
+                    ) WITHOUT ROWID
+                """)
+                self.connection.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{table}_timeframe_datetime
+                    ON {table} (timeframe, datetime, symbol)
+                """)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error creating database tables: {str(e)}")
+            return False
     
-    def load_data(self, timeframe: str, symbol_filter: List[str] = None, 
+    def save_data(self, data: pd.DataFrame, timeframe: str, append: bool = True,
+                  table_name: str = None) -> bool:
+        """
+        Upsert DataFrame rows into the database in one transaction
+        
+        Args:
+            data: DataFrame to save
+            timeframe: Timeframe identifier
+            append: Whether to merge with existing rows or replace the timeframe
+            table_name: Optional table override
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.is_connected:
+            logger.error("Database is not connected")
+            return False
+        
+        try:
+            if data.empty:
+                logger.warning(f"No data to save for timeframe {timeframe}")
+                return False
+            
+            table = self._table(table_name)
+            if table != self.table_name:
+                self.create_tables(table)
+            
+            # Vectorized conversion to UTC epoch seconds
+            epoch = pd.Timestamp(0, tz='UTC')
+            seconds = (normalize_datetimes(data['Datetime']) - epoch) // pd.Timedelta(seconds=1)
+            
+            rows = list(zip(
+                data['Symbol'].astype(str).tolist(),
+                [timeframe] * len(data),
+                seconds.tolist(),
+                data['Open'].astype(float).tolist(),
+                data['High'].astype(float).tolist(),
+                data['Low'].astype(float).tolist(),
+                data['Close'].astype(float).tolist(),
+                data['Volume'].fillna(0).astype('int64').tolist()
+            ))
+            
+            with self._lock:
+                cursor = self.connection.cursor()
+                try:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    if not append:
+                        cursor.execute(f"DELETE FROM {table} WHERE timeframe = ?", (timeframe,))
+                    
+                    cursor.executemany(f"""
+                        INSERT INTO {table} (symbol, timeframe, datetime, open, high, low, close, volume)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (symbol, timeframe, datetime) DO UPDATE SET
+                            open = excluded.open,
+                            high = excluded.high,
+                            low = excluded.low,
+                            close = excluded.close,
+                            volume = excluded.volume
+                    """, rows)
+                    cursor.execute('COMMIT')
+                except Exception:
+                    cursor.execute('ROLLBACK')
+                    raise
+                finally:
+                    cursor.close()
+            
+            logger.info(f"Saved {len(rows)} records for {timeframe} to {table}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving data for {timeframe}: {str(e)}")
+            return False
+    
+    def load_data(self, timeframe: str, symbol_filter: List[str] = None,
                   start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """
-        Load data from database
+        Load data from database with filters applied in SQL
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional list of symbols to load
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
         
-        TODO: Implement database load operation
+        Returns:
+            DataFrame with loaded data sorted by Symbol and Datetime
         """
-        logger.warning("Database load operation not yet implemented")
-        return pd.DataFrame()
+        if not self.is_connected:
+            logger.error("Database is not connected")
+            return pd.DataFrame()
+        
+        try:
+            chunks = list(self.iter_data(timeframe, symbol_filter, start_date, end_date))
+            data = concat_bars(chunks)
+            
+            logger.info(f"Loaded {len(data)} records for {timeframe} from database")
+            return data
+            
+        except Exception as e:
+            logger.error(f"Error loading data for {timeframe}: {str(e)}")
+            return pd.DataFrame()
     
-    def create_tables(self) -> bool:
+    def iter_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None,
+                  chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream query results in chunks with filters applied in SQL
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional list of symbols to load
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
+            chunksize: Rows per chunk (default: CSV_CHUNK_SIZE)
+        
+        Yields:
+            DataFrames sorted by Symbol and Datetime
         """
-        Create necessary database tables
+        if not self.is_connected:
+            logger.error("Database is not connected")
+            return
+        
+        conditions = ['timeframe = ?']
+        params = [timeframe]
+        
+        if symbol_filter:
+            symbols = [storage_symbol(symbol) for symbol in symbol_filter]
+            conditions.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params.extend(symbols)
+        
+        if start_date:
+            conditions.append('datetime >= ?')
+            params.append(int(to_bar_timestamp(start_date).timestamp()))
+        
+        if end_date:
+            conditions.append('datetime <= ?')
+            params.append(int(to_bar_timestamp(end_date).timestamp()))
         
-        TODO: Implement table creation using schema.sql
+        query = f"""
+            SELECT datetime, symbol, open, high, low, close, volume
+            FROM {self._table()}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY symbol, datetime
         """
-        logger.warning("Database table creation not yet implemented")
-        return False
+        
+        # A dedicated cursor keeps other threads' statements from resetting this one
+        with self._lock:
+            cursor = self.connection.cursor()
+        try:
+            with self._lock:
+                cursor.execute(query, params)
+            
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunksize or CSV_CHUNK_SIZE)
+                if not rows:
+                    break
+                
+                data = pd.DataFrame(rows, columns=list(COLUMN_MAPPING.values()))
+                data['Datetime'] = pd.to_datetime(data['Datetime'], unit='s', utc=True).dt.tz_convert(BAR_TIMEZONE)
+                yield compact_bars(data)
+        finally:
+            cursor.close()
     
-    def get_latest_data_time(self, timeframe: str, symbol: str = None) -> Optional[str]:
+    def get_latest_data_time(self, timeframe: str, symbol: str = None) -> Optional[datetime]:
         """
-        Get latest data timestamp from database
+        Get latest data timestamp using an indexed MAX() query
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol: Optional symbol to check (if None, checks all symbols)
         
-        TODO: Implement database query
+        Returns:
+            Latest datetime or None if no data
         """
-        logger.warning("Database query not yet implemented")
-        return None
-
-# Example implementation structure for future database integration:
-"""
-When implementing SQL database:
-
-1. Use SQLAlchemy or similar ORM
-2. Integrate with your existing schema.sql
-3. Implement proper connection pooling
-4. Add transaction management
-5. Implement data validation before insert
-6. Add indexing for performance
-7. Implement proper error handling and retries
-
-Example connection setup:
-```python
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-class DatabaseManager:
-    def __init__(self, connection_string):
-        self.engine = create_engine(connection_string)
-        self.Session = sessionmaker(bind=self.engine)
+        if not self.is_connected:
+            return None
+        
+        try:
+            if symbol:
+                query = f"SELECT MAX(datetime) FROM {self._table()} WHERE symbol = ? AND timeframe = ?"
+                params = (storage_symbol(symbol), timeframe)
+            else:
+                query = f"SELECT MAX(datetime) FROM {self._table()} WHERE timeframe = ?"
+                params = (timeframe,)
+            
+            with self._lock:
+                result = self.connection.execute(query, params).fetchone()
+            
+            if not result or result[0] is None:
+                return None
+            return pd.Timestamp(result[0], unit='s', tz='UTC').tz_convert(BAR_TIMEZONE)
+            
+        except Exception as e:
+            logger.error(f"Error getting latest data time for {timeframe}: {str(e)}")
+            return None
+    
+    def get_latest_data_times(self, timeframe: str) -> Dict[str, datetime]:
+        """
+        Get latest data timestamp per symbol
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Dictionary of {symbol: latest datetime}
+        """
+        if not self.is_connected:
+            return {}
+        
+        try:
+            query = f"SELECT symbol, MAX(datetime) FROM {self._table()} WHERE timeframe = ? GROUP BY symbol"
+            with self._lock:
+                rows = self.connection.execute(query, (timeframe,)).fetchall()
+            
+            return {
+                symbol: pd.Timestamp(latest, unit='s', tz='UTC').tz_convert(BAR_TIMEZONE)
+                for symbol, latest in rows
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting latest data times for {timeframe}: {str(e)}")
+            return {}
     
-    def save_data(self, data: pd.DataFrame, timeframe: str):
+    def cleanup_old_files(self, days_to_keep: int = 30):
+        """
+        Database equivalent of backup cleanup - checkpoint the WAL
+        
+        Args:
+            days_to_keep: Unused (kept for interface compatibility)
+        """
+        if not self.is_connected:
+            return
+        
         try:
-            with self.Session() as session:
-                # Use pandas to_sql or SQLAlchemy models
-                data.to_sql(
-                    name=f'market_data_{timeframe}',
-                    con=self.engine,
-                    if_exists='append',
-                    index=False
-                )
-                session.commit()
-                return True
+            with self._lock:
+                self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                self.connection.execute('PRAGMA optimize')
         except Exception as e:
-            logger.error(f"Database error: {e}")
-            return False
-```
-""" 
\ No newline at end of file
+            logger.error(f"Error during database maintenance: {str(e)}")
+    
+    def get_data_summary(self) -> dict:
+        """
+        Get summary of stored data by timeframe
+        
+        Returns:
+            Dictionary with table information by timeframe
+        """
+        summary = {}
+        
+        if not self.is_connected:
+            return summary
+        
+        try:
+            file_size = os.path.getsize(self.connection_string) if os.path.exists(self.connection_string) else 0
+            file_modified = datetime.fromtimestamp(os.path.getmtime(self.connection_string)) if file_size else None
+            
+            query = f"""
+                SELECT timeframe, COUNT(*), COUNT(DISTINCT symbol)
+                FROM {self._table()}
+                GROUP BY timeframe
+            """
+            with self._lock:
+                rows = self.connection.execute(query).fetchall()
+            
+            for timeframe, records, symbols in rows:
+                summary[f"{self.table_name}[{timeframe}]"] = {
+                    'size_bytes': file_size,
+                    'size_mb': round(file_size / (1024 * 1024), 2),
+                    'modified': file_modified,
+                    'records': records,
+                    'symbols': symbols
+                }
+                
+        except Exception as e:
+            logger.error(f"Error getting data summary: {str(e)}")
+        
+        return summary
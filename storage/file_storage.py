@@ -4,21 +4,77 @@ File-based storage for market data (CSV files)
 import pandas as pd
 import os
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterator
 import logging
 
-from config.settings import DATA_STORAGE_PATH, CSV_FILE_PREFIX
+from storage.schema import (
+    BAR_COLUMNS, CSV_DTYPES, normalize_datetimes, storage_symbol, to_bar_timestamp, filter_date_range,
+    compact_bars, concat_bars, widen_prices
+)
+from storage.bars import BarBlock, merge_sorted
+from storage.metadata_index import MetadataIndex
+from storage.atomic import atomic_write, remove_stale_temp_files
+from storage.journal import WriteAheadJournal
+from storage.snapshots import SnapshotStore
+from storage.process_pool import process_pool, write_bars_csv
+from config.settings import (
+    DATA_STORAGE_PATH, CSV_FILE_PREFIX, CSV_CHUNK_SIZE, METADATA_INDEX_FILENAME,
+    FSYNC_WRITES, WRITE_JOURNAL_ENABLED, JOURNAL_DIRNAME, SNAPSHOTS_ENABLED, SNAPSHOT_DIRNAME
+)
 
 logger = logging.getLogger(__name__)
 
 class FileStorageManager:
     """
     Manages CSV file storage for market data
+    
+    Subclasses can change the on-disk format by overriding `file_extension`,
+    `_read_file`, `_iter_file` and `_serialize`, and the write layout by
+    overriding `_apply_batch`.
+    
+    Files are replaced atomically (temp file + rename), and every batch is
+    journaled before it is applied, so a crash mid-save leaves the previous
+    file intact and the batch is replayed by `replay_journal()`. Saved
+    batches are kept as daily incremental snapshots (see `load_snapshot`).
+    
+    The metadata index, journal and snapshots are named after the storage
+    type (`state_suffix`), so storage types sharing a base path never read
+    each other's state.
     """
     
+    file_extension = 'csv'
+    state_suffix = ''   # CSV keeps the unsuffixed names
+    
     def __init__(self, base_path: str = None):
         self.base_path = base_path or DATA_STORAGE_PATH
         self.ensure_directory_exists()
+        
+        # Per-(timeframe, symbol) first/last/rows/checksum, answered without reading bars
+        self.metadata = MetadataIndex(self.get_state_path(METADATA_INDEX_FILENAME))
+        
+        self.fsync = FSYNC_WRITES
+        self.journal = None
+        if WRITE_JOURNAL_ENABLED:
+            self.journal = WriteAheadJournal(self.get_state_path(JOURNAL_DIRNAME), fsync=self.fsync)
+        
+        self.snapshots = None
+        if SNAPSHOTS_ENABLED:
+            self.snapshots = SnapshotStore(self.get_state_path(SNAPSHOT_DIRNAME))
+    
+    def get_state_path(self, name: str) -> str:
+        """
+        Path of this storage type's copy of a state file or directory
+        
+        Args:
+            name: Shared name (e.g. '_metadata_index.json')
+        
+        Returns:
+            Path in the base directory, with `state_suffix` before the extension
+        """
+        if self.state_suffix:
+            root, extension = os.path.splitext(name)
+            name = f"{root}_{self.state_suffix}{extension}"
+        return os.path.join(self.base_path, name)
     
     def ensure_directory_exists(self):
         """Create data directory if it doesn't exist"""
@@ -39,9 +95,9 @@ class FileStorageManager:
         """
         if date_suffix:
             date_str = datetime.now().strftime("%Y%m%d")
-            filename = f"{CSV_FILE_PREFIX}_{timeframe}_{date_str}.csv"
+            filename = f"{CSV_FILE_PREFIX}_{timeframe}_{date_str}.{self.file_extension}"
         else:
-            filename = f"{CSV_FILE_PREFIX}_{timeframe}.csv"
+            filename = f"{CSV_FILE_PREFIX}_{timeframe}.{self.file_extension}"
         
         return os.path.join(self.base_path, filename)
     
@@ -62,27 +118,16 @@ class FileStorageManager:
                 logger.warning(f"No data to save for timeframe {timeframe}")
                 return False
             
-            filename = self.get_filename(timeframe, date_suffix=False)
-            
-            if append and os.path.exists(filename):
-                # Load existing data and merge
-                existing_data = self.load_data(timeframe)
-                if not existing_data.empty:
-                    # Combine and remove duplicates
-                    combined_data = pd.concat([existing_data, data], ignore_index=True)
-                    combined_data = self.remove_duplicates(combined_data)
-                    data = combined_data
-            
-            # Sort by datetime and symbol for better organization
-            if 'Datetime' in data.columns:
-                data = data.sort_values(['Symbol', 'Datetime']).reset_index(drop=True)
-            
-            data.to_csv(filename, index=False)
-            logger.info(f"Saved {len(data)} records to {filename}")
+            snapshot_append = self._ensure_snapshot_base(timeframe) if append else False
             
-            # Also save with date suffix for backup
-            backup_filename = self.get_filename(timeframe, date_suffix=True)
-            data.to_csv(backup_filename, index=False)
+            entry = self.journal.append(timeframe, data, append) if self.journal else None
+            try:
+                self._apply_batch(data, timeframe, append)
+                self._snapshot_batch(timeframe, data, snapshot_append, entry)
+            finally:
+                # The journal only covers crashes - a failed save is reported to the caller
+                if entry:
+                    self.journal.commit(entry)
             
             return True
             
@@ -90,13 +135,182 @@ class FileStorageManager:
             logger.error(f"Error saving data for {timeframe}: {str(e)}")
             return False
     
-    def load_data(self, timeframe: str, symbol_filter: List[str] = None) -> pd.DataFrame:
+    def _apply_batch(self, data: pd.DataFrame, timeframe: str, append: bool):
+        """
+        Merge a batch into the stored file and rewrite it atomically
+        
+        A CSV batch whose bars all sort after the last stored row (see
+        `_tail_rows`) is appended to the file in place, without reading the
+        stored bars. Any other append loads, merges and rewrites the whole
+        file, so its cost grows with the stored history.
+        
+        Args:
+            data: Non-empty DataFrame to save
+            timeframe: Timeframe identifier
+            append: Whether to merge with the existing file or overwrite it
+        """
+        filename = self.get_filename(timeframe, date_suffix=False)
+        
+        # Use one timezone-aware dtype so batches merge with stored data
+        if 'Datetime' in data.columns:
+            data = data.assign(Datetime=normalize_datetimes(data['Datetime']))
+        
+        if append and self.file_extension == 'csv' and os.path.exists(filename):
+            tail = self._tail_rows(data, timeframe, filename)
+            if tail is not None:
+                self._append_rows(tail, filename)
+                logger.info(f"Appended {len(tail)} records to {filename}")
+                self.metadata.apply_delta(timeframe, tail, source=self._metadata_source(timeframe))
+                return
+        
+        # Load existing data and merge
+        existing_data = self.load_data(timeframe) if append and os.path.exists(filename) else pd.DataFrame()
+        if not existing_data.empty:
+            data = self.merge_bars(existing_data, data)
+        
+        # Sort by datetime and symbol for better organization
+        elif 'Datetime' in data.columns:
+            data = data.sort_values(['Symbol', 'Datetime']).reset_index(drop=True)
+        
+        self._write_file(data, filename)
+        logger.info(f"Saved {len(data)} records to {filename}")
+        
+        # The written frame is the complete timeframe - rebuild its index entries
+        self.metadata.replace_timeframe(timeframe, data, self._metadata_source(timeframe))
+    
+    def _tail_rows(self, data: pd.DataFrame, timeframe: str, path: str) -> Optional[pd.DataFrame]:
+        """
+        Sort a batch for appending to a CSV file, if it belongs after the stored rows
+        
+        Stored files are sorted by Symbol and Datetime, so a batch can be
+        appended when its first bar sorts after the file's last row and no
+        symbol gets a bar at or before its stored last bar.
+        
+        Args:
+            data: Batch with normalized datetimes
+            timeframe: Timeframe identifier
+            path: Stored CSV file
+        
+        Returns:
+            The sorted, de-duplicated batch, or None if it has to be merged
+        """
+        with open(path, 'r') as f:
+            header = f.readline().rstrip('\r\n').split(',')
+        if header != list(data.columns) or 'Symbol' not in header or 'Datetime' not in header:
+            return None
+        
+        fields = self._read_last_line(path)
+        if not fields or len(fields) != len(header):
+            return None
+        try:
+            last_key = (fields[header.index('Symbol')], to_bar_timestamp(fields[header.index('Datetime')]))
+        except ValueError:
+            return None
+        
+        data = data.assign(Symbol=data['Symbol'].astype(str))
+        data = self.remove_duplicates(data.sort_values(['Symbol', 'Datetime'], kind='stable'))
+        first = data.iloc[0]
+        if (first['Symbol'], first['Datetime']) <= last_key:
+            return None
+        
+        # The index also covers files that were edited out of order
+        self._ensure_metadata(timeframe)
+        stored_last = self.metadata.get_latest_times(timeframe)
+        batch_first = data.groupby('Symbol', sort=False)['Datetime'].min()
+        if any(time <= stored_last[symbol] for symbol, time in batch_first.items() if symbol in stored_last):
+            return None
+        
+        return data.reset_index(drop=True)
+    
+    def _append_rows(self, data: pd.DataFrame, path: str):
+        """
+        Append rows to a CSV file in place
+        
+        Appends can't be made atomic with a rename; a crash mid-append leaves
+        a partial last line, which `_read_last_line` trims before the
+        journaled batch is replayed.
+        """
+        with open(path, 'a', newline='') as f:
+            widen_prices(data).to_csv(f, header=False, index=False)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _read_last_line(self, path: str) -> Optional[List[str]]:
+        """
+        Read the fields of the last row of a CSV file without parsing the file
+        
+        A partial last line left by an interrupted append is truncated away.
+        
+        Args:
+            path: CSV file path
+        
+        Returns:
+            Comma-separated fields of the last line, or None if it can't be read
+        """
+        try:
+            with open(path, 'rb+') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - 4096))
+                tail = f.read()
+                
+                if tail and not tail.endswith(b'\n'):
+                    tail = tail[:tail.rfind(b'\n') + 1]
+                    f.truncate(max(0, size - 4096) + len(tail))
+                    logger.warning(f"Truncated partial row at the end of {path}")
+            
+            lines = tail.decode('utf-8').strip().splitlines()
+            return lines[-1].split(',') if lines else None
+            
+        except (OSError, UnicodeDecodeError):
+            return None
+    
+    def merge_bars(self, existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merge a batch over stored bars
+        
+        Stored bars are kept sorted by Symbol and Datetime, so new bars are
+        placed by binary search (`merge_sorted`) instead of re-sorting the
+        whole history. Unsorted or non-standard data falls back to concat,
+        drop_duplicates and sort, sharded across the process pool when large.
+        
+        Args:
+            existing: Stored bars
+            new: Bars being saved (win over stored bars with the same Symbol/Datetime)
+        
+        Returns:
+            Merged DataFrame sorted by Symbol and Datetime
+        """
+        if set(existing.columns) == set(new.columns) == set(BAR_COLUMNS):
+            merged = merge_sorted(BarBlock.from_frame(existing), BarBlock.from_frame(new))
+            if merged is not None:
+                block, removed = merged
+                if removed:
+                    logger.info(f"Removed {removed} duplicate records")
+                return block.to_frame()
+        
+        if process_pool.should_use(len(existing) + len(new)) and set(new.columns) == set(BAR_COLUMNS):
+            return process_pool.merge_bars(existing, new)
+        
+        # Combine and remove duplicates
+        combined_data = concat_bars([existing, new])
+        combined_data = self.remove_duplicates(combined_data)
+        
+        if 'Datetime' in combined_data.columns:
+            combined_data = combined_data.sort_values(['Symbol', 'Datetime']).reset_index(drop=True)
+        return combined_data
+    
+    def load_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """
         Load DataFrame from CSV file
         
         Args:
             timeframe: Timeframe identifier
             symbol_filter: Optional list of symbols to filter
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
         
         Returns:
             DataFrame with loaded data
@@ -108,15 +322,12 @@ class FileStorageManager:
                 logger.warning(f"File not found: {filename}")
                 return pd.DataFrame()
             
-            data = pd.read_csv(filename)
-            
-            # Convert datetime column
-            if 'Datetime' in data.columns:
-                data['Datetime'] = pd.to_datetime(data['Datetime'])
-            
-            # Apply symbol filter if provided
-            if symbol_filter and 'Symbol' in data.columns:
-                data = data[data['Symbol'].isin(symbol_filter)]
+            if symbol_filter or start_date or end_date:
+                # Filter chunk by chunk so only matching rows are ever held together
+                chunks = list(self.iter_data(timeframe, symbol_filter, start_date, end_date))
+                data = concat_bars(chunks)
+            else:
+                data = compact_bars(self._read_file(filename))
             
             logger.info(f"Loaded {len(data)} records from {filename}")
             return data
@@ -125,6 +336,240 @@ class FileStorageManager:
             logger.error(f"Error loading data for {timeframe}: {str(e)}")
             return pd.DataFrame()
     
+    def iter_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None,
+                  chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream stored data in chunks with symbol and date predicates applied per chunk
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional list of symbols to keep
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
+            chunksize: Rows per chunk read from disk (default: CSV_CHUNK_SIZE)
+        
+        Yields:
+            Non-empty DataFrames of matching rows, in file order
+        """
+        filename = self.get_filename(timeframe, date_suffix=False)
+        
+        if not os.path.exists(filename):
+            logger.warning(f"File not found: {filename}")
+            return
+        
+        yield from self._iter_filtered(filename, symbol_filter, start_date, end_date, chunksize)
+    
+    def _iter_filtered(self, path: str, symbol_filter: List[str] = None, start_date=None,
+                       end_date=None, chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream one file with symbol and date predicates applied per chunk
+        """
+        if symbol_filter:
+            symbol_filter = [storage_symbol(symbol) for symbol in symbol_filter]
+        
+        for chunk in self._iter_file(path, chunksize or CSV_CHUNK_SIZE, symbol_filter):
+            chunk = filter_date_range(chunk, start_date, end_date)
+            if not chunk.empty:
+                yield chunk.reset_index(drop=True)
+    
+    def _read_file(self, path: str, symbol_filter: List[str] = None) -> pd.DataFrame:
+        """
+        Read a data file into a DataFrame
+        
+        Args:
+            path: File path
+            symbol_filter: Optional symbols to read (formats that can't push
+                           the filter down return all rows)
+        
+        Returns:
+            DataFrame with parsed Datetime column
+        """
+        data = pd.read_csv(path)
+        
+        # Convert datetime column
+        if 'Datetime' in data.columns:
+            data['Datetime'] = normalize_datetimes(data['Datetime'])
+        
+        return data
+    
+    def _iter_file(self, path: str, chunksize: int,
+                   symbol_filter: List[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read a data file in chunks with explicit dtypes
+        
+        The symbol predicate is applied before timestamps are parsed, so
+        non-matching rows cost only the text scan.
+        
+        Args:
+            path: File path
+            chunksize: Rows per chunk
+            symbol_filter: Optional stored symbol names to keep
+        
+        Yields:
+            DataFrames with parsed Datetime column and compact bar dtypes
+        """
+        reader = pd.read_csv(
+            path,
+            chunksize=chunksize,
+            usecols=lambda column: column in BAR_COLUMNS,
+            dtype=CSV_DTYPES
+        )
+        
+        with reader:
+            for chunk in reader:
+                if symbol_filter and 'Symbol' in chunk.columns:
+                    chunk = chunk[chunk['Symbol'].isin(symbol_filter)]
+                    if chunk.empty:
+                        continue
+                
+                if 'Datetime' in chunk.columns:
+                    chunk['Datetime'] = normalize_datetimes(chunk['Datetime'])
+                
+                yield compact_bars(chunk)
+    
+    def _write_file(self, data: pd.DataFrame, path: str):
+        """
+        Atomically replace a data file with a DataFrame
+        
+        Args:
+            data: DataFrame to write
+            path: File path
+        """
+        atomic_write(path, lambda temp_path: self._serialize(data, temp_path), fsync=self.fsync)
+    
+    def _serialize(self, data: pd.DataFrame, path: str):
+        """
+        Write a DataFrame in this manager's file format
+        
+        Args:
+            data: DataFrame to write
+            path: File path
+        """
+        write_bars_csv(data, path)
+    
+    def _ensure_snapshot_base(self, timeframe: str) -> bool:
+        """
+        Make sure a timeframe's snapshots start from a full base before an append
+        
+        Data stored before snapshots were kept is recorded once as the base.
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            True if the batch should be snapshotted as an append, False if
+            nothing is stored yet and the batch itself is the base
+        """
+        if self.snapshots is None or self.snapshots.has_base(timeframe):
+            return True
+        
+        existing = self.load_data(timeframe)
+        if existing.empty:
+            return False
+        
+        self.snapshots.record(timeframe, existing, append=False)
+        return True
+    
+    def _snapshot_batch(self, timeframe: str, data: pd.DataFrame, append: bool, entry=None):
+        """
+        Keep an applied batch in today's snapshot
+        
+        A journal entry is moved into the snapshot instead of being written again.
+        Failures are logged - the batch itself is already saved.
+        
+        Args:
+            timeframe: Timeframe identifier
+            data: Applied batch
+            append: Whether the batch is merged into the previous state
+            entry: Optional journal entry holding the batch
+        """
+        if self.snapshots is None:
+            return
+        
+        try:
+            if entry:
+                self.snapshots.adopt(timeframe, entry.path, append, entry.batch_id)
+            else:
+                self.snapshots.record(timeframe, data, append)
+        except Exception as e:
+            logger.warning(f"Could not snapshot {timeframe} batch: {str(e)}")
+    
+    def list_snapshots(self, timeframe: str) -> List[str]:
+        """
+        List the days whose end-of-day state can be restored
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Sorted list of YYYYMMDD day keys
+        """
+        return self.snapshots.list_days(timeframe) if self.snapshots else []
+    
+    def load_snapshot(self, timeframe: str, day) -> pd.DataFrame:
+        """
+        Rebuild a timeframe's data as it was stored at the end of a day
+        
+        Args:
+            timeframe: Timeframe identifier
+            day: Day to restore (date, 'YYYY-MM-DD' or 'YYYYMMDD')
+        
+        Returns:
+            DataFrame with the restored bars (empty if none were saved by then)
+        """
+        try:
+            if self.snapshots is None:
+                logger.warning("Snapshots are disabled")
+                return pd.DataFrame()
+            
+            data = self.snapshots.load(timeframe, day)
+            logger.info(f"Restored {len(data)} {timeframe} records as of {day}")
+            return data
+            
+        except Exception as e:
+            logger.error(f"Error loading {timeframe} snapshot for {day}: {str(e)}")
+            return pd.DataFrame()
+    
+    def replay_journal(self) -> int:
+        """
+        Apply batches whose save was interrupted, oldest first
+        
+        Should be called once at startup, before the data is read. Batches
+        that can't be applied are set aside in the journal directory.
+        
+        Returns:
+            Number of batches replayed
+        """
+        if self.journal is None:
+            return 0
+        
+        remove_stale_temp_files(self.base_path)
+        
+        replayed = 0
+        timeframes = set()
+        for entry in self.journal.pending():
+            try:
+                data = self.journal.load(entry)
+                snapshot_append = self._ensure_snapshot_base(entry.timeframe) if entry.append else False
+                self._apply_batch(data, entry.timeframe, entry.append)
+                self._snapshot_batch(entry.timeframe, data, snapshot_append, entry)
+                self.journal.commit(entry)
+                timeframes.add(entry.timeframe)
+                replayed += 1
+            except Exception as e:
+                logger.error(f"Error replaying journal batch {entry.batch_id} for {entry.timeframe}: {str(e)}")
+                self.journal.reject(entry)
+        
+        # The interrupted save may have stopped between writing bars and indexing them
+        for timeframe in timeframes:
+            self.metadata.drop_timeframe(timeframe)
+            self._ensure_metadata(timeframe)
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} journaled batches ({', '.join(sorted(timeframes))})")
+        return replayed
+    
     def remove_duplicates(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Remove duplicate records based on Symbol and Datetime
@@ -152,7 +597,7 @@ class FileStorageManager:
     
     def get_latest_data_time(self, timeframe: str, symbol: str = None) -> Optional[datetime]:
         """
-        Get the latest data timestamp for a timeframe/symbol
+        Get the latest data timestamp for a timeframe/symbol from the metadata index
         
         Args:
             timeframe: Timeframe identifier
@@ -162,42 +607,97 @@ class FileStorageManager:
             Latest datetime or None if no data
         """
         try:
-            data = self.load_data(timeframe)
-            if data.empty:
-                return None
-            
-            if symbol and 'Symbol' in data.columns:
-                symbol_data = data[data['Symbol'] == symbol.replace('.NS', '')]
-                if symbol_data.empty:
-                    return None
-                data = symbol_data
-            
-            if 'Datetime' in data.columns:
-                return data['Datetime'].max()
-            
-            return None
+            marks = self.get_latest_data_times(timeframe)
+            if symbol:
+                return marks.get(storage_symbol(symbol))
+            return max(marks.values()) if marks else None
             
         except Exception as e:
             logger.error(f"Error getting latest data time for {timeframe}: {str(e)}")
             return None
     
+    def get_latest_data_times(self, timeframe: str) -> Dict[str, datetime]:
+        """
+        Get the latest data timestamp for every symbol of a timeframe
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Dictionary of {symbol: latest datetime}
+        """
+        try:
+            self._ensure_metadata(timeframe)
+            return self.metadata.get_latest_times(timeframe)
+        except Exception as e:
+            logger.error(f"Error getting latest data times for {timeframe}: {str(e)}")
+            return {}
+    
+    def get_symbol_metadata(self, timeframe: str) -> Dict[str, dict]:
+        """
+        Get index entries (first, last, rows, checksum) for every symbol of a timeframe
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Dictionary of {symbol: entry}
+        """
+        self._ensure_metadata(timeframe)
+        return self.metadata.get_entries(timeframe)
+    
+    def _metadata_source(self, timeframe: str) -> Optional[dict]:
+        """
+        Signature of the stored file, used to detect changes made outside this manager
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Dictionary with file size and modification time
+        """
+        filename = self.get_filename(timeframe, date_suffix=False)
+        if not os.path.exists(filename):
+            return {'size': 0, 'mtime_ns': 0}
+        
+        stats = os.stat(filename)
+        return {'size': stats.st_size, 'mtime_ns': stats.st_mtime_ns}
+    
+    def _ensure_metadata(self, timeframe: str):
+        """
+        Build a timeframe's index entries from the stored data if missing or stale
+        
+        Args:
+            timeframe: Timeframe identifier
+        """
+        source = self._metadata_source(timeframe)
+        if self.metadata.has_timeframe(timeframe, source):
+            return
+        
+        logger.info(f"Building metadata index for {timeframe}")
+        self.metadata.replace_timeframe(timeframe, self.load_data(timeframe), source)
+    
     def cleanup_old_files(self, days_to_keep: int = 30):
         """
-        Clean up old backup files (with date suffix)
+        Clean up old backup files (with date suffix) and compact old snapshots
         
         Args:
-            days_to_keep: Number of days of backup files to keep
+            days_to_keep: Number of days of backup files and snapshots to keep
         """
         try:
             cutoff_date = datetime.now() - timedelta(days=days_to_keep)
             
+            if self.snapshots:
+                for timeframe in self.snapshots.list_timeframes():
+                    self.snapshots.compact(timeframe, cutoff_date)
+            
             for filename in os.listdir(self.base_path):
                 if filename.startswith(CSV_FILE_PREFIX) and '_' in filename:
                     try:
                         # Extract date from filename
                         parts = filename.split('_')
                         if len(parts) >= 3:
-                            date_part = parts[-1].replace('.csv', '')
+                            date_part = os.path.splitext(parts[-1])[0]
                             file_date = datetime.strptime(date_part, '%Y%m%d')
                             
                             if file_date < cutoff_date:
@@ -222,7 +722,7 @@ class FileStorageManager:
         
         try:
             for filename in os.listdir(self.base_path):
-                if filename.startswith(CSV_FILE_PREFIX) and filename.endswith('.csv'):
+                if filename.startswith(CSV_FILE_PREFIX) and filename.endswith(f'.{self.file_extension}'):
                     file_path = os.path.join(self.base_path, filename)
                     
                     # Get file info
@@ -230,11 +730,17 @@ class FileStorageManager:
                     file_size = file_stats.st_size
                     file_modified = datetime.fromtimestamp(file_stats.st_mtime)
                     
-                    # Get data info
+                    # Get data info (main files from the metadata index)
+                    stem = os.path.splitext(filename)[0][len(CSV_FILE_PREFIX) + 1:]
                     try:
-                        data = pd.read_csv(file_path)
-                        record_count = len(data)
-                        symbols = data['Symbol'].nunique() if 'Symbol' in data.columns else 0
+                        if filename == os.path.basename(self.get_filename(stem, date_suffix=False)):
+                            entries = self.get_symbol_metadata(stem)
+                            record_count = sum(entry['rows'] for entry in entries.values())
+                            symbols = len(entries)
+                        else:
+                            data = self._read_file(file_path)
+                            record_count = len(data)
+                            symbols = data['Symbol'].nunique() if 'Symbol' in data.columns else 0
                     except:
                         record_count = 0
                         symbols = 0
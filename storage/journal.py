@@ -0,0 +1,130 @@
+"""
+Write-ahead journal of pending bar batches for file-based storage
+"""
+import os
+import threading
+import time
+import pandas as pd
+from typing import List, NamedTuple
+import logging
+
+from storage.atomic import atomic_write, fsync_directory, remove_stale_temp_files
+from storage.schema import normalize_datetimes
+from storage.process_pool import write_bars_csv
+
+logger = logging.getLogger(__name__)
+
+class JournalEntry(NamedTuple):
+    """A journaled batch waiting to be applied"""
+    batch_id: str
+    timeframe: str
+    append: bool
+    path: str
+
+class WriteAheadJournal:
+    """
+    Append-only directory of bar batches that haven't reached the data files yet
+    
+    A batch is durably written here before the data files are touched and
+    removed once they have been updated. Batches still present at startup
+    belong to saves that were interrupted and are replayed in order.
+    Entries are small (just the new bars), so durability doesn't depend on
+    flushing the whole rewritten dataset.
+    """
+    
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._last_sequence = 0
+        
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _next_sequence(self) -> int:
+        """Monotonic, time-ordered sequence number"""
+        with self._lock:
+            self._last_sequence = max(self._last_sequence + 1, time.time_ns())
+            return self._last_sequence
+    
+    def append(self, timeframe: str, data: pd.DataFrame, append: bool) -> JournalEntry:
+        """
+        Durably record a batch before it is applied
+        
+        Args:
+            timeframe: Timeframe identifier
+            data: Bars being saved
+            append: Whether the save merges or replaces the timeframe
+        
+        Returns:
+            JournalEntry to pass to commit() once the batch is applied
+        """
+        mode = 'append' if append else 'replace'
+        batch_id = f"{self._next_sequence():020d}"
+        path = os.path.join(self.directory, f"{batch_id}_{timeframe}_{mode}.csv")
+        
+        atomic_write(path, lambda temp_path: write_bars_csv(data, temp_path), fsync=self.fsync)
+        return JournalEntry(batch_id, timeframe, append, path)
+    
+    def commit(self, entry: JournalEntry):
+        """
+        Mark a batch as applied by removing it from the journal
+        
+        Args:
+            entry: Entry returned by append()
+        """
+        try:
+            os.remove(entry.path)
+            if self.fsync:
+                fsync_directory(self.directory)
+        except FileNotFoundError:
+            pass
+    
+    def reject(self, entry: JournalEntry):
+        """
+        Set aside a batch that couldn't be applied so it isn't replayed again
+        
+        Args:
+            entry: Journal entry (kept on disk with a .rejected suffix)
+        """
+        try:
+            os.replace(entry.path, f"{entry.path}.rejected")
+        except FileNotFoundError:
+            pass
+    
+    def pending(self) -> List[JournalEntry]:
+        """
+        List batches that were journaled but never committed, oldest first
+        
+        Returns:
+            List of JournalEntry
+        """
+        remove_stale_temp_files(self.directory)
+        
+        entries = []
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith('.csv'):
+                continue
+            try:
+                batch_id, rest = filename[:-len('.csv')].split('_', 1)
+                timeframe, mode = rest.rsplit('_', 1)
+            except ValueError:
+                logger.warning(f"Ignoring unrecognized journal file: {filename}")
+                continue
+            entries.append(JournalEntry(batch_id, timeframe, mode == 'append',
+                                        os.path.join(self.directory, filename)))
+        return entries
+    
+    def load(self, entry: JournalEntry) -> pd.DataFrame:
+        """
+        Read a journaled batch
+        
+        Args:
+            entry: Journal entry
+        
+        Returns:
+            DataFrame with parsed Datetime column
+        """
+        data = pd.read_csv(entry.path)
+        if 'Datetime' in data.columns:
+            data['Datetime'] = normalize_datetimes(data['Datetime'])
+        return data
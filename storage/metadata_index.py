@@ -0,0 +1,215 @@
+"""
+Persistent per-(timeframe, symbol) metadata index for stored bars
+"""
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Optional, Dict
+import logging
+
+from storage.atomic import atomic_write
+from storage.schema import BAR_COLUMNS, PRICE_COLUMNS, normalize_datetimes, to_bar_timestamp
+
+logger = logging.getLogger(__name__)
+
+CHECKSUM_MODULUS = 2 ** 64
+
+def row_hashes(data: pd.DataFrame) -> np.ndarray:
+    """
+    Hash each bar row (uint64), independent of row order and column dtypes
+    
+    Prices are hashed as float64 and Volume as int64, so compact (float32)
+    and widened copies of the same bars get the same checksum.
+    
+    Args:
+        data: DataFrame with standard bar columns
+    
+    Returns:
+        Array of uint64 row hashes
+    """
+    columns = [col for col in BAR_COLUMNS if col in data.columns]
+    canonical = {col: 'float64' for col in PRICE_COLUMNS if col in columns and data[col].dtype != 'float64'}
+    if 'Volume' in columns and data['Volume'].dtype != 'int64':
+        canonical['Volume'] = 'int64'
+    
+    rows = data[columns]
+    if canonical:
+        rows = rows.fillna({'Volume': 0}).astype(canonical) if 'Volume' in canonical else rows.astype(canonical)
+    return pd.util.hash_pandas_object(rows, index=False).to_numpy()
+
+def summarize_symbols(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute index entries for every symbol in a DataFrame
+    
+    The checksum is the sum of the row hashes modulo 2**64, so it can be
+    updated from a saved batch without re-reading the stored rows.
+    
+    Args:
+        data: DataFrame with Symbol and Datetime columns
+    
+    Returns:
+        DataFrame indexed by Symbol with first, last, rows and checksum columns
+    """
+    if data.empty:
+        return pd.DataFrame(columns=['first', 'last', 'rows', 'checksum'])
+    
+    datetimes = normalize_datetimes(data['Datetime'])
+    symbols = data['Symbol'].astype(str).to_numpy()
+    hashes = pd.Series(row_hashes(data), index=data.index)
+    
+    # .array keeps the datetimes typed (to_numpy() would box every value as a Timestamp)
+    frame = pd.DataFrame({'Datetime': datetimes.array, 'hash': hashes.to_numpy()})
+    grouped = frame.groupby(symbols, sort=True)
+    
+    # uint64 sums wrap around, which is exactly the modular checksum
+    return pd.DataFrame({
+        'first': grouped['Datetime'].min(),
+        'last': grouped['Datetime'].max(),
+        'rows': grouped.size(),
+        'checksum': grouped['hash'].sum()
+    })
+
+class MetadataIndex:
+    """
+    JSON index of {timeframe: {symbol: {first, last, rows, checksum}}}
+    
+    Storage managers update it on every save and answer freshness and
+    summary queries from it without touching the bar files. Every change
+    is written to a temp file and atomically renamed over the index.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = self._load()
+    
+    def _load(self) -> dict:
+        """Load the index from disk (an unreadable index is rebuilt lazily)"""
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable metadata index {self.path}: {str(e)}")
+            return {}
+    
+    def _save(self):
+        """Atomically persist the index (caller holds the lock)"""
+        def write(temp_path):
+            with open(temp_path, 'w') as f:
+                json.dump(self._index, f)
+        
+        atomic_write(self.path, write)
+    
+    def has_timeframe(self, timeframe: str, source: Optional[dict] = None) -> bool:
+        """
+        Check whether a timeframe is indexed and still matches its source file
+        
+        Args:
+            timeframe: Timeframe identifier
+            source: Optional file signature; a mismatch marks the entry stale
+        
+        Returns:
+            True if the timeframe's entries can be trusted
+        """
+        with self._lock:
+            entry = self._index.get(timeframe)
+            if entry is None:
+                return False
+            return source is None or entry.get('source') == source
+    
+    def get_entries(self, timeframe: str) -> Dict[str, dict]:
+        """
+        Get the index entries of a timeframe
+        
+        Returns:
+            Dictionary of {symbol: {'first', 'last', 'rows', 'checksum'}}
+        """
+        with self._lock:
+            symbols = self._index.get(timeframe, {}).get('symbols', {})
+            return {symbol: dict(entry) for symbol, entry in symbols.items()}
+    
+    def get_latest_times(self, timeframe: str) -> Dict[str, datetime]:
+        """Latest stored timestamp per symbol"""
+        return {
+            symbol: to_bar_timestamp(entry['last'])
+            for symbol, entry in self.get_entries(timeframe).items()
+        }
+    
+    def replace_timeframe(self, timeframe: str, data: pd.DataFrame, source: Optional[dict] = None):
+        """
+        Rebuild a timeframe's entries from its complete stored data
+        
+        Args:
+            timeframe: Timeframe identifier
+            data: All stored rows of the timeframe
+            source: Optional signature of the file the rows were read from
+        """
+        symbols = {}
+        for symbol, stats in summarize_symbols(data).iterrows():
+            symbols[symbol] = self._entry(stats['first'], stats['last'], stats['rows'], stats['checksum'])
+        
+        with self._lock:
+            self._index[timeframe] = {'source': source, 'symbols': symbols}
+            self._save()
+    
+    def apply_delta(self, timeframe: str, added: pd.DataFrame, removed: pd.DataFrame = None,
+                    source: Optional[dict] = None):
+        """
+        Update entries from rows added to (and replaced in) storage
+        
+        Merges never drop a stored timestamp, so first/last only widen.
+        
+        Args:
+            timeframe: Timeframe identifier
+            added: Rows written to storage
+            removed: Previously stored rows that were rewritten
+            source: Optional new file signature
+        """
+        added_stats = summarize_symbols(added)
+        removed_stats = summarize_symbols(removed) if removed is not None else None
+        
+        with self._lock:
+            timeframe_entry = self._index.setdefault(timeframe, {'source': None, 'symbols': {}})
+            symbols = timeframe_entry['symbols']
+            
+            for symbol, stats in added_stats.iterrows():
+                rows = int(stats['rows'])
+                checksum = int(stats['checksum'])
+                first, last = stats['first'], stats['last']
+                
+                if removed_stats is not None and symbol in removed_stats.index:
+                    rows -= int(removed_stats.at[symbol, 'rows'])
+                    checksum -= int(removed_stats.at[symbol, 'checksum'])
+                
+                current = symbols.get(symbol)
+                if current is not None:
+                    rows += current['rows']
+                    checksum += int(current['checksum'], 16)
+                    first = min(first, to_bar_timestamp(current['first']))
+                    last = max(last, to_bar_timestamp(current['last']))
+                
+                symbols[symbol] = self._entry(first, last, rows, checksum)
+            
+            timeframe_entry['source'] = source
+            self._save()
+    
+    def drop_timeframe(self, timeframe: str):
+        """Remove a timeframe from the index"""
+        with self._lock:
+            if self._index.pop(timeframe, None) is not None:
+                self._save()
+    
+    def _entry(self, first, last, rows, checksum) -> dict:
+        """Build a JSON-serializable index entry"""
+        return {
+            'first': pd.Timestamp(first).isoformat(),
+            'last': pd.Timestamp(last).isoformat(),
+            'rows': int(rows),
+            'checksum': f"{int(checksum) % CHECKSUM_MODULUS:016x}"
+        }
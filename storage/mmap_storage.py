@@ -0,0 +1,564 @@
+"""
+Memory-mapped bar storage (one fixed-width binary file per timeframe and symbol)
+"""
+import json
+import os
+import shutil
+import struct
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Optional, List, Tuple, Iterator
+import logging
+
+from storage.file_storage import FileStorageManager
+from storage.bars import BarBlock
+from storage.schema import (
+    BAR_COLUMNS, BAR_TIMEZONE, PRICE_COLUMNS, normalize_datetimes, storage_symbol, to_bar_timestamp,
+    compact_bars, compact_price_dtype, concat_bars
+)
+from config.settings import BAR_PRICE_DTYPE, CSV_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+BAR_FILE_MAGIC = b'BARS'
+BAR_FILE_VERSION = 1
+
+# Records start on a page boundary after the header
+HEADER_SIZE = 4096
+
+# magic, version, row count, schema length - the row count sits at byte 8
+_HEADER = struct.Struct('<4sIQI')
+_ROWS = struct.Struct('<Q')
+ROWS_OFFSET = 8
+
+def record_dtype(price_dtype: str = 'float64') -> np.dtype:
+    """
+    Fixed-width record layout of a bar file
+    
+    Args:
+        price_dtype: 'float32' or 'float64'
+    
+    Returns:
+        Structured dtype with timestamp (UTC epoch ns), open, high, low, close, volume
+    """
+    price = np.dtype(price_dtype).newbyteorder('<')
+    return np.dtype([
+        ('timestamp', '<i8'),
+        ('open', price),
+        ('high', price),
+        ('low', price),
+        ('close', price),
+        ('volume', '<i8')
+    ])
+
+def frame_to_records(data: pd.DataFrame, dtype: np.dtype) -> np.ndarray:
+    """
+    Pack bars of one symbol into fixed-width records
+    
+    Args:
+        data: DataFrame with standard bar columns
+        dtype: Record dtype (see record_dtype)
+    
+    Returns:
+        Structured array in the frame's row order
+    """
+    records = np.empty(len(data), dtype=dtype)
+    records['timestamp'] = normalize_datetimes(data['Datetime']).array.asi8
+    for col in PRICE_COLUMNS:
+        records[col.lower()] = data[col].to_numpy()
+    records['volume'] = data['Volume'].fillna(0).to_numpy(dtype='int64')
+    return records
+
+def _encode_header(rows: int, schema: dict) -> bytes:
+    """Header bytes padded to HEADER_SIZE"""
+    encoded = json.dumps(schema, sort_keys=True).encode('utf-8')
+    header = _HEADER.pack(BAR_FILE_MAGIC, BAR_FILE_VERSION, rows, len(encoded)) + encoded
+    if len(header) > HEADER_SIZE:
+        raise ValueError(f"Bar file schema too large ({len(encoded)} bytes)")
+    return header.ljust(HEADER_SIZE, b'\0')
+
+def read_header(f) -> Tuple[int, dict]:
+    """
+    Read a bar file header
+    
+    Args:
+        f: Binary file object
+    
+    Returns:
+        (row count, schema)
+    
+    Raises:
+        ValueError: If the file isn't a bar file of a supported version
+    """
+    f.seek(0)
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < _HEADER.size:
+        raise ValueError("Truncated bar file header")
+    
+    magic, version, rows, schema_size = _HEADER.unpack_from(raw)
+    if magic != BAR_FILE_MAGIC or version != BAR_FILE_VERSION:
+        raise ValueError(f"Not a version {BAR_FILE_VERSION} bar file")
+    
+    schema = json.loads(raw[_HEADER.size:_HEADER.size + schema_size].decode('utf-8'))
+    return rows, schema
+
+def schema_dtype(schema: dict) -> np.dtype:
+    """Record dtype described by a header schema"""
+    return np.dtype([tuple(field) for field in schema['fields']])
+
+def write_bar_file(path: str, records: np.ndarray, symbol: str):
+    """
+    Write a complete bar file (use through atomic_write)
+    
+    Args:
+        path: Destination path
+        records: Structured array of records sorted by timestamp
+        symbol: Stored symbol name
+    """
+    schema = {
+        'symbol': symbol,
+        'fields': [[name, records.dtype.fields[name][0].str] for name in records.dtype.names],
+        'timestamp_unit': 'ns',
+        'timezone': BAR_TIMEZONE
+    }
+    with open(path, 'wb') as f:
+        f.write(_encode_header(len(records), schema))
+        f.write(records.tobytes())
+
+def append_bar_file(path: str, records: np.ndarray, fsync: bool = True):
+    """
+    Append records to a bar file in place
+    
+    Records are written past the current rows before the row count in the
+    header is raised, so readers never see a partial record. Bytes left by
+    an interrupted append are overwritten.
+    
+    Args:
+        path: Bar file path
+        records: Structured array with the file's record dtype
+        fsync: Whether to flush the records before publishing the new row count
+    """
+    with open(path, 'r+b') as f:
+        rows, schema = read_header(f)
+        dtype = schema_dtype(schema)
+        if records.dtype != dtype:
+            raise ValueError(f"Record dtype {records.dtype} doesn't match {path}")
+        
+        f.truncate(HEADER_SIZE + rows * dtype.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(records.tobytes())
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+        
+        f.seek(ROWS_OFFSET)
+        f.write(_ROWS.pack(rows + len(records)))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+class BarFile:
+    """
+    Read-only memory map of one symbol's bars
+    
+    `records` and the column properties are NumPy views of the mapped file,
+    so any number of processes can read the same page-cached data without
+    parsing or copying it. A BarFile sees the rows present when it was
+    opened; call `refresh()` to pick up rows appended (or a file replaced)
+    since.
+    
+    Usage:
+        bars = BarFile('data/1d/RELIANCE.bars')
+        closes = bars.close[bars.between('2024-01-01', '2024-06-30')]
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self.schema = {}
+        self.records = None
+        self._identity = None
+        self.refresh()
+    
+    def refresh(self) -> bool:
+        """
+        Re-read the header and remap if rows were appended or the file replaced
+        
+        Returns:
+            True if the mapping changed
+        """
+        # Map through the handle the header was read from, in case the file is replaced meanwhile
+        with open(self.path, 'rb') as f:
+            rows, schema = read_header(f)
+            identity = (os.fstat(f.fileno()).st_ino, rows)
+            if identity == self._identity:
+                return False
+            
+            dtype = schema_dtype(schema)
+            if rows:
+                records = np.memmap(f, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(rows,))
+            else:
+                records = np.empty(0, dtype=dtype)
+        
+        self.rows, self.schema, self.records, self._identity = rows, schema, records, identity
+        return True
+    
+    @property
+    def symbol(self) -> str:
+        return self.schema.get('symbol', '')
+    
+    @property
+    def timestamps(self) -> np.ndarray:
+        """UTC epoch nanoseconds (view)"""
+        return self.records['timestamp']
+    
+    @property
+    def open(self) -> np.ndarray:
+        return self.records['open']
+    
+    @property
+    def high(self) -> np.ndarray:
+        return self.records['high']
+    
+    @property
+    def low(self) -> np.ndarray:
+        return self.records['low']
+    
+    @property
+    def close(self) -> np.ndarray:
+        return self.records['close']
+    
+    @property
+    def volume(self) -> np.ndarray:
+        return self.records['volume']
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """Timestamp of the last bar, or None for an empty file"""
+        if not self.rows:
+            return None
+        return pd.Timestamp(int(self.timestamps[-1]), tz='UTC').tz_convert(BAR_TIMEZONE)
+    
+    def between(self, start_date=None, end_date=None) -> slice:
+        """
+        Row range with start_date <= Datetime <= end_date (binary search, no scan)
+        
+        Args:
+            start_date: Optional inclusive lower bound
+            end_date: Optional inclusive upper bound
+        
+        Returns:
+            slice into the records
+        """
+        start = np.searchsorted(self.timestamps, to_bar_timestamp(start_date).value, 'left') if start_date else 0
+        end = np.searchsorted(self.timestamps, to_bar_timestamp(end_date).value, 'right') if end_date else self.rows
+        return slice(int(start), int(end))
+    
+    def to_block(self, start_date=None, end_date=None) -> BarBlock:
+        """
+        The bars (optionally a date range) as a BarBlock of views
+        
+        Returns:
+            BarBlock sharing memory with the mapped file
+        """
+        return self._block(self.between(start_date, end_date))
+    
+    def _block(self, rows: slice) -> BarBlock:
+        """BarBlock of views over a row range"""
+        records = self.records[rows]
+        return BarBlock(
+            symbols=np.array([self.symbol], dtype=object),
+            symbol_ids=np.broadcast_to(np.int8(0), (len(records),)),
+            timestamps=records['timestamp'],
+            open=records['open'],
+            high=records['high'],
+            low=records['low'],
+            close=records['close'],
+            volume=records['volume']
+        )
+    
+    def to_frame(self, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        The bars (optionally a date range) as an independent DataFrame
+        
+        Returns:
+            DataFrame with the standard bar columns
+        """
+        return self.to_block(start_date, end_date).to_frame().copy()
+    
+    def iter_frames(self, start_date=None, end_date=None, chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield the bars (optionally a date range) as DataFrames of at most `chunksize` rows
+        
+        Args:
+            start_date: Optional inclusive lower bound
+            end_date: Optional inclusive upper bound
+            chunksize: Rows per frame (default: CSV_CHUNK_SIZE)
+        
+        Yields:
+            Independent DataFrames in timestamp order
+        """
+        rows = self.between(start_date, end_date)
+        chunksize = chunksize or CSV_CHUNK_SIZE
+        for start in range(rows.start, rows.stop, chunksize):
+            yield self._block(slice(start, min(start + chunksize, rows.stop))).to_frame().copy()
+
+class MmapStorageManager(FileStorageManager):
+    """
+    Stores each timeframe as data/{timeframe}/{SYMBOL}.bars - fixed-width binary records
+    
+    Each file has a HEADER_SIZE header (magic, version, row count and a JSON
+    schema) followed by records sorted by timestamp. Bars newer than a
+    file's last bar are appended in place; overlapping bars cause that
+    symbol's file to be merged and atomically replaced. Loads decode the
+    records directly (no text parsing), and other processes can map the
+    files read-only with `open_bars` / `BarFile` to share one page-cached
+    copy.
+    
+    A file's price width is chosen when it is written (BAR_PRICE_DTYPE;
+    'auto' picks float32 when lossless) and widened on the next save that
+    needs float64.
+    """
+    
+    file_extension = 'bars'
+    state_suffix = 'mmap'
+    
+    def get_timeframe_dir(self, timeframe: str) -> str:
+        """Directory holding a timeframe's bar files"""
+        return os.path.join(self.base_path, timeframe)
+    
+    def get_symbol_path(self, timeframe: str, symbol: str) -> str:
+        """
+        Path of a symbol's bar file
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol: Symbol (provider or stored name)
+        
+        Returns:
+            Complete bar file path
+        """
+        return os.path.join(self.get_timeframe_dir(timeframe), f"{storage_symbol(symbol)}.{self.file_extension}")
+    
+    def list_symbol_files(self, timeframe: str, symbol_filter: List[str] = None) -> List[Tuple[str, str]]:
+        """
+        List stored bar files
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional symbols to keep
+        
+        Returns:
+            Sorted list of (symbol, path)
+        """
+        timeframe_dir = self.get_timeframe_dir(timeframe)
+        if not os.path.isdir(timeframe_dir):
+            return []
+        
+        wanted = set(storage_symbol(symbol) for symbol in symbol_filter) if symbol_filter else None
+        suffix = f".{self.file_extension}"
+        
+        files = []
+        for filename in os.listdir(timeframe_dir):
+            if not filename.endswith(suffix) or filename.startswith('.'):
+                continue
+            symbol = filename[:-len(suffix)]
+            if wanted is None or symbol in wanted:
+                files.append((symbol, os.path.join(timeframe_dir, filename)))
+        
+        return sorted(files)
+    
+    def open_bars(self, timeframe: str, symbol: str) -> Optional[BarFile]:
+        """
+        Map a symbol's bars read-only
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol: Symbol (provider or stored name)
+        
+        Returns:
+            BarFile, or None if the symbol has no stored bars
+        """
+        path = self.get_symbol_path(timeframe, symbol)
+        if not os.path.exists(path):
+            return None
+        return BarFile(path)
+    
+    def _apply_batch(self, data: pd.DataFrame, timeframe: str, append: bool):
+        """
+        Save a batch into the affected symbol files
+        
+        Args:
+            data: Non-empty DataFrame to save
+            timeframe: Timeframe identifier
+            append: Whether to merge with existing data or replace the timeframe
+        """
+        data = compact_bars(data[[col for col in BAR_COLUMNS if col in data.columns]])
+        
+        if append:
+            # Index entries are updated from deltas, so they must cover existing files
+            self._ensure_metadata(timeframe)
+        else:
+            shutil.rmtree(self.get_timeframe_dir(timeframe), ignore_errors=True)
+            self.metadata.drop_timeframe(timeframe)
+        
+        os.makedirs(self.get_timeframe_dir(timeframe), exist_ok=True)
+        
+        appended = 0
+        added_frames = []
+        removed_frames = []
+        
+        for symbol, part in data.groupby('Symbol', sort=False, observed=True):
+            added, removed = self._write_symbol(part, self.get_symbol_path(timeframe, str(symbol)))
+            added_frames.append(added)
+            if removed is None:
+                appended += 1
+            else:
+                removed_frames.append(removed)
+        
+        logger.info(f"Saved {len(data)} records for {timeframe} into {len(added_frames)} bar files "
+                    f"({appended} append-only)")
+        
+        self.metadata.apply_delta(
+            timeframe,
+            concat_bars(added_frames),
+            concat_bars(removed_frames) if removed_frames else None
+        )
+    
+    def _write_symbol(self, part: pd.DataFrame, path: str) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+        """
+        Write one symbol's bars into its file
+        
+        Args:
+            part: Bars of a single symbol
+            path: Bar file path
+        
+        Returns:
+            (rows written, previously stored rows that were rewritten) - the
+            second item is None when the file was created or only appended to
+        """
+        part = self.remove_duplicates(part.sort_values('Datetime'))
+        
+        if not os.path.exists(path):
+            self._write_file(part, path)
+            return part, None
+        
+        bars = BarFile(path)
+        last_time = bars.last_timestamp()
+        if last_time is not None and part['Datetime'].min() > last_time:
+            dtype = bars.records.dtype
+            if dtype['open'] == np.float64 or self._price_dtype(part) == 'float32':
+                append_bar_file(path, frame_to_records(part, dtype), fsync=self.fsync)
+                return part, None
+        
+        existing = bars.to_frame()
+        merged = self.merge_bars(existing, part)
+        self._write_file(merged, path)
+        return merged, existing
+    
+    def _price_dtype(self, data: pd.DataFrame) -> str:
+        """Price width for writing bars"""
+        if BAR_PRICE_DTYPE != 'auto':
+            return BAR_PRICE_DTYPE
+        return compact_price_dtype(data[PRICE_COLUMNS])
+    
+    def _serialize(self, data: pd.DataFrame, path: str):
+        """
+        Write one symbol's bars as a bar file
+        """
+        symbol = str(data['Symbol'].iloc[0]) if len(data) else ''
+        write_bar_file(path, frame_to_records(data, record_dtype(self._price_dtype(data))), symbol)
+    
+    def _read_file(self, path: str, symbol_filter: List[str] = None) -> pd.DataFrame:
+        """
+        Decode a bar file into a DataFrame
+        """
+        return BarFile(path).to_frame()
+    
+    def _iter_file(self, path: str, chunksize: int,
+                   symbol_filter: List[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Decode a bar file in chunks of rows
+        """
+        yield from BarFile(path).iter_frames(chunksize=chunksize)
+    
+    def load_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Load bars of the matching symbols, cutting the date range by binary search
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional list of symbols to load
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
+        
+        Returns:
+            DataFrame with loaded data sorted by Symbol and Datetime
+        """
+        try:
+            files = self.list_symbol_files(timeframe, symbol_filter)
+            
+            if not files:
+                logger.warning(f"No bar files found for {timeframe}")
+                return pd.DataFrame()
+            
+            frames = [BarFile(path).to_frame(start_date, end_date) for _, path in files]
+            data = concat_bars(frames)
+            
+            logger.info(f"Loaded {len(data)} records from {len(files)} {timeframe} bar files")
+            return data
+            
+        except Exception as e:
+            logger.error(f"Error loading data for {timeframe}: {str(e)}")
+            return pd.DataFrame()
+    
+    def iter_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None,
+                  chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the matching bars symbol by symbol, in chunks
+        """
+        for _, path in self.list_symbol_files(timeframe, symbol_filter):
+            yield from BarFile(path).iter_frames(start_date, end_date, chunksize)
+    
+    def _metadata_source(self, timeframe: str) -> Optional[dict]:
+        """
+        Bar files have no single file signature - the index is trusted as written
+        (it is this storage type's own, see `state_suffix`)
+        """
+        return None
+    
+    def get_data_summary(self) -> dict:
+        """
+        Get summary of all stored timeframes
+        
+        Returns:
+            Dictionary with bar file information by timeframe directory
+        """
+        summary = {}
+        
+        try:
+            for timeframe in sorted(os.listdir(self.base_path)):
+                files = self.list_symbol_files(timeframe)
+                if not files:
+                    continue
+                
+                sizes = [os.path.getsize(path) for _, path in files]
+                modified = max(os.path.getmtime(path) for _, path in files)
+                
+                summary[f"{timeframe}/"] = {
+                    'size_bytes': sum(sizes),
+                    'size_mb': round(sum(sizes) / (1024 * 1024), 2),
+                    'modified': datetime.fromtimestamp(modified),
+                    'records': sum(len(BarFile(path)) for _, path in files),
+                    'symbols': len(files)
+                }
+                
+        except Exception as e:
+            logger.error(f"Error getting data summary: {str(e)}")
+        
+        return summary
@@ -0,0 +1,72 @@
+"""
+Columnar Parquet storage for market data
+"""
+import importlib.util
+import pandas as pd
+from typing import List, Iterator
+import logging
+
+from storage.file_storage import FileStorageManager
+from storage.schema import apply_bar_dtypes, compact_bars
+from config.settings import PARQUET_PRICE_DTYPE, PARQUET_COMPRESSION
+
+logger = logging.getLogger(__name__)
+
+class ParquetStorageManager(FileStorageManager):
+    """
+    Stores market data as typed Parquet files instead of CSV
+    
+    Columns are written with explicit dtypes (categorical Symbol, float
+    prices, int64 Volume, timezone-aware Datetime), so loads skip text
+    parsing entirely and symbol filters are pushed down to the reader.
+    Requires pyarrow.
+    """
+    
+    file_extension = 'parquet'
+    state_suffix = 'parquet'
+    
+    def __init__(self, base_path: str = None, price_dtype: str = None, compression: str = None):
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("Parquet storage requires pyarrow (pip install pyarrow)")
+        
+        super().__init__(base_path)
+        self.price_dtype = price_dtype or PARQUET_PRICE_DTYPE
+        self.compression = compression or PARQUET_COMPRESSION
+    
+    def _read_file(self, path: str, symbol_filter: List[str] = None) -> pd.DataFrame:
+        """
+        Read a Parquet file, pushing the symbol filter down to the reader
+        """
+        filters = [('Symbol', 'in', list(symbol_filter))] if symbol_filter else None
+        data = pd.read_parquet(path, engine='pyarrow', filters=filters)
+        
+        # Drop categories of symbols filtered out by the reader
+        if 'Symbol' in data.columns and isinstance(data['Symbol'].dtype, pd.CategoricalDtype):
+            data['Symbol'] = data['Symbol'].cat.remove_unused_categories()
+        
+        return data
+    
+    def _iter_file(self, path: str, chunksize: int,
+                   symbol_filter: List[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read a Parquet file in record batches with the symbol filter pushed down
+        """
+        import pyarrow.dataset as ds
+        
+        dataset = ds.dataset(path, format='parquet')
+        expression = ds.field('Symbol').isin(list(symbol_filter)) if symbol_filter else None
+        
+        for batch in dataset.to_batches(filter=expression, batch_size=chunksize):
+            if batch.num_rows == 0:
+                continue
+            chunk = batch.to_pandas()
+            if 'Symbol' in chunk.columns and isinstance(chunk['Symbol'].dtype, pd.CategoricalDtype):
+                chunk['Symbol'] = chunk['Symbol'].cat.remove_unused_categories()
+            yield compact_bars(chunk)
+    
+    def _serialize(self, data: pd.DataFrame, path: str):
+        """
+        Write a DataFrame as Parquet with typed bar columns
+        """
+        data = apply_bar_dtypes(data, price_dtype=self.price_dtype)
+        data.to_parquet(path, engine='pyarrow', compression=self.compression, index=False)
@@ -0,0 +1,306 @@
+"""
+Partitioned file storage for market data (one file per symbol and month)
+"""
+import os
+import shutil
+import pandas as pd
+from datetime import datetime
+from typing import Optional, List, Tuple, Iterator
+import logging
+
+from storage.file_storage import FileStorageManager
+from storage.parquet_storage import ParquetStorageManager
+from storage.schema import (
+    BAR_COLUMNS, normalize_datetimes, storage_symbol, to_bar_timestamp, compact_bars, concat_bars
+)
+
+logger = logging.getLogger(__name__)
+
+class PartitionedStorageManager(FileStorageManager):
+    """
+    Stores each timeframe as data/{timeframe}/symbol=XYZ/year=YYYY/month=MM/bars.csv
+    
+    A save only touches the partitions its bars fall into. Bars that are all
+    newer than a partition's last bar are appended to the file without
+    reading it; overlapping bars cause only that partition to be merged and
+    rewritten. Loads skip partitions outside the symbol and date filters.
+    """
+    
+    partition_filename = 'bars'
+    state_suffix = 'partitioned'
+    
+    def get_timeframe_dir(self, timeframe: str) -> str:
+        """Directory holding all partitions of a timeframe"""
+        return os.path.join(self.base_path, timeframe)
+    
+    def get_partition_path(self, timeframe: str, symbol: str, year: int, month: int) -> str:
+        """
+        Path of the partition file for a symbol and month
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol: Stored symbol name
+            year: Partition year
+            month: Partition month
+        
+        Returns:
+            Complete partition file path
+        """
+        return os.path.join(
+            self.get_timeframe_dir(timeframe),
+            f"symbol={symbol}",
+            f"year={year:04d}",
+            f"month={month:02d}",
+            f"{self.partition_filename}.{self.file_extension}"
+        )
+    
+    def list_partitions(self, timeframe: str, symbol_filter: List[str] = None,
+                        start_date=None, end_date=None) -> List[Tuple[str, int, int, str]]:
+        """
+        List existing partitions, pruned by symbol and date range
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional symbols to keep
+            start_date: Optional inclusive start date
+            end_date: Optional inclusive end date
+        
+        Returns:
+            Sorted list of (symbol, year, month, path)
+        """
+        timeframe_dir = self.get_timeframe_dir(timeframe)
+        if not os.path.isdir(timeframe_dir):
+            return []
+        
+        wanted = set(storage_symbol(symbol) for symbol in symbol_filter) if symbol_filter else None
+        first_month = self._month_key(to_bar_timestamp(start_date)) if start_date else None
+        last_month = self._month_key(to_bar_timestamp(end_date)) if end_date else None
+        
+        partitions = []
+        for symbol_dir in os.listdir(timeframe_dir):
+            if not symbol_dir.startswith('symbol='):
+                continue
+            symbol = symbol_dir[len('symbol='):]
+            if wanted is not None and symbol not in wanted:
+                continue
+            
+            symbol_path = os.path.join(timeframe_dir, symbol_dir)
+            for year_dir in os.listdir(symbol_path):
+                year_path = os.path.join(symbol_path, year_dir)
+                for month_dir in os.listdir(year_path):
+                    try:
+                        key = (int(year_dir[len('year='):]), int(month_dir[len('month='):]))
+                    except ValueError:
+                        continue
+                    
+                    if first_month and key < first_month:
+                        continue
+                    if last_month and key > last_month:
+                        continue
+                    
+                    path = self.get_partition_path(timeframe, symbol, *key)
+                    if os.path.exists(path):
+                        partitions.append((symbol, key[0], key[1], path))
+        
+        return sorted(partitions)
+    
+    def _month_key(self, timestamp: pd.Timestamp) -> Tuple[int, int]:
+        """(year, month) partition key of a timestamp"""
+        return timestamp.year, timestamp.month
+    
+    def _apply_batch(self, data: pd.DataFrame, timeframe: str, append: bool):
+        """
+        Save a batch into the affected partitions
+        
+        Args:
+            data: Non-empty DataFrame to save
+            timeframe: Timeframe identifier
+            append: Whether to merge with existing data or replace the timeframe
+        """
+        data = data[[col for col in BAR_COLUMNS if col in data.columns]]
+        data = data.assign(Datetime=normalize_datetimes(data['Datetime']))
+        
+        if append:
+            # Index entries are updated from deltas, so they must cover existing partitions
+            self._ensure_metadata(timeframe)
+        else:
+            # Overwrite semantics match the single-file layout: replace everything
+            shutil.rmtree(self.get_timeframe_dir(timeframe), ignore_errors=True)
+            self.metadata.drop_timeframe(timeframe)
+        
+        written = 0
+        appended = 0
+        added_frames = []
+        removed_frames = []
+        keys = [data['Symbol'], data['Datetime'].dt.year, data['Datetime'].dt.month]
+        
+        for (symbol, year, month), part in data.groupby(keys, sort=False, observed=True):
+            path = self.get_partition_path(timeframe, symbol, year, month)
+            added, removed = self._write_partition(part, path)
+            added_frames.append(added)
+            if removed is None:
+                appended += 1
+            else:
+                removed_frames.append(removed)
+            written += 1
+        
+        logger.info(f"Saved {len(data)} records for {timeframe} into {written} partitions "
+                    f"({appended} append-only)")
+        
+        self.metadata.apply_delta(
+            timeframe,
+            concat_bars(added_frames),
+            concat_bars(removed_frames) if removed_frames else None
+        )
+    
+    def _write_partition(self, part: pd.DataFrame, path: str) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+        """
+        Write bars into a single partition file
+        
+        Args:
+            part: Bars belonging to this partition
+            path: Partition file path
+        
+        Returns:
+            (rows written, previously stored rows that were rewritten) - the
+            second item is None when the file was created or only appended to
+        """
+        part = self.remove_duplicates(part.sort_values('Datetime'))
+        
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_file(part, path)
+            return part, None
+        
+        if self.file_extension == 'csv':
+            last_time = self._read_last_timestamp(path)
+            if last_time is not None and part['Datetime'].min() > last_time:
+                self._append_rows(part, path)
+                return part, None
+        
+        existing = self._read_file(path)
+        merged = self.merge_bars(existing, part)
+        self._write_file(merged, path)
+        return merged, existing
+    
+    def _read_last_timestamp(self, path: str) -> Optional[pd.Timestamp]:
+        """
+        Read the timestamp of the last row of a CSV partition without parsing the file
+        
+        Args:
+            path: CSV partition path
+        
+        Returns:
+            Timestamp of the last row, or None if it can't be determined
+        """
+        fields = self._read_last_line(path)
+        try:
+            # A header-only file fails to parse and returns None
+            return to_bar_timestamp(fields[0]) if fields else None
+        except ValueError:
+            return None
+    
+    def load_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Load data from the partitions matching the filters
+        
+        Args:
+            timeframe: Timeframe identifier
+            symbol_filter: Optional list of symbols to load
+            start_date: Optional start date filter (inclusive)
+            end_date: Optional end date filter (inclusive)
+        
+        Returns:
+            DataFrame with loaded data sorted by Symbol and Datetime
+        """
+        try:
+            partitions = self.list_partitions(timeframe, symbol_filter, start_date, end_date)
+            
+            if not partitions:
+                logger.warning(f"No partitions found for {timeframe}")
+                return pd.DataFrame()
+            
+            if start_date or end_date:
+                # Partitions are pruned by month - chunks are trimmed to the exact range
+                frames = list(self.iter_data(timeframe, symbol_filter, start_date, end_date))
+            else:
+                # Raw partitions are combined first so dtypes are converted once
+                frames = [self._read_file(path) for _, _, _, path in partitions]
+            data = compact_bars(concat_bars(frames))
+            
+            logger.info(f"Loaded {len(data)} records from {len(partitions)} {timeframe} partitions")
+            return data.reset_index(drop=True)
+            
+        except Exception as e:
+            logger.error(f"Error loading data for {timeframe}: {str(e)}")
+            return pd.DataFrame()
+    
+    def iter_data(self, timeframe: str, symbol_filter: List[str] = None,
+                  start_date: str = None, end_date: str = None,
+                  chunksize: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the partitions matching the filters, chunk by chunk
+        
+        Partitions are visited in (symbol, year, month) order.
+        """
+        for _, _, _, path in self.list_partitions(timeframe, symbol_filter, start_date, end_date):
+            # Partition pruning already applied the symbol filter
+            yield from self._iter_filtered(path, None, start_date, end_date, chunksize)
+    
+    def _metadata_source(self, timeframe: str) -> Optional[dict]:
+        """
+        Partitions have no single file signature - the index is trusted as written
+        (it is this storage type's own, see `state_suffix`)
+        """
+        return None
+    
+    def get_data_summary(self) -> dict:
+        """
+        Get summary of all stored timeframes
+        
+        Returns:
+            Dictionary with partition information by timeframe directory
+        """
+        summary = {}
+        
+        try:
+            for timeframe in sorted(os.listdir(self.base_path)):
+                if not os.path.isdir(self.get_timeframe_dir(timeframe)):
+                    continue
+                
+                partitions = self.list_partitions(timeframe)
+                if not partitions:
+                    continue
+                
+                sizes = [os.path.getsize(path) for _, _, _, path in partitions]
+                modified = max(os.path.getmtime(path) for _, _, _, path in partitions)
+                
+                try:
+                    records = sum(entry['rows'] for entry in self.get_symbol_metadata(timeframe).values())
+                except Exception:
+                    records = 0
+                
+                summary[f"{timeframe}/"] = {
+                    'size_bytes': sum(sizes),
+                    'size_mb': round(sum(sizes) / (1024 * 1024), 2),
+                    'modified': datetime.fromtimestamp(modified),
+                    'records': records,
+                    'symbols': len(set(symbol for symbol, _, _, _ in partitions)),
+                    'partitions': len(partitions)
+                }
+                
+        except Exception as e:
+            logger.error(f"Error getting data summary: {str(e)}")
+        
+        return summary
+
+class PartitionedParquetStorageManager(PartitionedStorageManager, ParquetStorageManager):
+    """
+    Partitioned layout with Parquet partition files
+    
+    Parquet files can't be appended to, so every affected partition is
+    merged and rewritten - still only one symbol-month per file.
+    """
+    
+    state_suffix = 'partitioned_parquet'
@@ -0,0 +1,300 @@
+"""
+Process pool for CPU-bound bar work: normalization, merging and CSV formatting
+"""
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+import logging
+
+from storage.bars import BarBlock, _is_compact
+from storage.schema import BAR_COLUMNS, BAR_TIMEZONE, normalize_datetimes, concat_bars, widen_prices
+from config.settings import PROCESS_POOL_ENABLED, PROCESS_POOL_WORKERS, PROCESS_POOL_MIN_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Column offsets in a shared bar file are aligned for direct array views
+_ALIGNMENT = 64
+
+class SharedBars(NamedTuple):
+    """
+    Handle to bars exported to a columnar temp file
+    
+    The file lives in shared memory (/dev/shm) where available, so the
+    receiving process maps the columns instead of unpickling a DataFrame.
+    """
+    path: str
+    rows: int
+    symbols: List[str]
+    columns: List[Tuple[str, str, int]]   # (BarBlock column, dtype, byte offset)
+
+def shared_directory() -> str:
+    """Directory for shared bar files: /dev/shm if present, else the temp directory"""
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+def export_bars(data: pd.DataFrame, directory: str) -> SharedBars:
+    """
+    Write bars column by column to a new file in `directory`
+    
+    Args:
+        data: DataFrame with the standard bar columns
+        directory: Directory for the file
+    
+    Returns:
+        SharedBars handle for `import_bars`
+    """
+    block = BarBlock.from_frame(data)
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.bars')
+    
+    columns, offset = [], 0
+    with os.fdopen(fd, 'wb') as f:
+        for name, values in block.to_numpy().items():
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            columns.append((name, values.dtype.str, offset))
+            f.seek(offset)
+            f.write(np.ascontiguousarray(values).data)
+            offset += values.nbytes
+    
+    return SharedBars(path, len(block), block.symbols.tolist(), columns)
+
+def import_bars(shared: SharedBars) -> pd.DataFrame:
+    """
+    Map bars written by `export_bars` and remove the file
+    
+    The columns are copy-on-write views of the mapping, so the returned
+    frame shares the file's pages until it is modified.
+    
+    Args:
+        shared: Handle returned by export_bars
+    
+    Returns:
+        DataFrame with the standard bar columns in compact dtypes
+    """
+    try:
+        if not shared.rows:
+            return pd.DataFrame()
+        
+        raw = np.memmap(shared.path, dtype='uint8', mode='c')
+        arrays = {}
+        for name, dtype, offset in shared.columns:
+            dtype = np.dtype(dtype)
+            arrays[name] = raw[offset:offset + shared.rows * dtype.itemsize].view(dtype)
+        
+        return BarBlock(symbols=np.array(shared.symbols, dtype=object), **arrays).to_frame()
+    finally:
+        try:
+            os.remove(shared.path)
+        except OSError:
+            # Still mapped (Windows) - removed with the pool directory
+            pass
+
+def _shareable(data: pd.DataFrame) -> bool:
+    """Whether a frame holds exactly the standard bar columns, in compact dtypes and the bar timezone"""
+    return (list(data.columns) == BAR_COLUMNS and _is_compact(data)
+            and str(data['Datetime'].dt.tz) == BAR_TIMEZONE)
+
+def _normalize_frame(standardize: Callable, frame: pd.DataFrame, symbol: str, directory: str):
+    """Worker: standardize one fetched frame and share the result"""
+    frame = standardize(frame, symbol)
+    if 'Datetime' in frame.columns:
+        frame = frame.assign(Datetime=normalize_datetimes(frame['Datetime']))
+    
+    # Frames missing bar columns are returned pickled
+    if frame.empty or not _shareable(frame):
+        return frame
+    return export_bars(frame, directory)
+
+def _merge_shard(existing: Optional[SharedBars], new: SharedBars, directory: str) -> Tuple[SharedBars, int]:
+    """Worker: merge one shard of symbols (last write wins) and sort it"""
+    frames = [import_bars(shared) for shared in (existing, new) if shared is not None]
+    data = concat_bars(frames)
+    
+    merged = data.drop_duplicates(subset=['Symbol', 'Datetime'], keep='last')
+    merged = merged.sort_values(['Symbol', 'Datetime'])
+    return export_bars(merged, directory), len(data) - len(merged)
+
+def _format_shard(shared: SharedBars, path: str):
+    """Worker: write a contiguous slice of rows as header-less CSV"""
+    widen_prices(import_bars(shared)).to_csv(path, header=False, index=False)
+
+class BarProcessPool:
+    """
+    Shards CPU-bound bar work across worker processes
+    
+    Normalization, the per-symbol merge of a save (concat, drop_duplicates
+    and sort) and CSV formatting run under the GIL, so a large end-of-day
+    rebuild uses one core no matter how many threads are involved. Batches
+    of at least `min_rows` rows are split into contiguous symbol ranges (or
+    row ranges when writing), processed by the workers, and collected
+    through columnar temp files in shared memory that the parent maps
+    instead of unpickling. Smaller batches are processed in-process, where
+    the hand-off would cost more than it saves.
+    
+    The executor is created on first use with the 'spawn' start method, as
+    the services run threads that must not be forked.
+    """
+    
+    def __init__(self, enabled: bool = None, workers: int = None, min_rows: int = None):
+        self.enabled = PROCESS_POOL_ENABLED if enabled is None else enabled
+        self.workers = max(1, int(workers or PROCESS_POOL_WORKERS or os.cpu_count() or 1))
+        self.min_rows = PROCESS_POOL_MIN_ROWS if min_rows is None else min_rows
+        
+        self._executor = None
+        self._directory = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+    
+    def should_use(self, rows: int) -> bool:
+        """
+        Check whether a batch is large enough to shard
+        
+        Args:
+            rows: Rows in the batch
+        
+        Returns:
+            True if the pool is enabled and the batch has at least min_rows rows
+        """
+        return self.enabled and rows >= self.min_rows
+    
+    def _get_executor(self) -> Tuple[ProcessPoolExecutor, str]:
+        """The executor and shared directory, created on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._directory = tempfile.mkdtemp(prefix='bar-pool-', dir=shared_directory())
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                logger.info(f"Started bar process pool with {self.workers} workers")
+            return self._executor, self._directory
+    
+    def _run(self, fn: Callable, jobs: List[tuple]) -> list:
+        """Run jobs on the workers and return their results in order"""
+        executor, _ = self._get_executor()
+        try:
+            futures = [executor.submit(fn, *job) for job in jobs]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died - start a fresh pool on the next call
+            self.close()
+            raise
+    
+    def submit_normalize(self, standardize: Callable, frame: pd.DataFrame, symbol: str) -> Future:
+        """
+        Standardize a fetched frame in a worker
+        
+        Args:
+            standardize: Module-level function taking (frame, symbol), e.g. standardize_bars
+            frame: DataFrame from the data source
+            symbol: Symbol the frame was fetched for
+        
+        Returns:
+            Future to pass to collect()
+        """
+        executor, directory = self._get_executor()
+        return executor.submit(_normalize_frame, standardize, frame, symbol, directory)
+    
+    def collect(self, future: Future) -> pd.DataFrame:
+        """
+        Wait for a submitted normalization
+        
+        Args:
+            future: Future returned by submit_normalize
+        
+        Returns:
+            Standardized DataFrame with timezone-aware Datetime
+        """
+        result = future.result()
+        return import_bars(result) if isinstance(result, SharedBars) else result
+    
+    def merge_bars(self, existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merge new bars over stored ones, one symbol range per worker
+        
+        Equivalent to concatenating, dropping duplicate Symbol/Datetime rows
+        (the new bar wins) and sorting by Symbol and Datetime.
+        
+        Args:
+            existing: Stored bars
+            new: Bars being saved
+        
+        Returns:
+            Merged DataFrame sorted by Symbol and Datetime
+        """
+        _, directory = self._get_executor()
+        symbols = np.union1d(existing['Symbol'].astype(str).unique(), new['Symbol'].astype(str).unique())
+        
+        jobs = []
+        for shard in np.array_split(symbols, min(self.workers, len(symbols))):
+            stored = existing[existing['Symbol'].isin(shard)]
+            jobs.append((export_bars(stored, directory) if not stored.empty else None,
+                         export_bars(new[new['Symbol'].isin(shard)], directory), directory))
+        
+        results = self._run(_merge_shard, jobs)
+        
+        removed = sum(count for _, count in results)
+        if removed:
+            logger.info(f"Removed {removed} duplicate records")
+        
+        return concat_bars([import_bars(shared) for shared, _ in results])
+    
+    def write_csv(self, data: pd.DataFrame, path: str):
+        """
+        Write bars as CSV, formatting one row range per worker
+        
+        Args:
+            data: DataFrame with the standard bar columns
+            path: File path
+        """
+        _, directory = self._get_executor()
+        
+        jobs = []
+        for rows in np.array_split(np.arange(len(data)), min(self.workers, len(data))):
+            fd, part_path = tempfile.mkstemp(dir=directory, suffix='.csv')
+            os.close(fd)
+            jobs.append((export_bars(data.iloc[rows[0]:rows[-1] + 1], directory), part_path))
+        
+        try:
+            self._run(_format_shard, jobs)
+            
+            with open(path, 'wb') as f:
+                f.write((','.join(data.columns) + os.linesep).encode())
+                for _, part_path in jobs:
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, f, 1024 * 1024)
+        finally:
+            for _, part_path in jobs:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+    
+    def close(self):
+        """Shut down the workers and remove the shared directory"""
+        with self._lock:
+            executor, directory = self._executor, self._directory
+            self._executor = self._directory = None
+        
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+# Global process pool (disabled unless PROCESS_POOL_ENABLED)
+process_pool = BarProcessPool()
+
+def write_bars_csv(data: pd.DataFrame, path: str):
+    """
+    Write bars as CSV (float32 prices widened), sharded across the process pool when large
+    
+    Args:
+        data: DataFrame to write
+        path: File path
+    """
+    if process_pool.should_use(len(data)) and _shareable(data):
+        process_pool.write_csv(data, path)
+    else:
+        widen_prices(data).to_csv(path, index=False)
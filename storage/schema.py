@@ -0,0 +1,245 @@
+"""
+Column schema and dtypes for stored OHLCV bars
+"""
+import re
+import numpy as np
+import pandas as pd
+
+from config.settings import BAR_PRICE_DTYPE, BAR_PRICE_TOLERANCE
+
+# Standard bar columns, in storage order
+BAR_COLUMNS = ['Datetime', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# Explicit dtypes for parsing stored CSV text (Volume is cast to int64 after reading)
+CSV_DTYPES = {
+    'Symbol': 'str',
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Volume': 'float64'
+}
+
+# Timezone used for stored timestamps
+BAR_TIMEZONE = 'Asia/Kolkata'
+BAR_DATETIME_DTYPE = pd.DatetimeTZDtype('ns', BAR_TIMEZONE)
+
+def _parse_fixed_offset(values: pd.Series):
+    """
+    Fast path for ISO strings that all share one UTC offset (e.g. '+05:30')
+    
+    pandas parses offset-suffixed strings far slower than naive ones, so the
+    offset is stripped, the naive part parsed and the offset applied once.
+    
+    Returns:
+        Series in the bar timezone, or None if the fast path doesn't apply
+    """
+    if values.empty or values.isna().any():
+        return None
+    
+    text = values.astype(str)
+    offset = text.iloc[0][-6:]
+    if not re.fullmatch(r'[+-]\d{2}:\d{2}', offset) or not (text.str[-6:] == offset).all():
+        return None
+    
+    try:
+        naive = pd.to_datetime(text.str[:-6], format='ISO8601')
+    except (ValueError, TypeError):
+        return None
+    
+    sign = -1 if offset[0] == '-' else 1
+    shift = sign * pd.Timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+    return (naive - shift).dt.tz_localize('UTC').dt.tz_convert(BAR_TIMEZONE)
+
+def normalize_datetimes(values: pd.Series) -> pd.Series:
+    """
+    Parse bar timestamps into a single timezone-aware datetime64 dtype
+    
+    Args:
+        values: Series of datetimes or datetime strings
+    
+    Returns:
+        Series of datetime64[ns, Asia/Kolkata]
+    """
+    if values.dtype == BAR_DATETIME_DTYPE:
+        return values
+    
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        parsed = _parse_fixed_offset(values)
+        if parsed is not None:
+            return parsed.dt.as_unit('ns')
+    
+    try:
+        parsed = pd.to_datetime(values)
+    except (ValueError, TypeError):
+        parsed = None
+    
+    # Mixed UTC offsets can't share one dtype - go through UTC to unify them
+    if parsed is None or not pd.api.types.is_datetime64_any_dtype(parsed):
+        parsed = pd.to_datetime(values, utc=True)
+    
+    if parsed.dt.tz is None:
+        parsed = parsed.dt.tz_localize(BAR_TIMEZONE)
+    
+    # Newer pandas infers microseconds; bars are kept as epoch nanoseconds
+    return parsed.dt.tz_convert(BAR_TIMEZONE).dt.as_unit('ns')
+
+def to_bar_timestamp(value) -> pd.Timestamp:
+    """
+    Convert a date/datetime (or string) to a timestamp in the bar timezone
+    
+    Naive values are interpreted as exchange-local time.
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize(BAR_TIMEZONE)
+    return timestamp.tz_convert(BAR_TIMEZONE)
+
+def storage_symbol(symbol: str) -> str:
+    """Convert a provider symbol (e.g. 'RELIANCE.NS') to its stored name"""
+    return symbol.replace('.NS', '')
+
+def filter_date_range(data: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Keep bars with start_date <= Datetime <= end_date
+    
+    Args:
+        data: DataFrame with a timezone-aware Datetime column
+        start_date: Optional inclusive lower bound
+        end_date: Optional inclusive upper bound
+    
+    Returns:
+        Filtered DataFrame
+    """
+    if data.empty or 'Datetime' not in data.columns or not (start_date or end_date):
+        return data
+    
+    mask = pd.Series(True, index=data.index)
+    if start_date:
+        mask &= data['Datetime'] >= to_bar_timestamp(start_date)
+    if end_date:
+        mask &= data['Datetime'] <= to_bar_timestamp(end_date)
+    return data[mask]
+
+def compact_price_dtype(prices: pd.DataFrame, tolerance: float = None) -> str:
+    """
+    Choose float32 for prices it represents without loss, float64 otherwise
+    
+    Provider prices are often float32 values widened to float64, which
+    round-trip exactly.
+    
+    Args:
+        prices: DataFrame (or Series) of price columns
+        tolerance: Largest acceptable absolute round-trip error (default: BAR_PRICE_TOLERANCE)
+    
+    Returns:
+        'float32' or 'float64'
+    """
+    values = np.asarray(prices, dtype='float64')
+    if values.size == 0:
+        return 'float32'
+    
+    with np.errstate(over='ignore', invalid='ignore'):
+        error = np.abs(values.astype('float32').astype('float64') - values)
+    
+    # NaN stays NaN in either width
+    error = error[~np.isnan(values)]
+    limit = BAR_PRICE_TOLERANCE if tolerance is None else tolerance
+    return 'float32' if error.size == 0 or error.max() <= limit else 'float64'
+
+def widen_prices(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast float32 price columns back to float64 (exact) before writing text
+    
+    CSV writes float32 with its shortest decimal form, which would change
+    the stored float64 values; widening keeps files identical.
+    
+    Args:
+        data: DataFrame with bar columns
+    
+    Returns:
+        DataFrame with float64 prices (the same object if nothing changed)
+    """
+    narrow = {col: 'float64' for col in PRICE_COLUMNS
+              if col in data.columns and data[col].dtype == 'float32'}
+    return data.astype(narrow) if narrow else data
+
+def compact_bars(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast bars to the configured in-memory dtypes (see BAR_PRICE_DTYPE)
+    
+    Args:
+        data: DataFrame with standard bar columns
+    
+    Returns:
+        DataFrame with categorical Symbol, compact prices and int64 Volume
+    """
+    if data.empty:
+        return data
+    return apply_bar_dtypes(data, price_dtype=BAR_PRICE_DTYPE)
+
+def concat_bars(frames) -> pd.DataFrame:
+    """
+    Concatenate bar frames, keeping Symbol categorical
+    
+    pandas falls back to object dtype when categoricals differ, so the
+    frames are first given the union of their categories.
+    
+    Args:
+        frames: Iterable of DataFrames
+    
+    Returns:
+        Combined DataFrame with a fresh index
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    
+    if len(frames) > 1 and all('Symbol' in frame.columns and isinstance(frame['Symbol'].dtype, pd.CategoricalDtype)
+                               for frame in frames):
+        categories = frames[0]['Symbol'].cat.categories
+        for frame in frames[1:]:
+            if not frame['Symbol'].cat.categories.equals(categories):
+                categories = categories.union(frame['Symbol'].cat.categories)
+        frames = [frame if frame['Symbol'].cat.categories.equals(categories)
+                  else frame.assign(Symbol=frame['Symbol'].cat.set_categories(categories))
+                  for frame in frames]
+    
+    return pd.concat(frames, ignore_index=True)
+
+def apply_bar_dtypes(data: pd.DataFrame, price_dtype: str = 'float64',
+                     categorical_symbol: bool = True) -> pd.DataFrame:
+    """
+    Cast bar columns to compact typed dtypes
+    
+    Args:
+        data: DataFrame with standard bar columns
+        price_dtype: dtype for Open/High/Low/Close ('float32', 'float64' or
+                     'auto' for float32 when lossless)
+        categorical_symbol: Whether to store Symbol as a categorical
+    
+    Returns:
+        DataFrame with typed columns (missing columns are left out)
+    """
+    present = [col for col in BAR_COLUMNS if col in data.columns]
+    if price_dtype == 'auto':
+        price_dtype = compact_price_dtype(data[[col for col in PRICE_COLUMNS if col in present]])
+    
+    # Building one frame from the converted columns is far cheaper than astype per column
+    columns = {}
+    for col in present:
+        values = data[col]
+        if col == 'Datetime':
+            values = normalize_datetimes(values)
+        elif col == 'Symbol':
+            if not (categorical_symbol and isinstance(values.dtype, pd.CategoricalDtype)):
+                values = values.astype('category' if categorical_symbol else str)
+        elif col in PRICE_COLUMNS:
+            if values.dtype != price_dtype:
+                values = values.to_numpy(dtype=price_dtype)
+        elif values.dtype != 'int64':
+            values = values.fillna(0).to_numpy(dtype='int64')
+        columns[col] = values
+    
+    return pd.DataFrame(columns, index=data.index)
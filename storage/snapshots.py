@@ -0,0 +1,212 @@
+"""
+Incremental snapshots of saved bar batches, restorable per day
+"""
+import os
+import shutil
+import threading
+import time
+import pandas as pd
+from datetime import datetime
+from typing import List, Tuple
+import logging
+
+from storage.atomic import atomic_write
+from storage.schema import normalize_datetimes, compact_bars, concat_bars
+from storage.process_pool import write_bars_csv
+
+logger = logging.getLogger(__name__)
+
+def day_key(day) -> str:
+    """Snapshot day key (YYYYMMDD) for a date, timestamp or date string"""
+    if isinstance(day, str) and len(day) == 8 and day.isdigit():
+        return day
+    return pd.Timestamp(day).strftime('%Y%m%d')
+
+class SnapshotStore:
+    """
+    Keeps every saved batch under {directory}/{timeframe}/{YYYYMMDD}/{sequence}_{mode}.csv
+    
+    Only the batches are stored, never the merged dataset, so backup I/O
+    per save is proportional to the new bars. A 'replace' batch is a full
+    base; the state at the end of a day is the latest base up to that day
+    with the later 'append' batches merged on top, exactly as the storage
+    managers merge them (last write per Symbol/Datetime wins).
+    """
+    
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._last_sequence = 0
+        self._based = set()
+        
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _next_sequence(self) -> str:
+        """Monotonic, time-ordered sequence id"""
+        with self._lock:
+            self._last_sequence = max(self._last_sequence + 1, time.time_ns())
+            return f"{self._last_sequence:020d}"
+    
+    def _day_dir(self, timeframe: str, day: str) -> str:
+        """Directory holding one day's batches of a timeframe"""
+        return os.path.join(self.directory, timeframe, day)
+    
+    def _batch_path(self, timeframe: str, sequence: str, append: bool, day: str = None) -> str:
+        """Path of a batch file, creating its day directory"""
+        day_dir = self._day_dir(timeframe, day or datetime.now().strftime('%Y%m%d'))
+        os.makedirs(day_dir, exist_ok=True)
+        return os.path.join(day_dir, f"{sequence}_{'append' if append else 'replace'}.csv")
+    
+    def record(self, timeframe: str, data: pd.DataFrame, append: bool, sequence: str = None):
+        """
+        Store a saved batch in today's snapshot
+        
+        Args:
+            timeframe: Timeframe identifier
+            data: Batch that was saved
+            append: Whether the batch was merged (False for a full replacement)
+            sequence: Optional sequence id (defaults to a new one)
+        """
+        path = self._batch_path(timeframe, sequence or self._next_sequence(), append)
+        atomic_write(path, lambda temp_path: write_bars_csv(data, temp_path), fsync=self.fsync)
+        if not append:
+            self._based.add(timeframe)
+    
+    def adopt(self, timeframe: str, path: str, append: bool, sequence: str):
+        """
+        Move an already written batch file (e.g. a committed journal entry) into today's snapshot
+        
+        Args:
+            timeframe: Timeframe identifier
+            path: CSV file holding the batch
+            append: Whether the batch was merged
+            sequence: Sequence id of the batch
+        """
+        os.replace(path, self._batch_path(timeframe, sequence, append))
+        if not append:
+            self._based.add(timeframe)
+    
+    def has_base(self, timeframe: str) -> bool:
+        """
+        Check whether a timeframe's snapshots start from a full base
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            True if any 'replace' batch is stored
+        """
+        if timeframe not in self._based and any(not append for _, _, append, _ in self._batches(timeframe)):
+            self._based.add(timeframe)
+        return timeframe in self._based
+    
+    def list_timeframes(self) -> List[str]:
+        """List timeframes with stored snapshots"""
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+    
+    def list_days(self, timeframe: str) -> List[str]:
+        """
+        List the days with stored batches
+        
+        Args:
+            timeframe: Timeframe identifier
+        
+        Returns:
+            Sorted list of YYYYMMDD day keys
+        """
+        timeframe_dir = os.path.join(self.directory, timeframe)
+        if not os.path.isdir(timeframe_dir):
+            return []
+        return sorted(day for day in os.listdir(timeframe_dir) if len(day) == 8 and day.isdigit())
+    
+    def _batches(self, timeframe: str, through_day: str = None) -> List[Tuple[str, str, bool, str]]:
+        """
+        List stored batches in save order
+        
+        Returns:
+            List of (day, sequence, append, path)
+        """
+        batches = []
+        for day in self.list_days(timeframe):
+            if through_day and day > through_day:
+                break
+            day_dir = self._day_dir(timeframe, day)
+            for filename in os.listdir(day_dir):
+                if not filename.endswith('.csv'):
+                    continue
+                try:
+                    sequence, mode = filename[:-len('.csv')].split('_', 1)
+                except ValueError:
+                    continue
+                batches.append((day, sequence, mode == 'append', os.path.join(day_dir, filename)))
+        
+        # Within one sequence a compacted base ('replace') supersedes the batch it was named after
+        return sorted(batches, key=lambda batch: (batch[0], batch[1], not batch[2]))
+    
+    def load(self, timeframe: str, day) -> pd.DataFrame:
+        """
+        Rebuild a timeframe's stored data as it was at the end of a day
+        
+        Args:
+            timeframe: Timeframe identifier
+            day: Day to restore (date, timestamp, 'YYYY-MM-DD' or 'YYYYMMDD')
+        
+        Returns:
+            DataFrame sorted by Symbol and Datetime (empty if nothing was saved by then)
+        """
+        batches = self._batches(timeframe, day_key(day))
+        
+        # Everything before the latest full base is superseded by it
+        base = max((i for i, batch in enumerate(batches) if not batch[2]), default=0)
+        
+        frames = []
+        for _, _, _, path in batches[base:]:
+            batch = pd.read_csv(path)
+            batch['Datetime'] = normalize_datetimes(batch['Datetime'])
+            frames.append(compact_bars(batch))
+        
+        if not frames:
+            return pd.DataFrame()
+        
+        data = concat_bars(frames)
+        data = data.drop_duplicates(subset=['Symbol', 'Datetime'], keep='last')
+        return data.sort_values(['Symbol', 'Datetime']).reset_index(drop=True)
+    
+    def compact(self, timeframe: str, keep_from_day) -> int:
+        """
+        Drop batches needed only to restore days before `keep_from_day`
+        
+        The state at the end of the last older day becomes a new base, so
+        every day from `keep_from_day` on can still be restored.
+        
+        Args:
+            timeframe: Timeframe identifier
+            keep_from_day: Earliest day that must stay restorable
+        
+        Returns:
+            Number of day directories removed
+        """
+        older = [day for day in self.list_days(timeframe) if day < day_key(keep_from_day)]
+        if not older:
+            return 0
+        
+        last_day = older[-1]
+        batches = self._batches(timeframe, last_day)
+        last_sequence = batches[-1][1] if batches else None
+        
+        if last_sequence and len(batches) > 1:
+            base = self.load(timeframe, last_day)
+            base_path = os.path.join(self._day_dir(timeframe, last_day), f"{last_sequence}_replace.csv")
+            atomic_write(base_path, lambda temp_path: write_bars_csv(base, temp_path), fsync=self.fsync)
+            
+            for _, _, _, path in batches:
+                if path != base_path:
+                    os.remove(path)
+        
+        for day in older[:-1]:
+            shutil.rmtree(self._day_dir(timeframe, day), ignore_errors=True)
+        
+        logger.info(f"Compacted {timeframe} snapshots before {last_day} into one base")
+        return len(older) - 1
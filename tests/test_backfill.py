@@ -0,0 +1,67 @@
+"""
+Tests for recording ranges the provider returned empty during backfill
+"""
+import pandas as pd
+
+from data_sources.base import BaseDataSource
+from services.backfill import BackfillPlanner, EmptyRangeLog
+from services.coverage import expected_bars
+from storage.file_storage import FileStorageManager
+from utils.rate_limiter import rate_limiter
+
+NOW = pd.Timestamp('2025-06-02 18:00', tz='Asia/Kolkata')
+
+class FakeSource(BaseDataSource):
+    """Daily bars for every symbol except `empty`; `failing` requests raise inside the request"""
+    
+    def __init__(self, empty=(), failing=()):
+        super().__init__(rate_limit_delay=0)
+        self.empty = set(empty)
+        self.failing = set(failing)
+        rate_limiter.configure(self.source_name, requests_per_second=1000, burst=100)
+    
+    def _request(self, symbol, start, end):
+        if symbol in self.failing:
+            raise ConnectionError('connection reset')
+        if symbol in self.empty:
+            return pd.DataFrame()
+        grid = expected_bars('1d', pd.Timestamp(start), pd.Timestamp(end) - pd.Timedelta(1, 'ns'))
+        return pd.DataFrame({
+            'Symbol': symbol.replace('.NS', ''), 'Datetime': grid,
+            'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1
+        })
+    
+    def get_stock_data(self, symbol, period, interval, start=None, end=None):
+        # Errors are logged and swallowed, like the real sources do
+        try:
+            data = self.rate_limited_request(self._request, symbol, start, end)
+        except Exception:
+            return None
+        return None if data.empty else data
+    
+    def get_multiple_stocks_data(self, symbols, period, interval, start=None, end=None):
+        frames = [self.get_stock_data(symbol, period, interval, start, end) for symbol in symbols]
+        frames = [frame for frame in frames if frame is not None]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
+    def is_available(self):
+        return True
+
+def _planner(tmp_path, source):
+    storage = FileStorageManager(base_path=str(tmp_path))
+    return BackfillPlanner(source, storage, empty_ranges=EmptyRangeLog(str(tmp_path / 'empty.json')))
+
+def test_empty_range_is_not_planned_again(tmp_path):
+    planner = _planner(tmp_path, FakeSource(empty=['RELIANCE.NS']))
+    planner.run('1d', ['RELIANCE.NS', 'TCS.NS'], NOW)
+    
+    assert list(planner.empty_ranges.get_ranges('1d', NOW)) == ['RELIANCE']
+    assert planner.plan('1d', ['RELIANCE.NS', 'TCS.NS'], NOW) == []
+
+def test_failed_request_is_not_recorded(tmp_path):
+    planner = _planner(tmp_path, FakeSource(failing=['RELIANCE.NS']))
+    planner.run('1d', ['RELIANCE.NS', 'TCS.NS'], NOW)
+    
+    assert planner.empty_ranges.get_ranges('1d', NOW) == {}
+    requests = planner.plan('1d', ['RELIANCE.NS', 'TCS.NS'], NOW)
+    assert [request.symbols for request in requests] == [['RELIANCE.NS']]
@@ -0,0 +1,54 @@
+"""
+Tests for the bar cache under loads racing saves
+"""
+import threading
+
+import pandas as pd
+
+from storage.cache import CachedStorageManager
+from storage.file_storage import FileStorageManager
+
+def _bars(close: float) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Datetime': [pd.Timestamp('2025-02-25 09:15', tz='Asia/Kolkata')],
+        'Symbol': ['AAA'],
+        'Open': [close], 'High': [close], 'Low': [close], 'Close': [close], 'Volume': [1000]
+    })
+
+def test_load_racing_a_save_is_not_cached(tmp_path, monkeypatch):
+    storage = FileStorageManager(base_path=str(tmp_path))
+    storage.save_data(_bars(100.0), '15m', append=False)
+    cached = CachedStorageManager(storage)
+    
+    # Hold the load after it read the old bars until the save has finished
+    read_done, save_done = threading.Event(), threading.Event()
+    load_data = storage.load_data
+    def slow_load(*args, **kwargs):
+        data = load_data(*args, **kwargs)
+        read_done.set()
+        save_done.wait(5)
+        return data
+    monkeypatch.setattr(storage, 'load_data', slow_load)
+    
+    results = []
+    reader = threading.Thread(target=lambda: results.append(cached.load_data('15m', symbol_filter=['AAA'])))
+    reader.start()
+    assert read_done.wait(5)
+    monkeypatch.setattr(storage, 'load_data', load_data)
+    cached.save_data(_bars(200.0), '15m', append=True)
+    save_done.set()
+    reader.join(5)
+    
+    assert results[0]['Close'].tolist() == [100.0]
+    assert cached.load_data('15m', symbol_filter=['AAA'])['Close'].tolist() == [200.0]
+
+def test_invalidation_bumps_generation():
+    cached = CachedStorageManager(FileStorageManager.__new__(FileStorageManager))
+    generation = cached.cache.generation('15m')
+    cached.cache.invalidate('15m', ['AAA'])
+    
+    cached.cache.put('15m', 'AAA', _bars(100.0), generation)
+    assert cached.cache.get('15m', 'AAA') is None
+    
+    cached.cache.put('15m', 'AAA', _bars(100.0), cached.cache.generation('15m'))
+    assert cached.cache.get('15m', 'AAA') is not None
@@ -0,0 +1,47 @@
+"""
+Tests for the coverage check against the exchange calendar
+"""
+import pandas as pd
+
+from services.coverage import check_coverage, expected_bars
+
+def _daily_bars(symbol: str, days) -> pd.DataFrame:
+    """Daily bars stamped at midnight IST"""
+    datetimes = pd.DatetimeIndex(days).tz_localize('Asia/Kolkata')
+    return pd.DataFrame({
+        'Symbol': symbol,
+        'Datetime': datetimes,
+        'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.5, 'Volume': 1000
+    })
+
+def test_expected_bars_skip_holidays():
+    # Mahashivratri (2025-02-26) and Guru Nanak Jayanti (2025-11-05) fall on weekdays
+    for timeframe in ['1d', '15m']:
+        grid = expected_bars(timeframe, '2025-02-24', '2025-11-07 23:59')
+        assert not (grid.normalize() == pd.Timestamp('2025-02-26', tz='Asia/Kolkata')).any()
+        assert not (grid.normalize() == pd.Timestamp('2025-11-05', tz='Asia/Kolkata')).any()
+        assert (grid.normalize() == pd.Timestamp('2025-02-25', tz='Asia/Kolkata')).any()
+
+def test_holiday_not_reported_missing():
+    days = ['2025-02-24', '2025-02-25', '2025-02-27', '2025-02-28']
+    coverage = check_coverage(_daily_bars('RELIANCE', days), '1d',
+                              start='2025-02-24', end='2025-02-28')
+    
+    assert coverage.missing.empty
+    assert coverage.gaps.empty
+    assert coverage.summary.loc['RELIANCE', 'expected'] == 4
+
+def test_missing_session_reported_around_holiday():
+    days = ['2025-02-24', '2025-02-27', '2025-02-28']
+    coverage = check_coverage(_daily_bars('RELIANCE', days), '1d',
+                              start='2025-02-24', end='2025-02-28')
+    
+    assert list(coverage.missing['Datetime']) == [pd.Timestamp('2025-02-25', tz='Asia/Kolkata')]
+
+def test_bar_on_holiday_is_extra():
+    days = ['2025-02-25', '2025-02-26', '2025-02-27']
+    coverage = check_coverage(_daily_bars('RELIANCE', days), '1d',
+                              start='2025-02-25', end='2025-02-27')
+    
+    assert list(coverage.extra['Datetime']) == [pd.Timestamp('2025-02-26', tz='Asia/Kolkata')]
+    assert coverage.missing.empty
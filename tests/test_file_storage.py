@@ -0,0 +1,55 @@
+"""
+Tests for appending batches to CSV storage
+"""
+import numpy as np
+import pandas as pd
+
+from storage.file_storage import FileStorageManager
+from storage.metadata_index import summarize_symbols
+
+START = pd.Timestamp('2025-01-01 09:15', tz='Asia/Kolkata')
+
+def _bars(symbols, first: int, count: int, seed: int = 0) -> pd.DataFrame:
+    times = [START + pd.Timedelta(minutes=15 * i) for i in range(first, first + count)]
+    rows = [(symbol, time) for symbol in symbols for time in times]
+    prices = np.random.default_rng(seed).random(len(rows))
+    return pd.DataFrame({
+        'Datetime': [time for _, time in rows],
+        'Symbol': [symbol for symbol, _ in rows],
+        'Open': prices, 'High': prices, 'Low': prices, 'Close': prices, 'Volume': 1000
+    })
+
+def _saves(storage: FileStorageManager):
+    storage.save_data(_bars(['AAA', 'BBB'], 0, 4), '15m', append=False)
+    storage.save_data(_bars(['BBB'], 4, 3, seed=1), '15m', append=True)      # After the last row
+    storage.save_data(_bars(['CCC'], 0, 2, seed=2), '15m', append=True)      # New trailing symbol
+    storage.save_data(_bars(['AAA', 'CCC'], 3, 2, seed=3), '15m', append=True)  # Interleaved, merged
+
+def test_appends_match_full_rewrites(tmp_path, monkeypatch):
+    appended = FileStorageManager(base_path=str(tmp_path / 'appended'))
+    _saves(appended)
+    
+    rewritten = FileStorageManager(base_path=str(tmp_path / 'rewritten'))
+    monkeypatch.setattr(rewritten, '_tail_rows', lambda data, timeframe, path: None)
+    _saves(rewritten)
+    
+    assert (tmp_path / 'appended' / 'market_data_15m.csv').read_text() == \
+        (tmp_path / 'rewritten' / 'market_data_15m.csv').read_text()
+    
+    stored = appended.load_data('15m')
+    expected = summarize_symbols(stored)
+    entries = appended.metadata.get_entries('15m')
+    assert sorted(entries) == ['AAA', 'BBB', 'CCC']
+    for symbol, entry in entries.items():
+        assert entry['rows'] == expected.at[symbol, 'rows']
+        assert int(entry['checksum'], 16) == int(expected.at[symbol, 'checksum'])
+
+def test_tail_batch_is_appended_without_loading(tmp_path, monkeypatch):
+    storage = FileStorageManager(base_path=str(tmp_path))
+    storage.save_data(_bars(['AAA', 'BBB'], 0, 4), '15m', append=False)
+    
+    def fail_load(*args, **kwargs):
+        raise AssertionError('stored bars were loaded')
+    monkeypatch.setattr(storage, 'load_data', fail_load)
+    
+    assert storage.save_data(_bars(['BBB'], 4, 2), '15m', append=True)
@@ -0,0 +1,26 @@
+"""
+Tests that storage types sharing a base path keep separate metadata
+"""
+import pandas as pd
+import pytest
+
+from storage.file_storage import FileStorageManager
+from storage.mmap_storage import MmapStorageManager
+from storage.partitioned_storage import PartitionedStorageManager
+
+def _bars() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Symbol': ['AAA'],
+        'Datetime': [pd.Timestamp('2025-01-01 11:30', tz='Asia/Kolkata')],
+        'Open': [100.0], 'High': [101.0], 'Low': [99.0], 'Close': [100.5], 'Volume': [1000]
+    })
+
+@pytest.mark.parametrize('storage_class', [PartitionedStorageManager, MmapStorageManager])
+def test_index_not_shared_with_csv_storage(tmp_path, storage_class):
+    FileStorageManager(base_path=str(tmp_path)).save_data(_bars(), '15m', append=False)
+    
+    storage = storage_class(base_path=str(tmp_path))
+    
+    assert storage.load_data('15m').empty
+    assert storage.metadata.get_latest_times('15m') == {}
+    assert storage.metadata.path != FileStorageManager(base_path=str(tmp_path)).metadata.path
@@ -0,0 +1,34 @@
+"""
+Tests for holiday-data warnings of the trading calendar
+"""
+import logging
+from datetime import datetime
+
+from utils.trading_calendar import TradingCalendar
+
+def _warnings(caplog):
+    return [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+
+def test_starts_at_first_holiday_year_without_warning(caplog):
+    with caplog.at_level(logging.WARNING):
+        calendar = TradingCalendar(holidays=['2024-01-26', '2025-02-26'], end_year=2026)
+    
+    assert calendar.sessions[0].astype(object).year == 2024
+    assert _warnings(caplog) == []
+
+def test_warns_once_when_a_query_reaches_a_year_without_holidays(caplog):
+    calendar = TradingCalendar(holidays=['2024-01-26', '2025-02-26'], end_year=2026)
+    
+    with caplog.at_level(logging.WARNING):
+        assert not calendar.is_session('2025-02-26')
+        assert calendar.is_open(datetime(2025, 2, 25, 10))
+        assert _warnings(caplog) == []
+        
+        calendar.sessions_in_range('2022-06-01', '2024-06-01')
+        calendar.is_session('2023-03-08')
+        calendar.is_open(datetime(2026, 3, 3, 10))
+    
+    warnings = _warnings(caplog)
+    assert len(warnings) == 2
+    assert warnings[0].startswith('No exchange holidays for 2022, 2023;')
+    assert warnings[1].startswith('No exchange holidays for 2026;')
@@ -0,0 +1,33 @@
+"""
+Tests for the bar-close trigger around exchange holidays
+"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from schedulers.triggers import BarCloseTrigger
+
+def _ist(value: str) -> datetime:
+    return pd.Timestamp(value, tz='Asia/Kolkata').to_pydatetime()
+
+@pytest.mark.parametrize('now, next_session', [
+    ('2024-11-19 16:00', '2024-11-21'),   # Maharashtra assembly election
+    ('2025-02-25 15:31', '2025-02-27'),   # Mahashivratri
+    ('2025-10-20 15:40', '2025-10-23'),   # Diwali Laxmi Pujan, Balipratipada
+    ('2026-01-14 15:45', '2026-01-16'),   # Municipal corporation elections
+])
+def test_skips_holidays(now, next_session):
+    fifteen = BarCloseTrigger(15, delay_seconds=10).get_next_fire_time(None, _ist(now))
+    hourly = BarCloseTrigger(60, delay_seconds=10).get_next_fire_time(None, _ist(now))
+    
+    assert fifteen == _ist(f'{next_session} 09:30:10')
+    assert hourly == _ist(f'{next_session} 10:15:10')
+
+def test_fires_after_each_bar_close():
+    trigger = BarCloseTrigger(15, delay_seconds=10)
+    first = trigger.get_next_fire_time(None, _ist('2025-02-25 09:31'))
+    second = trigger.get_next_fire_time(first, first)
+    
+    assert first == _ist('2025-02-25 09:45:10')
+    assert second == _ist('2025-02-25 10:00:10')
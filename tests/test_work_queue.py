@@ -0,0 +1,55 @@
+"""
+Tests for the per-symbol work queue
+"""
+import threading
+import time
+
+import pandas as pd
+
+from schedulers.timeframe_handlers import IntradayHandler
+from schedulers.work_queue import SymbolWorkQueue
+from storage.file_storage import FileStorageManager
+
+def _bars(symbol: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Symbol': [symbol],
+        'Datetime': [pd.Timestamp('2025-02-25 09:15', tz='Asia/Kolkata')],
+        'Open': [100.0], 'High': [101.0], 'Low': [99.0], 'Close': [100.5], 'Volume': [1000]
+    })
+
+def test_run_saves_every_symbol_once(tmp_path, monkeypatch):
+    storage = FileStorageManager(base_path=str(tmp_path))
+    storage.save_data(_bars('BASE'), '15m', append=False)
+    
+    saves = []
+    save_data = storage.save_data
+    def counting_save(data, timeframe, append=True):
+        saves.append(sorted(data['Symbol'].unique()))
+        return save_data(data, timeframe, append=append)
+    monkeypatch.setattr(storage, 'save_data', counting_save)
+    
+    # Every worker is still busy when the last item is popped
+    def slow_fetch(self, timeframe, symbols):
+        time.sleep(0.2)
+        return _bars(symbols[0].replace('.NS', ''))
+    monkeypatch.setattr(IntradayHandler, 'get_symbols_to_update', lambda self, symbols: symbols)
+    monkeypatch.setattr(IntradayHandler, 'fetch_data', slow_fetch)
+    
+    done = threading.Event()
+    results = {}
+    def on_complete(timeframe, stats):
+        results.update(stats)
+        done.set()
+    
+    work_queue = SymbolWorkQueue(data_source=None, storage_manager=storage, workers=4)
+    work_queue.start()
+    try:
+        work_queue.submit('15m', ['AAA.NS', 'BBB.NS', 'CCC.NS', 'DDD.NS'], on_complete=on_complete)
+        assert done.wait(10)
+    finally:
+        work_queue.stop()
+    
+    assert saves == [['AAA', 'BBB', 'CCC', 'DDD']]
+    assert results['saved_rows'] == 4 and results['success']
+    stored = storage.load_data('15m')
+    assert sorted(stored['Symbol'].unique()) == ['AAA', 'BASE', 'BBB', 'CCC', 'DDD']
@@ -7,7 +7,7 @@ from typing import Tuple
 import logging
 
 from config.settings import MARKET_OPEN_TIME, MARKET_CLOSE_TIME
-from config.schedules import is_trading_day
+from utils.trading_calendar import trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +17,16 @@ IST = pytz.timezone('Asia/Kolkata')
 class MarketHours:
     """
     Utility class for market hours and timing operations
+    
+    Trading days come from the precomputed trading calendar, so the checks
+    here are binary searches rather than per-day holiday scans.
     """
     
     def __init__(self):
         self.market_open = MARKET_OPEN_TIME
         self.market_close = MARKET_CLOSE_TIME
         self.timezone = IST
+        self.calendar = trading_calendar
     
     def get_current_ist_time(self) -> datetime:
         """
@@ -48,13 +52,8 @@ class MarketHours:
         if check_time is None:
             check_time = self.get_current_ist_time()
         
-        # Check if it's a trading day
-        if not is_trading_day(check_time):
-            return False
-        
-        # Check if time is within market hours
-        current_time = check_time.time()
-        return self.market_open <= current_time <= self.market_close
+        # Trading day and within market hours
+        return self.calendar.is_open(check_time)
     
     def get_market_status(self, check_time: datetime = None) -> str:
         """
@@ -69,7 +68,7 @@ class MarketHours:
         if check_time is None:
             check_time = self.get_current_ist_time()
         
-        if not is_trading_day(check_time):
+        if not self.calendar.is_session(check_time):
             return "Market Closed (Holiday/Weekend)"
         
         current_time = check_time.time()
@@ -146,8 +145,7 @@ class MarketHours:
             candidate_date += timedelta(days=1)
         
         # Find next trading day
-        while not is_trading_day(datetime.combine(candidate_date, time())):
-            candidate_date += timedelta(days=1)
+        candidate_date = self.calendar.next_session(candidate_date)
         
         # Combine with market open time
         next_open = datetime.combine(candidate_date, self.market_open)
@@ -235,16 +233,7 @@ class MarketHours:
         Returns:
             Number of trading days
         """
-        trading_days = 0
-        current_date = start_date.date()
-        end = end_date.date()
-        
-        while current_date <= end:
-            if is_trading_day(datetime.combine(current_date, time())):
-                trading_days += 1
-            current_date += timedelta(days=1)
-        
-        return trading_days
+        return self.calendar.sessions_between(start_date.date(), end_date.date())
 
 # Global instance for easy access
 market_hours = MarketHours()
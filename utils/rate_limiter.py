@@ -0,0 +1,282 @@
+"""
+Process-wide token-bucket rate limiting shared by all data sources and jobs
+"""
+import threading
+import time
+import logging
+from typing import Dict
+
+from config.settings import RATE_LIMITS, RATE_LIMIT_BACKOFF
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with burst capacity and adaptive backoff
+    
+    Tokens refill continuously at `rate` per second up to `capacity`. When the
+    provider throttles us the rate is cut multiplicatively and all requests
+    pause for a backoff period; successful requests restore the rate additively.
+    """
+    
+    def __init__(self, name: str, rate: float, capacity: float, backoff_config: Dict = None):
+        self.name = name
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        
+        config = backoff_config or RATE_LIMIT_BACKOFF
+        self.initial_backoff = config.get('initial_seconds', 5.0)
+        self.max_backoff = config.get('max_seconds', 300.0)
+        self.decrease_factor = config.get('decrease_factor', 0.5)
+        self.recovery_step = config.get('recovery_step', 0.1)
+        self.min_rate = self.base_rate * config.get('min_rate_fraction', 0.1)
+        self.empty_threshold = config.get('empty_response_threshold', 3)
+        
+        self.backoff_until = 0.0
+        self.consecutive_throttles = 0
+        self.consecutive_empty = 0
+        
+        self.requests_granted = 0
+        self.throttle_events = 0
+        self.total_wait_seconds = 0.0
+        
+        self._lock = threading.Lock()
+        self._updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        """Add tokens accumulated since the last refill (lock must be held)"""
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+    
+    def acquire(self, tokens: float = 1.0, timeout: float = None) -> bool:
+        """
+        Take tokens from the bucket, blocking until they are available
+        
+        Args:
+            tokens: Number of tokens (requests) to take
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        
+        Returns:
+            True if tokens were acquired, False if the timeout expired
+        """
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                
+                if now < self.backoff_until:
+                    wait = self.backoff_until - now
+                elif self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.requests_granted += 1
+                    self.total_wait_seconds += now - start
+                    return True
+                else:
+                    wait = (tokens - self.tokens) / self.rate
+            
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            
+            time.sleep(wait)
+    
+    def cooldown_remaining(self) -> float:
+        """Seconds left in the current backoff period (0 if not backing off)"""
+        with self._lock:
+            return max(0.0, self.backoff_until - time.monotonic())
+    
+    def penalize(self, reason: str = 'throttled'):
+        """
+        Back off after the provider throttled us
+        
+        Args:
+            reason: Short description for logging
+        """
+        with self._lock:
+            self.consecutive_throttles += 1
+            self.throttle_events += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            
+            backoff = min(self.max_backoff,
+                          self.initial_backoff * (2 ** (self.consecutive_throttles - 1)))
+            self.backoff_until = max(self.backoff_until, time.monotonic() + backoff)
+            self.tokens = 0.0
+        
+        logger.warning(f"Rate limit backoff for {self.name} ({reason}): pausing {backoff:.1f}s, "
+                       f"rate reduced to {self.rate:.2f} requests/sec")
+    
+    def record_success(self):
+        """Restore the rate additively after a successful request"""
+        with self._lock:
+            self.consecutive_throttles = 0
+            self.consecutive_empty = 0
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * self.recovery_step)
+    
+    def record_empty(self):
+        """
+        Count an empty response
+        
+        Providers such as Yahoo often answer with empty data instead of
+        HTTP 429 when throttling, so a run of empty responses backs off too.
+        """
+        with self._lock:
+            self.consecutive_empty += 1
+            should_penalize = self.consecutive_empty >= self.empty_threshold
+            if should_penalize:
+                self.consecutive_empty = 0
+        
+        if should_penalize:
+            self.penalize(reason=f'{self.empty_threshold} consecutive empty responses')
+    
+    def get_stats(self) -> Dict:
+        """
+        Get bucket statistics
+        
+        Returns:
+            Dictionary with current rate, tokens and counters
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': round(self.rate, 3),
+                'base_rate': self.base_rate,
+                'capacity': self.capacity,
+                'tokens': round(self.tokens, 3),
+                'backoff_remaining': round(max(0.0, self.backoff_until - time.monotonic()), 2),
+                'requests_granted': self.requests_granted,
+                'throttle_events': self.throttle_events,
+                'total_wait_seconds': round(self.total_wait_seconds, 2)
+            }
+
+class RateLimiter:
+    """
+    Registry of per-source token buckets shared by the whole process
+    
+    Data sources draw one token per provider request and report throttling
+    back, so concurrently running scheduler jobs share a single budget.
+    """
+    
+    def __init__(self, limits: Dict = None):
+        self.limits = limits or RATE_LIMITS
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def get_bucket(self, source_name: str) -> TokenBucket:
+        """
+        Get (or lazily create) the bucket for a data source
+        
+        Args:
+            source_name: Data source name (e.g. 'YFinance')
+        
+        Returns:
+            TokenBucket for the source
+        """
+        with self._lock:
+            bucket = self._buckets.get(source_name)
+            if bucket is None:
+                quota = self.limits.get(source_name, self.limits.get('default', {}))
+                bucket = TokenBucket(
+                    name=source_name,
+                    rate=quota.get('requests_per_second', 1.0),
+                    capacity=quota.get('burst', 1)
+                )
+                self._buckets[source_name] = bucket
+            return bucket
+    
+    def configure(self, source_name: str, requests_per_second: float, burst: float = 1):
+        """
+        Set the quota of a source, replacing its bucket
+        
+        Args:
+            source_name: Data source name
+            requests_per_second: Sustained request rate
+            burst: Bucket capacity
+        """
+        with self._lock:
+            self._buckets[source_name] = TokenBucket(
+                name=source_name,
+                rate=requests_per_second,
+                capacity=burst
+            )
+    
+    def acquire(self, source_name: str, tokens: float = 1.0, timeout: float = None) -> bool:
+        """Block until `tokens` requests are allowed for the source"""
+        return self.get_bucket(source_name).acquire(tokens, timeout)
+    
+    def report_throttled(self, source_name: str):
+        """Report an HTTP 429 / rate-limit error from the source"""
+        self.get_bucket(source_name).penalize()
+    
+    def report_empty(self, source_name: str):
+        """Report an empty response from the source"""
+        self.get_bucket(source_name).record_empty()
+    
+    def report_success(self, source_name: str):
+        """Report a successful response from the source"""
+        self.get_bucket(source_name).record_success()
+    
+    def wait_for_cooldown(self, source_name: str, timeout: float = None) -> bool:
+        """
+        Wait until the source is no longer backing off
+        
+        Args:
+            source_name: Data source name
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        
+        Returns:
+            True if the source is ready, False if the timeout expired first
+        """
+        remaining = self.get_bucket(source_name).cooldown_remaining()
+        if remaining <= 0:
+            return True
+        
+        if timeout is not None and remaining > timeout:
+            return False
+        
+        logger.info(f"{source_name} is backing off, waiting {remaining:.1f}s")
+        time.sleep(remaining)
+        return True
+    
+    def get_rate(self, source_name: str) -> float:
+        """Get the current (possibly reduced) request rate for a source"""
+        return self.get_bucket(source_name).rate
+    
+    def get_status(self) -> Dict[str, Dict]:
+        """
+        Get statistics for all buckets
+        
+        Returns:
+            Dictionary of bucket statistics by source name
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {name: bucket.get_stats() for name, bucket in buckets.items()}
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an exception indicates provider throttling
+    
+    Args:
+        error: Exception raised by a provider call
+    
+    Returns:
+        True for HTTP 429 / rate-limit errors
+    """
+    if type(error).__name__ in ('YFRateLimitError', 'RateLimitError', 'TooManyRequests'):
+        return True
+    
+    message = str(error).lower()
+    return '429' in message or 'too many requests' in message or 'rate limit' in message
+
+# Global instance shared by all data sources and scheduler jobs
+rate_limiter = RateLimiter()
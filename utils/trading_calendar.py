@@ -0,0 +1,426 @@
+"""
+Precomputed exchange trading calendar with O(log n) session lookups
+"""
+import bisect
+import csv
+import glob
+import os
+import threading
+from datetime import date, datetime, time
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import pytz
+import logging
+
+from config.settings import (
+    MARKET_OPEN_TIME, MARKET_CLOSE_TIME, MARKET_TIMEZONE, MARKET_HOLIDAYS_DIR, TRADING_CALENDAR_START_YEAR
+)
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=pytz.UTC)
+
+DayLike = Union[str, date, datetime, np.datetime64]
+
+class _Sessions(NamedTuple):
+    """Precomputed sessions, as NumPy arrays and as Python lists for scalar lookups"""
+    sessions: np.ndarray        # datetime64[D]
+    opens: np.ndarray           # int64 epoch ns (UTC)
+    closes: np.ndarray
+    ordinals: List[int]         # date.toordinal() of each session
+    open_list: List[int]
+    close_list: List[int]
+    days: frozenset             # Session ordinals for membership tests
+    first: date                 # First and last day covered
+    last: date
+
+def load_holidays(directory: str = None) -> np.ndarray:
+    """
+    Read exchange holidays from every CSV file in a directory
+    
+    Each file (conventionally one per year, e.g. 2024.csv) has a header
+    row and `date,description` rows with ISO dates.
+    
+    Args:
+        directory: Holiday directory (default: MARKET_HOLIDAYS_DIR)
+    
+    Returns:
+        Sorted datetime64[D] array of holiday dates
+    """
+    directory = directory or MARKET_HOLIDAYS_DIR
+    holidays = []
+    
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        try:
+            with open(path, newline='') as f:
+                holidays.extend(row['date'].strip() for row in csv.DictReader(f) if row.get('date'))
+        except Exception as e:
+            logger.error(f"Error reading holiday file {path}: {str(e)}")
+    
+    if not holidays:
+        logger.warning(f"No exchange holidays found in {directory}; only weekends are closed")
+    return np.unique(np.array(holidays, dtype='datetime64[D]'))
+
+class TradingCalendar:
+    """
+    Exchange sessions as sorted arrays
+    
+    Arrays:
+        sessions: datetime64[D] dates of every trading day (weekdays that are not holidays)
+        opens, closes: int64 epoch nanoseconds (UTC) of each session's open and close
+    
+    Scalar lookups are a set lookup or a binary search (about a microsecond),
+    and `in_session` checks whole timestamp arrays at NumPy speed. Sessions
+    are precomputed from `start_year` through next year (or the last year
+    with holidays), and a query outside that range extends it.
+    
+    Dates may be given as date, datetime, pandas Timestamp, numpy
+    datetime64 or 'YYYY-MM-DD' strings. Naive datetimes are taken as
+    exchange-local time; aware ones are converted to it.
+    
+    Years without a holiday file count their weekday holidays as
+    sessions; the first query that reaches such a year logs a warning.
+    """
+    
+    def __init__(self, holidays: Iterable = None, open_time: time = None, close_time: time = None,
+                 timezone: str = None, start_year: int = None, end_year: int = None):
+        self.holidays = np.unique(np.asarray(load_holidays() if holidays is None else list(holidays),
+                                             dtype='datetime64[D]'))
+        self._holiday_days = frozenset(day.toordinal() for day in self.holidays.astype(date))
+        self._holiday_years = frozenset(day.year for day in self.holidays.astype(date))
+        self._checked_years = set()   # Years already checked for holiday data
+        self.open_time = open_time or MARKET_OPEN_TIME
+        self.close_time = close_time or MARKET_CLOSE_TIME
+        self.timezone = pytz.timezone(timezone or MARKET_TIMEZONE)
+        
+        if end_year is None:
+            last_holiday = self.holidays[-1].astype(date).year if len(self.holidays) else 0
+            end_year = max(datetime.now().year + 1, last_holiday)
+        start_year = start_year or TRADING_CALENDAR_START_YEAR
+        if start_year is None:
+            start_year = min(self._holiday_years, default=datetime.now().year)
+        
+        self._lock = threading.Lock()
+        self._sessions = self._build(start_year, end_year)
+    
+    def _build(self, first_year: int, last_year: int) -> _Sessions:
+        """Compute the sessions of a range of years"""
+        first, last = date(first_year, 1, 1), date(last_year, 12, 31)
+        days = np.arange(np.datetime64(first, 'D'), np.datetime64(last, 'D') + 1)
+        # 1970-01-01 was a Thursday; weekday 0 is Monday
+        weekdays = (days.astype('int64') + 3) % 7
+        sessions = days[(weekdays < 5) & ~np.isin(days, self.holidays)]
+        
+        local_days = pd.DatetimeIndex(sessions).as_unit('ns')
+        opens, closes = (
+            (local_days + pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second))
+            .tz_localize(self.timezone).asi8
+            for t in (self.open_time, self.close_time)
+        )
+        ordinals = [day.toordinal() for day in sessions.astype(date)]
+        
+        return _Sessions(sessions, opens, closes, ordinals, opens.tolist(), closes.tolist(),
+                         frozenset(ordinals), first, last)
+    
+    def _check_years(self, first_year: int, last_year: int):
+        """Log (once per year) the years a query reaches that have no holiday data"""
+        checked = self._checked_years
+        if first_year in checked and last_year in checked and last_year - first_year <= 1:
+            return
+        
+        years = range(first_year, last_year + 1)
+        missing = [year for year in years if year not in self._holiday_years and year not in checked]
+        checked.update(years)
+        if missing:
+            logger.warning(f"No exchange holidays for {', '.join(map(str, missing))}; weekday holidays "
+                           f"in those years count as sessions (add files to {MARKET_HOLIDAYS_DIR})")
+    
+    def _cover(self, first: date, last: date = None) -> _Sessions:
+        """Sessions covering a span of days, extending the precomputed range if needed"""
+        sessions = self._sessions
+        last = last or first
+        self._check_years(first.year, last.year)
+        if first < sessions.first or last > sessions.last:
+            with self._lock:
+                sessions = self._sessions
+                first_year = min(first.year, sessions.first.year)
+                last_year = max(last.year, sessions.last.year)
+                if (first_year, last_year) != (sessions.first.year, sessions.last.year):
+                    sessions = self._sessions = self._build(first_year, last_year)
+                    logger.info(f"Extended trading calendar to {first_year}-{last_year}")
+        return sessions
+    
+    @property
+    def sessions(self) -> np.ndarray:
+        """Precomputed session dates (datetime64[D])"""
+        return self._sessions.sessions
+    
+    @property
+    def opens(self) -> np.ndarray:
+        """Session open instants (int64 epoch ns, UTC)"""
+        return self._sessions.opens
+    
+    @property
+    def closes(self) -> np.ndarray:
+        """Session close instants (int64 epoch ns, UTC)"""
+        return self._sessions.closes
+    
+    def _date(self, value: DayLike) -> date:
+        """Exchange-local date of a value"""
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(self.timezone)
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, np.datetime64):
+            return value.astype('datetime64[D]').astype(date)
+        return pd.Timestamp(value).date()
+    
+    def _instant(self, value: datetime) -> int:
+        """Epoch nanoseconds (UTC) of a datetime"""
+        if isinstance(value, pd.Timestamp):
+            stamp = value if value.tzinfo is not None else value.tz_localize(self.timezone)
+            return stamp.as_unit('ns').value
+        if value.tzinfo is None:
+            value = self.timezone.localize(value)
+        delta = value - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+    
+    def is_session(self, day: DayLike) -> bool:
+        """
+        Check if a date is a trading day
+        
+        Args:
+            day: Date (or datetime, whose exchange-local date is used)
+        
+        Returns:
+            True if the exchange is open that day
+        """
+        day = self._date(day)
+        return day.toordinal() in self._cover(day).days
+    
+    def is_holiday(self, day: DayLike) -> bool:
+        """
+        Check if a date is a listed exchange holiday
+        
+        Args:
+            day: Date to check
+        
+        Returns:
+            True if the date is in the holiday files
+        """
+        return self._date(day).toordinal() in self._holiday_days
+    
+    def next_session(self, day: DayLike, inclusive: bool = True) -> date:
+        """
+        Get the first trading day on or after a date
+        
+        Args:
+            day: Reference date
+            inclusive: Whether `day` itself counts (False: strictly after)
+        
+        Returns:
+            Session date
+        """
+        day = self._date(day)
+        search = bisect.bisect_left if inclusive else bisect.bisect_right
+        sessions = self._cover(day)
+        i = search(sessions.ordinals, day.toordinal())
+        while i >= len(sessions.ordinals):
+            # Past the precomputed range - extend it by a year
+            sessions = self._cover(date(sessions.last.year + 1, 12, 31))
+            i = search(sessions.ordinals, day.toordinal())
+        return date.fromordinal(sessions.ordinals[i])
+    
+    def previous_session(self, day: DayLike, inclusive: bool = True) -> date:
+        """
+        Get the last trading day on or before a date
+        
+        Args:
+            day: Reference date
+            inclusive: Whether `day` itself counts (False: strictly before)
+        
+        Returns:
+            Session date
+        """
+        day = self._date(day)
+        search = bisect.bisect_right if inclusive else bisect.bisect_left
+        sessions = self._cover(day)
+        i = search(sessions.ordinals, day.toordinal()) - 1
+        while i < 0:
+            sessions = self._cover(date(sessions.first.year - 1, 1, 1))
+            i = search(sessions.ordinals, day.toordinal()) - 1
+        return date.fromordinal(sessions.ordinals[i])
+    
+    def sessions_in_range(self, start: DayLike, end: DayLike) -> np.ndarray:
+        """
+        Get the trading days between two dates (both inclusive)
+        
+        Args:
+            start: First date
+            end: Last date
+        
+        Returns:
+            datetime64[D] array of session dates
+        """
+        start, end = self._date(start), self._date(end)
+        if end < start:
+            return np.empty(0, dtype='datetime64[D]')
+        
+        sessions = self._cover(start, end)
+        lo = bisect.bisect_left(sessions.ordinals, start.toordinal())
+        hi = bisect.bisect_right(sessions.ordinals, end.toordinal())
+        return sessions.sessions[lo:hi]
+    
+    def sessions_between(self, start: DayLike, end: DayLike) -> int:
+        """
+        Count the trading days between two dates (both inclusive)
+        
+        Args:
+            start: First date
+            end: Last date
+        
+        Returns:
+            Number of sessions (0 if end is before start)
+        """
+        return len(self.sessions_in_range(start, end))
+    
+    def session_bounds(self, day: DayLike) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Get the open and close of a trading day
+        
+        Args:
+            day: Date
+        
+        Returns:
+            (open, close) as exchange-local Timestamps, or None if the day has no session
+        """
+        day = self._date(day)
+        sessions = self._cover(day)
+        i = bisect.bisect_left(sessions.ordinals, day.toordinal())
+        if i >= len(sessions.ordinals) or sessions.ordinals[i] != day.toordinal():
+            return None
+        return (pd.Timestamp(sessions.open_list[i], tz='UTC').tz_convert(self.timezone),
+                pd.Timestamp(sessions.close_list[i], tz='UTC').tz_convert(self.timezone))
+    
+    def bar_starts(self, start, end, minutes: int) -> np.ndarray:
+        """
+        Get the start instants of intraday bars between two instants
+        
+        Bars are `minutes` long, anchored at each session's open; the last
+        bar of a session is cut off at the close (15:15-15:30 for 1h).
+        
+        Args:
+            start: First instant (datetime, Timestamp or date string)
+            end: Last instant (bars starting at `end` are included)
+            minutes: Bar length in minutes
+        
+        Returns:
+            Sorted int64 array of bar starts (epoch ns, UTC)
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        start_ns, end_ns = self._instant(start), self._instant(end)
+        if end_ns < start_ns:
+            return np.empty(0, dtype='int64')
+        
+        sessions = self._cover(self._date(start), self._date(end))
+        lo = np.searchsorted(sessions.closes, start_ns, side='right')
+        hi = np.searchsorted(sessions.opens, end_ns, side='right')
+        opens, closes = sessions.opens[lo:hi], sessions.closes[lo:hi]
+        
+        # Every session contributes ceil(length / step) bars
+        step = minutes * 60 * 1_000_000_000
+        counts = -(-(closes - opens) // step)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        starts = np.repeat(opens, counts) + offsets * step
+        return starts[(starts >= start_ns) & (starts <= end_ns)]
+    
+    def next_bar_close(self, timestamp: datetime, minutes: int, inclusive: bool = False) -> pd.Timestamp:
+        """
+        Get the first intraday bar close after an instant
+        
+        Bars are `minutes` long, anchored at each session's open; the close
+        of the session ends its last bar (15:30 for 1h). Instants between
+        sessions map to the first bar close of the next session.
+        
+        Args:
+            timestamp: Reference instant (naive values are exchange-local)
+            minutes: Bar length in minutes
+            inclusive: Whether a bar closing exactly at `timestamp` counts
+        
+        Returns:
+            Bar close as an exchange-local Timestamp
+        """
+        value = self._instant(timestamp)
+        step = minutes * 60 * 1_000_000_000
+        day = self.next_session(timestamp)
+        
+        while True:
+            sessions = self._cover(day)
+            i = bisect.bisect_left(sessions.ordinals, day.toordinal())
+            session_open, session_close = sessions.open_list[i], sessions.close_list[i]
+            
+            if value < session_close or (inclusive and value == session_close):
+                # First multiple of the bar length after the open that is past `timestamp`
+                bars = (value - session_open) // step + 1
+                if inclusive and value > session_open and (value - session_open) % step == 0:
+                    bars -= 1
+                close = min(session_open + max(bars, 1) * step, session_close)
+                return pd.Timestamp(close, tz='UTC').tz_convert(self.timezone)
+            
+            day = self.next_session(day, inclusive=False)
+    
+    def in_session(self, timestamps) -> np.ndarray:
+        """
+        Check which timestamps fall inside a session (open and close inclusive)
+        
+        Args:
+            timestamps: Datetime array, Series or DatetimeIndex (naive values are exchange-local)
+        
+        Returns:
+            Boolean NumPy array
+        """
+        index = pd.DatetimeIndex(timestamps)
+        if index.tz is None:
+            index = index.tz_localize(self.timezone)
+        
+        missing = index.isna()
+        valid = index[~missing]
+        if not len(valid):
+            return np.zeros(len(index), dtype=bool)
+        
+        sessions = self._cover(valid.min().tz_convert(self.timezone).date(),
+                               valid.max().tz_convert(self.timezone).date())
+        values = index.as_unit('ns').asi8
+        i = np.searchsorted(sessions.opens, values, side='right') - 1
+        return (i >= 0) & (values <= sessions.closes[np.maximum(i, 0)]) & ~missing
+    
+    def is_open(self, timestamp: datetime) -> bool:
+        """
+        Check if the exchange is in session at an instant
+        
+        Args:
+            timestamp: Datetime (naive values are exchange-local)
+        
+        Returns:
+            True between a session's open and close (inclusive)
+        """
+        value = self._instant(timestamp)
+        sessions = self._sessions
+        if not sessions.open_list[0] <= value <= sessions.close_list[-1]:
+            sessions = self._cover(self._date(timestamp))
+        else:
+            year = self._date(timestamp).year
+            self._check_years(year, year)
+        
+        i = bisect.bisect_right(sessions.open_list, value) - 1
+        return i >= 0 and value <= sessions.close_list[i]
+    
+    def __repr__(self) -> str:
+        sessions = self._sessions
+        return f"TradingCalendar({len(sessions.ordinals)} sessions, {sessions.first} to {sessions.last})"
+
+# Global calendar built from the configured holiday files
+trading_calendar = TradingCalendar()